@@ -0,0 +1,56 @@
+"""Source stamps shared by the on-disk caches (scene pack, baked textures)."""
+import hashlib
+import json
+import os
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_stamp(path):
+    st = os.stat(path)
+    return {"path": path, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha1": file_digest(path)}
+
+
+def stamp_is_current(stamp):
+    """True if the file a stamp was taken from is unchanged.
+
+    A file whose mtime or size differs is re-hashed, so touching a file
+    without changing it does not invalidate the cache built from it. If the
+    hash still matches, the stamp takes the new mtime; callers should write
+    it back (rewrite_table) so the next check skips the hash again.
+    """
+    path = stamp["path"]
+    if not os.path.exists(path):
+        return False
+    st = os.stat(path)
+    if st.st_mtime_ns == stamp["mtime_ns"] and st.st_size == stamp["size"]:
+        return True
+    if st.st_size != stamp["size"] or file_digest(path) != stamp["sha1"]:
+        return False
+    stamp["mtime_ns"] = st.st_mtime_ns
+    return True
+
+
+def rewrite_table(path, header, fields, table_offset, table):
+    """Replace the JSON table at the end of a cache file in place.
+
+    header is the file's struct, whose last two fields are the table
+    offset and size; fields are the values before them. Failures are
+    ignored: the table is only an optimization to refresh.
+    """
+    table_bytes = json.dumps(table).encode("utf-8")
+    try:
+        with open(path, "r+b") as f:
+            f.seek(table_offset)
+            f.write(table_bytes)
+            f.truncate()
+            f.seek(0)
+            f.write(header.pack(*fields, table_offset, len(table_bytes)))
+    except OSError:
+        pass
@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import config
+from model_loader import SceneObject, texture_paths, load_model_from_txt
+from picking import load_mesh_with_bvh
+from scene_pack import load_model_from_pack, open_scene_pack, update_scene_pack
+from texture_loader import decode_texture, resolve_texture_path
+
+
+def worker_count(workers=config.LOADER_WORKERS):
+    """Number of loader workers; 0/None means one per core."""
+    return workers or os.cpu_count() or 1
+
+
+def _iter_meshes(folder_path, mesh_pool, pack_path):
+    """Yield (name, header, vertices, indices, lods, bvh) for every mesh in folder_path.
+
+    With the scene pack enabled the meshes come from the memory-mapped pack,
+    which is rebuilt in parallel when stale; otherwise each txt file is
+    parsed in the process pool, which also builds the picking BVHs
+    (config.PICKING, else bvh is None). Results keep os.listdir order
+    either way.
+    """
+    if config.USE_SCENE_PACK:
+        update_scene_pack(folder_path, pack_path, map_fn=mesh_pool.map)
+        yield from open_scene_pack(pack_path)
+    else:
+        paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".txt")]
+        yield from mesh_pool.map(partial(load_mesh_with_bvh, build=config.PICKING), paths)
+
+
+def load_scene(folder_path, texture_manager, workers=config.LOADER_WORKERS, pack_path=config.SCENE_PACK_PATH):
+    """Load every mesh and texture in folder_path, spreading the work over cores.
+
+    Mesh files are parsed in a process pool and images are decoded in a
+    thread pool (PIL releases the GIL while decoding). All GL objects are
+    created on the calling thread, which must own the context: mesh buffers
+    as each mesh arrives, textures (through texture_manager) as their
+    decodes finish.
+    """
+    workers = worker_count(workers)
+    if workers == 1:
+        if config.USE_SCENE_PACK:
+            return load_model_from_pack(folder_path, texture_manager.acquire, pack_path)
+        return load_model_from_txt(folder_path, texture_manager.acquire)
+
+    start = time.perf_counter()
+    objects = []
+    decodes = {}   # resolved path -> decode future, each image is decoded once
+    pending = []   # (object, texture type, resolved path) awaiting upload
+
+    def upload_ready(block):
+        for entry in list(pending):
+            obj, ttype, tex_path = entry
+            future = decodes[tex_path]
+            if block or future.done():
+                obj.textures[ttype] = texture_manager.acquire(tex_path, decoded=future.result())
+                pending.remove(entry)
+
+    # Spawned workers never inherit the GL/SDL state of this process
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=mp_context) as mesh_pool, \
+            ThreadPoolExecutor(workers) as decode_pool:
+        for name, header, vertices, indices, lods, bvh in _iter_meshes(folder_path, mesh_pool, pack_path):
+            obj = SceneObject(name, vertices, indices, {}, header, lods, bvh)
+            for ttype, path in texture_paths(header).items():
+                tex_path = resolve_texture_path(path)
+                if tex_path is None:
+                    continue
+                if tex_path not in decodes:
+                    decodes[tex_path] = decode_pool.submit(decode_texture, tex_path)
+                pending.append((obj, ttype, tex_path))
+            objects.append(obj)
+            upload_ready(block=False)
+        upload_ready(block=True)
+
+    print(f"Loaded {len(objects)} objects, {len(decodes)} textures in "
+          f"{time.perf_counter() - start:.2f}s with {workers} workers")
+    return objects
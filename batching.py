@@ -0,0 +1,227 @@
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from PIL import Image
+import config
+from mesh_format import compact_indices
+from model_loader import GL_INDEX_TYPES
+from texture_cache import build_mip_chain
+from texture_loader import decode_texture
+
+BATCH_VERTEX_COMPONENTS = 6  # x y z u v layer
+
+
+def _mips(rgba):
+    return build_mip_chain(rgba) if config.TEXTURE_MIPMAPS else [rgba]
+
+
+def _layer_levels(source, size):
+    """Mip chain [(H, W, 4) arrays] for one array layer, resized to size if needed."""
+    width, height = size
+    if source is None:
+        return _mips(np.full((height, width, 4), 255, dtype=np.uint8))
+
+    levels = decode_texture(source[0])
+    src_w, src_h, data = levels[0]
+    if (src_w, src_h) == size:
+        return [np.asarray(d).reshape(h, w, 4) for w, h, d in levels]
+    rgba = np.asarray(data).reshape(src_h, src_w, 4)
+    return _mips(np.asarray(Image.fromarray(rgba).resize(size, Image.BILINEAR)))
+
+
+def layer_textures(objects):
+    """Distinct BaseColor textures of objects (None if untextured), in array layer order"""
+    textures = {}
+    for obj in objects:
+        texture = obj.textures.get("BaseColor")
+        textures.setdefault(texture.key if texture else None, texture)
+    return list(textures.values())
+
+
+def arrays_by_size(textures):
+    """Distinct textures (None if untextured) split into one list per texture array, by base level size.
+
+    Layers of an array share a size, so no texture is stretched to the
+    largest one; untextured layers (white) join the first array. Reads
+    handle sizes, so it must run on the GL thread.
+    """
+    arrays = {}
+    for texture in textures:
+        arrays.setdefault(texture.size if texture is not None else None, []).append(texture)
+    untextured = arrays.pop(None, [])
+    groups = list(arrays.values()) or [[]]
+    groups[0] += untextured
+    return groups
+
+
+def array_textures(objects):
+    """layer_textures of objects split into one list per texture array, see arrays_by_size"""
+    return arrays_by_size(layer_textures(objects))
+
+
+def layer_sources(textures):
+    """(path, (width, height)) of each layer texture, None if untextured.
+
+    Reads the handles through their TextureManager, so it must run on the
+    GL thread; the result is plain data for layer_levels.
+    """
+    return [(texture.path, texture.size) if texture is not None else None for texture in textures]
+
+
+def layer_levels(sources):
+    """Mip chain of every array layer of layer_sources(), resized to the largest texture.
+
+    Only decodes and resizes on the CPU, so it can run on a worker thread
+    while frames are drawn; see StaticBatch.
+    """
+    sizes = [source[1] for source in sources if source is not None] or [(1, 1)]
+    size = max(sizes, key=lambda s: s[0] * s[1])
+    return [_layer_levels(source, size) for source in sources]
+
+
+def array_levels(arrays):
+    """layer_levels of each texture array, from [layer_sources(textures) per array of array_textures]"""
+    return [layer_levels(sources) for sources in arrays]
+
+
+def upload_texture_array(layers):
+    """GL_TEXTURE_2D_ARRAY from layer_levels() output; returns (texture id, bytes uploaded)"""
+    texture_array = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D_ARRAY, texture_array)
+    for level in range(len(layers[0])):
+        height, width = layers[0][level].shape[:2]
+        glTexImage3D(GL_TEXTURE_2D_ARRAY, level, GL_RGBA8, width, height, len(layers), 0,
+                     GL_RGBA, GL_UNSIGNED_BYTE, None)
+        for layer, levels in enumerate(layers):
+            glTexSubImage3D(GL_TEXTURE_2D_ARRAY, level, 0, 0, layer, width, height, 1,
+                            GL_RGBA, GL_UNSIGNED_BYTE, np.ascontiguousarray(levels[level]))
+    glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAX_LEVEL, len(layers[0]) - 1)
+    min_filter = GL_LINEAR_MIPMAP_LINEAR if config.TEXTURE_MIPMAPS else GL_LINEAR
+    glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MIN_FILTER, min_filter)
+    glTexParameteri(GL_TEXTURE_2D_ARRAY, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glBindTexture(GL_TEXTURE_2D_ARRAY, 0)
+    return texture_array, sum(lv.nbytes for levels in layers for lv in levels)
+
+
+class StaticBatch:
+    """Static SceneObjects merged into one VBO/EBO and drawn with a single call.
+
+    Each distinct BaseColor becomes a layer of a GL_TEXTURE_2D_ARRAY and
+    every vertex carries its layer index. Textures of different sizes go
+    to separate arrays (array_textures) rather than being stretched to the
+    largest one, so the batch costs one texture bind and one draw per
+    distinct texture size however many props it holds. Members are kept
+    ordered by array, so each array's full meshes are one contiguous span.
+    An array is used rather than an atlas so GL_REPEAT still works for UVs
+    outside [0, 1]. The merged objects' own GL buffers and texture handles
+    are released. levels may carry array_levels() output prepared ahead of
+    time; otherwise it is computed here.
+    """
+    def __init__(self, objects, levels=None):
+        arrays = array_textures(objects)
+        array_of = {}   # texture key -> (array, layer)
+        for array, textures in enumerate(arrays):
+            for layer, texture in enumerate(textures):
+                array_of[texture.key if texture else None] = (array, layer)
+
+        def placement(obj):
+            texture = obj.textures.get("BaseColor")
+            return array_of[texture.key if texture else None]
+
+        objects = sorted(objects, key=lambda obj: placement(obj)[0])
+        self.objects = objects
+        self.names = [obj.name for obj in objects]
+
+        vertex_blocks, index_blocks, lod_blocks = [], [], []
+        base_vertices = []
+        base_vertex = 0
+        for obj in objects:
+            block = np.empty((obj.num_vertices, BATCH_VERTEX_COMPONENTS), dtype=np.float32)
+            block[:, :5] = obj.vertices
+            block[:, 5] = placement(obj)[1]
+            vertex_blocks.append(block)
+            index_blocks.append(obj.indices.astype(np.uint32) + np.uint32(base_vertex))
+            base_vertices.append(base_vertex)
+            base_vertex += obj.num_vertices
+
+        # Every member's full mesh first, so the all-visible case stays one
+        # contiguous draw per array, then the coarser LOD levels
+        self.ranges = []  # per member: (first index, index count) of each LOD level
+        self.spans = [None] * len(arrays)  # per array: (first member, end member, first index, index count)
+        first_index = 0
+        for member, (obj, block) in enumerate(zip(objects, index_blocks)):
+            array = placement(obj)[0]
+            start, _, first, count = self.spans[array] or (member, member, first_index, 0)
+            self.spans[array] = (start, member + 1, first, count + len(block))
+            self.ranges.append([(first_index, len(block))])
+            first_index += len(block)
+        for member, (obj, base) in enumerate(zip(objects, base_vertices)):
+            for lod in obj.lod_indices[1:]:
+                lod_blocks.append(lod.astype(np.uint32) + np.uint32(base))
+                self.ranges[member].append((first_index, len(lod)))
+                first_index += len(lod)
+
+        vertex_data = np.concatenate(vertex_blocks)
+        index_data = compact_indices(np.concatenate(index_blocks + lod_blocks), base_vertex)
+        self.index_type = GL_INDEX_TYPES[index_data.dtype]
+        self.vertices = vertex_data
+        self.indices = index_data
+
+        self.VAO = glGenVertexArrays(1)
+        self.VBO = glGenBuffers(1)
+        self.EBO = glGenBuffers(1)
+
+        glBindVertexArray(self.VAO)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBufferData(GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL_STATIC_DRAW)
+
+        stride = BATCH_VERTEX_COMPONENTS * 4
+        # Positions
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(0)
+        # TexCoords
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(12))
+        glEnableVertexAttribArray(1)
+        # Texture array layer
+        glVertexAttribPointer(2, 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(20))
+        glEnableVertexAttribArray(2)
+        glBindVertexArray(0)
+
+        levels = levels or array_levels([layer_sources(textures) for textures in arrays])
+        uploads = [upload_texture_array(layers) for layers in levels]
+        self.texture_arrays = [texture_array for texture_array, _ in uploads]
+        self.texture_bytes = sum(nbytes for _, nbytes in uploads)
+        self.layer_count = sum(len(textures) for textures in arrays)
+
+        for obj in objects:
+            obj.delete()
+
+    def submit(self, queue, program, uniforms, depth=0.0, visible=None, lods=None):
+        """Queue one draw per texture array of the merged props with the static program.
+
+        visible is an optional bool per member (see culling.FrustumCuller)
+        and lods an optional LOD level per member (see lod.LODSelector); when
+        some are culled or coarser the rest of an array go out in one
+        glMultiDrawElements.
+        """
+        uniforms = {"textureArray": 0, **uniforms}
+        visible = visible or [True] * len(self.ranges)
+        lods = lods or [0] * len(self.ranges)
+        for texture_array, (start, end, first, count) in zip(self.texture_arrays, self.spans):
+            textures = [(0, GL_TEXTURE_2D_ARRAY, texture_array)]
+            if all(visible[start:end]) and not any(lods[start:end]):
+                ranges = [(first, count)]
+            else:
+                ranges = [levels[min(lod, len(levels) - 1)]
+                          for levels, shown, lod in zip(self.ranges[start:end], visible[start:end], lods[start:end])
+                          if shown]
+            if ranges:
+                queue.submit(program, self.VAO, 0, textures, uniforms, depth, self.index_type, ranges)
+
+    def delete(self):
+        glDeleteVertexArrays(1, [self.VAO])
+        glDeleteBuffers(1, [self.VBO])
+        glDeleteBuffers(1, [self.EBO])
+        glDeleteTextures(len(self.texture_arrays), self.texture_arrays)
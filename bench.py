@@ -0,0 +1,296 @@
+"""Headless, repeatable frame-time benchmark of the renderer.
+
+Usage: python bench.py [--context hidden|egl|osmesa] [--frames N] [--warmup N]
+                       [--size WxH] [--path view_log.txt] [--synthetic OBJECTS]
+                       [--triangles PER_OBJECT] [--json out.json] [--trace trace.json]
+                       [--blocking] [--budget MS]
+
+Creates a GL 3.3 core context without a visible window (a hidden pygame
+window, an EGL pbuffer or OSMesa, the last two working on a CPU-only
+Linux box with Mesa), loads the scene through Renderer and draws --frames
+frames uncapped along a scripted camera path, calling glFinish() after
+each one so the GPU work is inside the measured time. The path is an
+orbit with a zoom unless --path names a file of "Zoom: .., rot_x: ..,
+rot_y: .." lines as written by main.py's 'P' key, which are then visited
+in order. Animation time advances a fixed 1/60 s per frame, so every run
+draws the same frames.
+
+--synthetic OBJECTS generates a scene of that many UV spheres in the
+materials/*.txt format under cache/bench/, half of them static "Rock"
+props so batching is exercised too, which gives comparable scaling
+curves. Load-phase timings, frame-time percentiles and the git commit are
+printed, and written as JSON with --json. --trace turns on the frame
+profiler and writes its Chrome trace.
+
+The scene streams in progressively (config.PROGRESSIVE_LOADING) while
+frames of the first camera pose are drawn; those frames are reported as
+the "first frame" and "streaming" load phases, along with the time to
+the first interactive frame. --blocking loads everything up front.
+
+--budget MS turns on dynamic resolution (config.DYNAMIC_RESOLUTION) with
+that GPU frame budget; the render scale of the last frame is reported.
+"""
+import argparse
+import ctypes
+import json
+import math
+import os
+import re
+import subprocess
+import time
+import numpy as np
+
+SYNTHETIC_DIR = "cache/bench"
+SYNTHETIC_TEXTURES = ("GrassTexture.png", "FloorTexture.png", "Gradients_pastles.png", "ClawsTexture.png")
+STAGE_RADIUS = 6.0  # synthetic objects are spread over the stage disc
+FRAME_TICKS = 1000.0 / 60.0
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+_VIEW_LINE = re.compile(r"Zoom:\s*([-\d.]+),\s*rot_x:\s*([-\d.]+),\s*rot_y:\s*([-\d.]+)")
+
+
+# === Synthetic scenes ===
+def uv_sphere(triangles):
+    """(vertices (N, 5) float32, indices uint32) of a unit UV sphere with about that many triangles"""
+    rings = max(2, int(round(math.sqrt(triangles / 4.0))))
+    segments = 2 * rings
+    theta = np.linspace(0.0, math.pi, rings + 1)
+    phi = np.linspace(0.0, 2.0 * math.pi, segments + 1)
+    t, p = np.meshgrid(theta, phi, indexing="ij")
+    vertices = np.stack([np.sin(t) * np.cos(p), np.cos(t), np.sin(t) * np.sin(p),
+                         p / (2.0 * math.pi), 1.0 - t / math.pi], axis=-1).reshape(-1, 5)
+
+    row = np.arange(rings)[:, None] * (segments + 1)
+    col = np.arange(segments)[None, :]
+    a = (row + col).reshape(-1)
+    b, c, d = a + segments + 1, a + 1, a + segments + 2
+    quads = np.stack([a, c, b, c, d, b], axis=1).reshape(-1, 6)
+    # The first and last ring collapse to the poles: one triangle per quad there
+    keep = np.ones(quads.shape, dtype=bool)
+    keep[:segments, :3] = False
+    keep[-segments:, 3:] = False
+    return vertices.astype(np.float32), quads[keep].astype(np.uint32)
+
+
+def write_synthetic_scene(count, triangles, out_dir=None):
+    """Write count spheres of about triangles each as materials/*.txt meshes; return the folder"""
+    from extractmtl import write_material_txt
+
+    out_dir = out_dir or os.path.join(SYNTHETIC_DIR, f"scene_{count}x{triangles}")
+    if os.path.isdir(out_dir) and len([f for f in os.listdir(out_dir) if f.endswith(".txt")]) == count:
+        return out_dir
+    os.makedirs(out_dir, exist_ok=True)
+    vertices, indices = uv_sphere(triangles)
+    radius = 0.4 * STAGE_RADIUS / math.sqrt(count)
+    rng = np.random.default_rng(count)
+    for i in range(count):
+        # Sunflower spiral keeps the objects evenly spread for any count
+        r = STAGE_RADIUS * math.sqrt((i + 0.5) / count)
+        angle = i * math.pi * (3.0 - math.sqrt(5.0))
+        offset = np.array([r * math.cos(angle), 0.5 + rng.random(), r * math.sin(angle)], dtype=np.float32)
+        mesh = vertices.copy()
+        mesh[:, :3] = mesh[:, :3] * radius + offset
+        # "Rock" objects are static (see materials/scene.json) and get batched
+        name = f"SynthRock_{i:05d}" if i % 2 else f"Synth_{i:05d}"
+        header = {"BaseColor": SYNTHETIC_TEXTURES[i % len(SYNTHETIC_TEXTURES)], "Normal": "None",
+                  "Roughness": "None", "Metallic": "None", "Alpha": "1.0", "Emissive": "None"}
+        write_material_txt(name, header, mesh, indices.reshape(-1, 3), out_dir)
+    return out_dir
+
+
+# === Camera paths ===
+def load_view_log(path):
+    """[(camera_distance, rot_x, rot_y)] from the lines main.py logs on 'P'"""
+    with open(path, "r") as f:
+        return [tuple(float(x) for x in match.groups()) for match in map(_VIEW_LINE.search, f) if match]
+
+
+def camera_path(frames, keyframes=None):
+    """(camera_distance, rot_x, rot_y) of every frame.
+
+    Without keyframes: one full orbit from the default view while zooming
+    in to a third of the distance and back out.
+    """
+    u = np.linspace(0.0, 1.0, frames, endpoint=False)
+    if not keyframes:
+        distance = 35.0 - 23.0 * np.sin(math.pi * u)
+        return np.stack([distance, np.full(frames, 78.0), 115.0 + 360.0 * u], axis=1).tolist()
+    keys = np.asarray(keyframes, dtype=np.float64)
+    if len(keys) == 1:
+        return np.repeat(keys, frames, axis=0).tolist()
+    stops = np.linspace(0.0, 1.0, len(keys))
+    u = np.linspace(0.0, 1.0, frames)
+    return np.stack([np.interp(u, stops, keys[:, k]) for k in range(3)], axis=1).tolist()
+
+
+# === Offscreen contexts ===
+def create_context(kind, size):
+    """Make a GL 3.3 core context current; returns a swap function for the frame end"""
+    width, height = size
+    if kind == "hidden":
+        import pygame
+        from pygame.locals import DOUBLEBUF, OPENGL, HIDDEN
+        pygame.init()
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MAJOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_MINOR_VERSION, 3)
+        pygame.display.gl_set_attribute(pygame.GL_CONTEXT_PROFILE_MASK, pygame.GL_CONTEXT_PROFILE_CORE)
+        pygame.display.set_mode(size, DOUBLEBUF | OPENGL | HIDDEN, vsync=0)
+        return pygame.display.flip
+
+    if kind == "egl":
+        from OpenGL import EGL
+        try:
+            display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+            EGL.eglInitialize(display, None, None)
+        except EGL.EGLError:
+            # No X/Wayland server: Mesa's surfaceless platform still has pbuffers
+            display = EGL.eglGetPlatformDisplay(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+            EGL.eglInitialize(display, None, None)
+        attribs = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                   EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+                   EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_NONE]
+        egl_config = EGL.EGLConfig()
+        found = EGL.EGLint()
+        EGL.eglChooseConfig(display, (EGL.EGLint * len(attribs))(*attribs), ctypes.pointer(egl_config),
+                            1, ctypes.pointer(found))
+        if not found.value:
+            raise RuntimeError("No EGL config with a pbuffer and desktop GL")
+        surface_attribs = [EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE]
+        surface = EGL.eglCreatePbufferSurface(display, egl_config,
+                                              (EGL.EGLint * len(surface_attribs))(*surface_attribs))
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context_attribs = [EGL.EGL_CONTEXT_MAJOR_VERSION, 3, EGL.EGL_CONTEXT_MINOR_VERSION, 3,
+                           EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+                           EGL.EGL_NONE]
+        context = EGL.eglCreateContext(display, egl_config, EGL.EGL_NO_CONTEXT,
+                                       (EGL.EGLint * len(context_attribs))(*context_attribs))
+        if not context or not EGL.eglMakeCurrent(display, surface, surface, context):
+            raise RuntimeError("Could not create an EGL OpenGL 3.3 core context")
+        return lambda: EGL.eglSwapBuffers(display, surface)
+
+    if kind == "osmesa":
+        from OpenGL import GL, arrays, osmesa
+        attribs = [osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA, osmesa.OSMESA_DEPTH_BITS, 24,
+                   osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+                   osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 3, osmesa.OSMESA_CONTEXT_MINOR_VERSION, 3, 0]
+        context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+        buffer = arrays.GLubyteArray.zeros((height, width, 4))
+        if not context or not osmesa.OSMesaMakeCurrent(context, buffer, GL.GL_UNSIGNED_BYTE, width, height):
+            raise RuntimeError("Could not create an OSMesa OpenGL 3.3 core context")
+        create_context.buffer = buffer  # OSMesa renders into it; keep it alive
+        return lambda: None
+
+    raise ValueError(f"Unknown context '{kind}'")
+
+
+# === Report ===
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def frame_summary(frame_times):
+    ms = np.asarray(frame_times) * 1000.0
+    return {"mean": float(ms.mean()), "p50": float(np.percentile(ms, 50)), "p90": float(np.percentile(ms, 90)),
+            "p99": float(np.percentile(ms, 99)), "max": float(ms.max()), "fps": float(1000.0 / ms.mean())}
+
+
+def run(args):
+    size = tuple(int(x) for x in args.size.lower().split("x"))
+    folder, pack_path = args.scene, None
+    if args.synthetic:
+        folder = write_synthetic_scene(args.synthetic, args.triangles)
+        pack_path = folder.rstrip("/\\") + ".pack"
+
+    start = time.perf_counter()
+    swap = create_context(args.context, size)
+    context_time = time.perf_counter() - start
+
+    # Only now: OpenGL must be imported after PYOPENGL_PLATFORM is set
+    import config
+    from OpenGL.GL import glFinish, glGetString, GL_RENDERER
+    from profiler import FrameProfiler
+    from renderer import Renderer
+    if args.budget:
+        config.DYNAMIC_RESOLUTION = True
+        config.FRAME_BUDGET_MS = args.budget
+    profiler = FrameProfiler(config.PROFILER_CAPACITY, enabled=bool(args.trace))
+    renderer = Renderer(size, folder, pack_path or config.SCENE_PACK_PATH, profiler, progressive=not args.blocking)
+    load = {"context": context_time, **renderer.timings}
+    keyframes = load_view_log(args.path) if args.path else None
+    path = camera_path(args.warmup + args.frames, keyframes)
+
+    # Frames drawn while the scene streams in count as loading, not as timed frames
+    start = time.perf_counter()
+    first_frame = None
+    while first_frame is None or not renderer.stream():
+        renderer.render(*path[0], 0)
+        glFinish()
+        swap()
+        if first_frame is None:
+            first_frame = time.perf_counter() - start
+    load["first frame"] = first_frame
+    load["streaming"] = time.perf_counter() - start - first_frame
+    first_interactive = sum(seconds for name, seconds in load.items() if name != "streaming")
+
+    frame_times = []
+    for frame, (camera_distance, rot_x, rot_y) in enumerate(path):
+        start = time.perf_counter()
+        profiler.begin_frame()
+        renderer.render(camera_distance, rot_x, rot_y, frame * FRAME_TICKS)
+        glFinish()
+        swap()
+        profiler.end_frame()
+        if frame >= args.warmup:
+            frame_times.append(time.perf_counter() - start)
+    stats = renderer.stats()
+    resolution_scale = renderer.resolution_scale
+    if args.trace:
+        profiler.write_chrome_trace(args.trace)
+    gl_renderer = glGetString(GL_RENDERER).decode("utf-8", "replace")
+    renderer.delete()
+
+    frames = frame_summary(frame_times)
+    print(f"Commit {git_commit()}, {gl_renderer} ({args.context}, {size[0]}x{size[1]}), scene {folder}")
+    print("Load: " + ", ".join(f"{name} {1000 * seconds:.1f} ms" for name, seconds in load.items())
+          + f", total {1000 * sum(load.values()):.1f} ms")
+    print(f"First interactive frame after {1000 * first_interactive:.1f} ms")
+    print(f"Frames: {len(frame_times)}, mean {frames['mean']:.2f} ms ({frames['fps']:.1f} FPS), "
+          f"p50 {frames['p50']:.2f}, p90 {frames['p90']:.2f}, p99 {frames['p99']:.2f}, max {frames['max']:.2f} ms")
+    print(f"Last frame: {stats}")
+
+    if args.json:
+        result = {"commit": git_commit(), "gl_renderer": gl_renderer, "context": args.context, "size": size,
+                  "scene": folder, "synthetic": args.synthetic, "triangles_per_object": args.triangles,
+                  "frames": len(frame_times), "load_s": load,
+                  "first_interactive_s": first_interactive, "frame_ms": frames, "resolution_scale": resolution_scale,
+                  "stats": stats}
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved: {args.json}")
+
+
+# === Run the script ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless renderer benchmark")
+    parser.add_argument("--context", choices=("hidden", "egl", "osmesa"), default="egl")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=30, help="frames drawn before timing starts")
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--path", help="view_log.txt-style file of camera keyframes")
+    parser.add_argument("--scene", default="materials")
+    parser.add_argument("--synthetic", type=int, help="generate and load a scene of this many objects")
+    parser.add_argument("--triangles", type=int, default=2000, help="triangles per synthetic object")
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--blocking", action="store_true",
+                        help="load the whole scene before the first frame instead of streaming it")
+    parser.add_argument("--budget", type=float,
+                        help="GPU frame budget in ms: render at a dynamic resolution scale that holds it")
+    parser.add_argument("--trace", help="profile the frames and write a Chrome trace to this file")
+    args = parser.parse_args()
+
+    if args.context in ("egl", "osmesa"):
+        os.environ["PYOPENGL_PLATFORM"] = args.context
+    run(args)
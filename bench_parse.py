@@ -0,0 +1,66 @@
+"""Compare the NumPy mesh parser against the original line-by-line loader.
+
+Usage: python bench_parse.py [repeats]
+Runs on spw_gradient.txt and every Grass*.txt in materials/, reporting
+best-of-N wall time and peak Python heap (tracemalloc) for each parser.
+"""
+import glob
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from mesh_format import parse_material_txt
+
+
+def legacy_parse(path):
+    """Parsing half of the original load_model_from_txt, kept for comparison."""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    name = lines[0].split(":")[1].strip()
+    v_start = lines.index("Vertices:\n") + 1
+    i_start = lines.index("Indices:\n")
+    vertices = [list(map(float, l.strip().split())) for l in lines[v_start:i_start]]
+    indices = [int(i) for l in lines[i_start+1:] for i in l.strip().split()]
+    flat_vertices = [coord for v in vertices for coord in v]
+
+    # SceneObject.__init__ converted the lists back into arrays
+    return name, np.array(flat_vertices, dtype=np.float32), np.array(indices, dtype=np.uint32)
+
+
+def measure(fn, path, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    paths = [os.path.join("materials", "spw_gradient.txt")] + sorted(glob.glob(os.path.join("materials", "Grass*.txt")))
+
+    print(f"{'file':<22}{'legacy ms':>11}{'numpy ms':>10}{'speedup':>9}{'legacy MB':>11}{'numpy MB':>10}{'array MB':>10}")
+    totals = [0.0, 0.0]
+    for path in paths:
+        old_t, old_peak, (_, old_v, old_i) = measure(legacy_parse, path, repeats)
+        new_t, new_peak, (_, _, new_v, new_i) = measure(parse_material_txt, path, repeats)
+        if not (np.array_equal(old_v, new_v.reshape(-1)) and np.array_equal(old_i, new_i)):
+            print(f"MISMATCH: {path}")
+        totals[0] += old_t
+        totals[1] += new_t
+        array_mb = (new_v.nbytes + new_i.nbytes) / 1e6
+        print(f"{os.path.basename(path):<22}{old_t * 1e3:>11.1f}{new_t * 1e3:>10.1f}{old_t / new_t:>8.1f}x"
+              f"{old_peak / 1e6:>11.1f}{new_peak / 1e6:>10.1f}{array_mb:>10.1f}")
+    print(f"{'total':<22}{totals[0] * 1e3:>11.1f}{totals[1] * 1e3:>10.1f}{totals[0] / totals[1]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
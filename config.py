@@ -4,6 +4,15 @@ import glm
 DISPLAY_WIDTH = 900
 DISPLAY_HEIGHT = 850
 WINDOW_TITLE = "Gen 1 Starters"
+DISPLAY_REFRESH_HZ = 60  # Monitor refresh rate, to spot dropped frames under vsync
+
+# Frame pacing
+FRAME_LIMIT = 60  # "uncapped", "vsync" (swap interval 1) or a target rate in Hz
+FRAME_DROP_ADAPT = True  # Halve a Hz target while frames keep missing it, restore it once they fit again
+SIMULATION_HZ = 120  # Fixed rate of animation, glow timers and music fades; frames interpolate between steps
+MAX_SIMULATION_STEPS = 8  # Steps caught up per frame; time lost in longer hitches is dropped
+ON_DEMAND_RENDERING = False  # Only draw when the picture changes; otherwise sleep until input or the next timed change
+IDLE_ANIMATION_HZ = 20  # Rate of on-demand frames kept alive only by bouncing/spinning objects, 0 for full rate
 
 
 # Camera settings
@@ -24,3 +33,51 @@ TEXTURE_UNITS = {
     "Metallic": 4,
     "Emissive": 5
 }
+
+# Asset loading
+USE_SCENE_PACK = True  # Load meshes from a memory-mapped pack instead of re-parsing materials/*.txt
+SCENE_PACK_PATH = "cache/scene.pack"  # Rebuilt automatically when any source changes
+LOADER_WORKERS = 0  # Mesh parse processes / texture decode threads; 0 = one per core, 1 = load serially
+PROGRESSIVE_LOADING = True  # Open the window at once and stream objects in while frames are drawn
+UPLOAD_BUDGET_BYTES = 8 * 1024 * 1024  # Mesh + texture data uploaded per frame while streaming (at least one object)
+PICKING = True  # Per-mesh triangle BVHs (stored in the scene pack) for hover and click picking
+COMPACT_VERTICES = True  # 12-byte vertices: int16 positions over the object's AABB, uint16/half UVs (`python vertex_format.py` reports the error)
+TEXTURE_BUDGET_BYTES = 512 * 1024 * 1024  # Resident texture memory before LRU eviction; 0 = unlimited
+TEXTURE_MIPMAPS = True  # Upload full mip chains and sample with GL_LINEAR_MIPMAP_LINEAR
+TEXTURE_CACHE = True  # Map pre-flipped RGBA mip chains from disk instead of decoding images
+TEXTURE_CACHE_DIR = "cache/textures"  # Bake ahead of time with `python texture_cache.py`
+SHADER_CACHE = True  # Load linked programs from driver binaries instead of compiling GLSL
+SHADER_CACHE_DIR = "cache/shaders"  # Keyed by source hash + driver; stale entries are rebuilt
+
+# Rendering
+SCENE_MANIFEST = "materials/scene.json"  # Per-object bounce / rotation / emissive / glow rules
+STATIC_BATCHING = True  # Merge static props into one VBO/EBO + texture array, drawn with one call
+INSTANCING = True  # Store repeated static meshes (and manifest "instances") once, drawn with glDrawElementsInstanced
+INSTANCE_TOLERANCE = 1e-4  # Largest vertex mismatch, relative to the mesh radius, for two meshes to count as copies
+STATIC_LAYER_CACHE = True  # Keep background + static props in an offscreen color/depth layer, redrawn only when the camera moves
+DYNAMIC_RESOLUTION = False  # Draw the 3D pass offscreen at a scale that keeps GPU frame time under FRAME_BUDGET_MS, then upscale
+FRAME_BUDGET_MS = 16.6  # GPU time per frame dynamic resolution aims for
+DYNAMIC_RESOLUTION_MIN_SCALE = 0.5  # Lowest render scale per axis (0.5 = a quarter of the pixels)
+UPSCALE_SHARPNESS = 0.25  # Unsharp-mask strength of the upscale pass, 0 for plain bilinear
+SHOW_RENDER_STATS = False  # Show per-frame draw / state change / skipped counts in the window title
+GPU_ANIMATION = False  # Evaluate bounce/spin/glow in the vertex shader; the CPU only uploads camera + time
+FRUSTUM_CULLING = True  # Skip objects and batched props outside the view frustum
+CULL_LEAF_SIZE = 8  # Objects per leaf of the culling sphere tree
+LOD = True  # Draw the simplified levels from materials/lod/ (`python mesh_simplify.py`) for small/distant objects
+# Smallest projected radius (fraction of half the viewport) for LOD 0, 1, ... Chosen so the shipped levels
+# (max deviation ~1.1% / ~4.7% of the radius) differ by under a pixel at the switch in the default window
+LOD_SCREEN_SIZES = (0.15, 0.035)
+LOD_HYSTERESIS = 0.1  # Fraction below a threshold an object must shrink before going coarser
+
+# Profiling
+PROFILER_ENABLED = False  # Start with the profiler on; F3 toggles it and its overlay at runtime
+PROFILER_CAPACITY = 4096  # Timed sections kept in the ring buffer (about 8 per frame)
+PROFILER_TRACE_PATH = "cache/profile_trace.json"  # Written on F4; open in chrome://tracing or Perfetto
+
+# Audio
+AUDIO_BUFFER = 512  # Mixer buffer in samples; smaller plays effects sooner but may crackle
+MUSIC_PATH = "source/audio.mp3"
+SOUND_DIR = "source"  # Every other .mp3/.ogg/.wav here is preloaded as an effect
+SOUND_CHANNELS = 4  # Effects that can play at once
+SOUND_GAINS = {"bulba.mp3": 1.0, "charmander.mp3": 0.2}  # Per-effect volume
+DEFAULT_SOUND_GAIN = 0.5
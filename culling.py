@@ -0,0 +1,135 @@
+import math
+import numpy as np
+
+
+def frustum_planes(matrix):
+    """(6, 4) normalized planes a*x + b*y + c*z + d >= 0 of the frustum of a
+    projection * view * model matrix, in that model's space."""
+    m = np.array(matrix, dtype=np.float64)  # glm -> rows of the math matrix
+    planes = np.array([m[3] + m[0], m[3] - m[0],    # left, right
+                       m[3] + m[1], m[3] - m[1],    # bottom, top
+                       m[3] + m[2], m[3] - m[2]])   # near, far
+    return planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+
+def animated_sphere(center, radius, spins, bounce_amplitude):
+    """Bounding sphere valid at every point of an object's animation.
+
+    Bounce moves an object along its local Y, and spinning objects turn
+    about their local Y, so the sphere is grown by the bounce and, for
+    spinners, re-centred on the spin axis.
+    """
+    center = np.asarray(center, dtype=np.float64)
+    radius = radius + bounce_amplitude
+    if spins:
+        radius += math.hypot(center[0], center[2])
+        center = np.array([0.0, center[1], 0.0])
+    return center, radius
+
+
+class SphereTree:
+    """Coarse bounding-sphere hierarchy over objects that share a transform.
+
+    Built once with median splits on the longest axis. A query rejects or
+    accepts whole subtrees against the frustum and only tests individual
+    spheres in leaves that straddle a plane.
+    """
+    def __init__(self, centers, radii, leaf_size=8):
+        self.centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        self.radii = np.asarray(radii, dtype=np.float64).reshape(-1)
+        self.leaf_size = max(1, leaf_size)
+        self.order = np.arange(len(self.radii))
+        self.nodes = []  # (center, radius, left, right, start, end); leaves have left == -1
+        if len(self.radii):
+            self._build(0, len(self.radii))
+
+    def _build(self, start, end):
+        items = self.order[start:end]
+        lo = (self.centers[items] - self.radii[items, None]).min(axis=0)
+        hi = (self.centers[items] + self.radii[items, None]).max(axis=0)
+        center = (lo + hi) / 2
+        radius = (np.linalg.norm(self.centers[items] - center, axis=1) + self.radii[items]).max()
+
+        node = len(self.nodes)
+        self.nodes.append(None)
+        left = right = -1
+        if end - start > self.leaf_size:
+            axis = int(np.argmax(hi - lo))
+            mid = (end - start) // 2
+            split = np.argpartition(self.centers[items, axis], mid)
+            self.order[start:end] = items[split]
+            left = self._build(start, start + mid)
+            right = self._build(start + mid, end)
+        self.nodes[node] = (center, radius, left, right, start, end)
+        return node
+
+    def query(self, planes):
+        """Indices of the spheres that intersect the frustum given by planes"""
+        if not self.nodes:
+            return np.empty(0, dtype=np.intp)
+        normals, offsets = planes[:, :3], planes[:, 3]
+        hits = []
+        stack = [0]
+        while stack:
+            center, radius, left, right, start, end = self.nodes[stack.pop()]
+            dist = normals @ center + offsets
+            if (dist < -radius).any():
+                continue
+            if (dist > radius).all():
+                hits.append(self.order[start:end])
+            elif left == -1:
+                items = self.order[start:end]
+                dist = self.centers[items] @ normals.T + offsets
+                hits.append(items[(dist >= -self.radii[items, None]).all(axis=1)])
+            else:
+                stack.append(left)
+                stack.append(right)
+        return np.concatenate(hits) if hits else np.empty(0, dtype=np.intp)
+
+
+class FrustumCuller:
+    """Per-frame frustum culling of every drawable.
+
+    Items following the camera rotation share one SphereTree tested with
+    planes from projection * view * sceneRotation; spinning items have a
+    fixed tilt, so each is tested in its own tilted space. visible and
+    culled hold the counts of the last cull().
+    """
+    def __init__(self, centers, radii, spin_bases, leaf_size=8):
+        self.count = len(radii)
+        self.scene_items = np.array([i for i, base in enumerate(spin_bases) if base is None], dtype=np.intp)
+        self.tree = SphereTree(np.asarray(centers).reshape(-1, 3)[self.scene_items],
+                               np.asarray(radii)[self.scene_items], leaf_size)
+        self.spin_items = [(i, base, np.asarray(centers[i]), radii[i])
+                           for i, base in enumerate(spin_bases) if base is not None]
+        self.visible = self.count
+        self.culled = 0
+
+    def cull(self, projection_view, scene_rotation):
+        """Bool mask of the items inside the current view frustum"""
+        mask = np.zeros(self.count, dtype=bool)
+        mask[self.scene_items[self.tree.query(frustum_planes(projection_view * scene_rotation))]] = True
+        for i, base, center, radius in self.spin_items:
+            planes = frustum_planes(projection_view * base)
+            mask[i] = bool((planes[:, :3] @ center + planes[:, 3] >= -radius).all())
+        self.visible = int(mask.sum())
+        self.culled = self.count - self.visible
+        return mask
+
+
+def animated_bounds(objects):
+    """(centers (N, 3), radii (N,)) of animated_sphere for objects with props resolved"""
+    centers, radii = [], []
+    for obj in objects:
+        amplitude = sum(abs(a) for a, _ in obj.props["bounce"])
+        spins = obj.props["rotation"] == "spin"
+        center, radius = animated_sphere(obj.center, obj.radius, spins, amplitude)
+        centers.append(center)
+        radii.append(radius)
+    return np.array(centers).reshape(-1, 3), np.array(radii)
+
+
+def scene_culler(objects, spin_bases, leaf_size=8):
+    """FrustumCuller over objects (with props resolved); spin_bases as in main"""
+    centers, radii = animated_bounds(objects)
+    return FrustumCuller(centers, radii, spin_bases, leaf_size)
@@ -0,0 +1,165 @@
+import ctypes
+import math
+import glm
+from OpenGL.GL import *
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+
+TIMER_FRAMES = 3  # frames in flight before a timer result is read back
+
+
+class GPUFrameTimer:
+    """GPU time between begin() and end() of a frame, from GL_TIMESTAMP queries.
+
+    Timestamps do not nest like GL_TIME_ELAPSED does, so the profiler's
+    sections can run inside. Each frame uses its own query pair from a
+    ring of TIMER_FRAMES; a pair is only read when it comes around again,
+    and only if the result is available, so it never stalls. begin()
+    returns the frame measured by that read, or None if there was none;
+    latest_ms keeps the newest one.
+    """
+    def __init__(self):
+        self.queries = [glGenQueries(2) for _ in range(TIMER_FRAMES)]
+        self.issued = [False] * TIMER_FRAMES
+        self.frame = 0
+        self.latest_ms = None
+
+    def _read(self, query):
+        value = ctypes.c_uint64()
+        # The raw entry point: PyOpenGL's ui64 wrapper is broken (see profiler)
+        glGetQueryObjectui64v(query, GL_QUERY_RESULT, ctypes.byref(value))
+        return value.value
+
+    def begin(self):
+        """Start timing a frame; returns a newly measured earlier frame in milliseconds, or None"""
+        slot = self.frame % TIMER_FRAMES
+        start, end = self.queries[slot]
+        measured = None
+        if self.issued[slot] and glGetQueryObjectiv(end, GL_QUERY_RESULT_AVAILABLE):
+            measured = self.latest_ms = (self._read(end) - self._read(start)) / 1e6
+            self.issued[slot] = False
+        glQueryCounter(start, GL_TIMESTAMP)
+        return measured
+
+    def end(self):
+        slot = self.frame % TIMER_FRAMES
+        glQueryCounter(self.queries[slot][1], GL_TIMESTAMP)
+        self.issued[slot] = True
+        self.frame += 1
+
+    def delete(self):
+        for pair in self.queries:
+            glDeleteQueries(2, pair)
+
+
+class ResolutionScaler:
+    """Render scale that keeps measured GPU frame time near budget_ms.
+
+    Pixel cost goes with the square of the scale, so each new measurement
+    moves the scale a fraction (smoothing) of the way towards
+    scale * sqrt(budget / measured). The applied scale changes in step
+    increments only, and only once the wanted scale is more than
+    hysteresis steps past the half-way point to a neighbouring step, so
+    cached layers are not redrawn for small corrections or for a wanted
+    scale hovering between two steps. It stays within [min_scale, max_scale].
+    """
+    def __init__(self, budget_ms, min_scale=0.5, max_scale=1.0, step=0.05, smoothing=0.3, hysteresis=0.5):
+        self.budget_ms = budget_ms
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.wanted = max_scale
+        self.scale = max_scale
+
+    def update(self, gpu_ms):
+        """Feed one GPU frame time (None: no new measurement); returns the scale to render at"""
+        if gpu_ms:
+            target = self.scale * math.sqrt(self.budget_ms / gpu_ms)
+            self.wanted += (target - self.wanted) * self.smoothing
+            self.wanted = min(max(self.wanted, self.min_scale), self.max_scale)
+            # At a limit the wanted scale cannot get further away, so it is taken as is
+            at_limit = self.wanted in (self.min_scale, self.max_scale)
+            if at_limit or abs(self.wanted - self.scale) > self.step * (0.5 + self.hysteresis):
+                stepped = round(self.wanted / self.step) * self.step
+                self.scale = min(max(stepped, self.min_scale), self.max_scale)
+        return self.scale
+
+
+class SceneTarget:
+    """Offscreen color + depth the 3D pass is drawn into at a fraction of the display size.
+
+    Both textures are allocated at full size; a smaller scale only shrinks
+    the viewport, so scale changes cost nothing. upscale() draws the used
+    region over the current framebuffer with a manual bilinear filter that
+    treats empty pixels (depth 1) as transparent, so the scene is laid over
+    a full-resolution background, plus an optional unsharp-mask sharpening.
+    """
+    def __init__(self, size, program, vao, gl_state):
+        self.size = size
+        self.program = program
+        self.vao = vao
+        self.gl_state = gl_state
+        self.viewport = size
+
+        self.color = glGenTextures(1)
+        self.depth = glGenTextures(1)
+        for texture, internal, fmt, gl_type in ((self.color, GL_RGBA8, GL_RGBA, GL_UNSIGNED_BYTE),
+                                                (self.depth, GL_DEPTH_COMPONENT24, GL_DEPTH_COMPONENT, GL_UNSIGNED_INT)):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, size[0], size[1], 0, fmt, gl_type, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        gl_state.invalidate()
+
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.color, 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.depth, 0)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.delete()
+            raise RuntimeError(f"Scene target framebuffer incomplete (status 0x{status:x})")
+
+    def begin(self, scale):
+        """Bind the target, cleared, with a viewport of scale times the display; returns the viewport size"""
+        self.viewport = (max(1, round(self.size[0] * scale)), max(1, round(self.size[1] * scale)))
+        self.bind()
+        glClearColor(0.0, 0.0, 0.0, 0.0)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        return self.viewport
+
+    def bind(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, self.viewport[0], self.viewport[1])
+
+    def end(self):
+        """Back to the default framebuffer at full size"""
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glViewport(0, 0, self.size[0], self.size[1])
+
+    def upscale(self, sharpness=0.0):
+        """Blend the rendered region over the current framebuffer, stretched to the full viewport"""
+        gl_state = self.gl_state
+        if self.viewport == self.size:
+            sharpness = 0.0  # nothing was lost to undo, keep the frame identical to a direct render
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        gl_state.use_program(self.program)
+        gl_state.bind_vertex_array(self.vao)
+        gl_state.bind_texture(0, GL_TEXTURE_2D, self.color)
+        gl_state.bind_texture(1, GL_TEXTURE_2D, self.depth)
+        gl_state.set_uniform("sceneColor", 0)
+        gl_state.set_uniform("sceneDepth", 1)
+        gl_state.set_uniform("viewportSize", glm.vec2(self.viewport))
+        gl_state.set_uniform("sharpness", float(sharpness))
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        gl_state.draws += 1
+        glDisable(GL_BLEND)
+
+    def delete(self):
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteTextures(2, [self.color, self.depth])
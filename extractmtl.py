@@ -1,88 +1,76 @@
 import os
+from mesh_format import parse_material_txt
+from mesh_optimize import format_stats, optimize_mesh
+from mesh_simplify import build_lod_folder
+from obj_stream import iter_obj_materials
+
+DEFAULT_MATERIAL = {
+    "basecolor": None,
+    "normal": None,
+    "roughness": None,
+    "metallic": None,
+    "alpha": "1.0",
+    "emissive": None
+}
+
+
+def extract_obj_and_mtl(obj_path, mtl_path, out_dir="materials", optimize=True, lods=True, workers=1,
+                        pack_path=None):
+    """Write one materials/*.txt per material, each as soon as it is decoded.
+
+    With pack_path the meshes go into a scene pack instead, see
+    scene_pack.build_scene_pack_from_obj (the pack then follows the OBJ/MTL
+    on later launches). workers > 1 decodes materials in that many processes.
+    """
+    if pack_path:
+        from scene_pack import build_scene_pack_from_obj
+        build_scene_pack_from_obj(obj_path, mtl_path, pack_path, optimize, lods, workers)
+        return
 
-def extract_obj_and_mtl(obj_path, mtl_path, out_dir="materials"):
     os.makedirs(out_dir, exist_ok=True)
+    meshes = load_obj_meshes(obj_path, mtl_path, optimize, workers)
 
-    # Parse MTL file
-    materials = parse_mtl(mtl_path)
+    # Save output for each material
+    written = set()
+    for name, header, vertices, indices in meshes:
+        write_material_txt(name, header, vertices, indices.reshape(-1, 3), out_dir)
+        written.add(name)
 
-    # Parse OBJ file
-    with open(obj_path, "r") as f:
-        lines = f.readlines()
+    # Simplified LOD levels for the heavy meshes written here, see mesh_simplify
+    if lods:
+        build_lod_folder(out_dir, names=written)
 
-    positions, texcoords = [], []
-    current_material = None
-    material_data = {}
 
-    for line in lines:
-        parts = line.strip().split()
-        if not parts:
-            continue
+def load_obj_meshes(obj_path, mtl_path, optimize=True, workers=1):
+    """Yield (name, header, vertices, indices) per material without writing txt files.
 
-        if parts[0] == "v":
-            positions.append(list(map(float, parts[1:4])))
-
-        elif parts[0] == "vt":
-            texcoords.append(list(map(float, parts[1:3])))
-
-        elif parts[0] == "usemtl":
-            current_material = parts[1]
-            if current_material not in material_data:
-                material_data[current_material] = {
-                    "vertices": [],
-                    "indices": [],
-                    "map": {},
-                    "counter": 0
-                }
-
-        elif parts[0] == "f" and current_material:
-            face_vertices = parts[1:]
-            if len(face_vertices) < 3:
-                print(f"Skipping invalid face: {line.strip()}")
-                continue  # Invalid face, skip
-
-            for i in range(1, len(face_vertices) - 1):
-                tri = [face_vertices[0], face_vertices[i], face_vertices[i + 1]]
-                indices = []
-                for ref in tri:
-                    refs = ref.split("/")
-                    if len(refs) < 2:
-                        print(f"Skipping malformed face vertex: {ref}")
-                        continue  # Malformed face vertex
-
-                    try:
-                        v_idx = int(refs[0]) - 1
-                        vt_idx = int(refs[1]) - 1
-                    except ValueError:
-                        print(f"Skipping non-integer index: {ref}")
-                        continue
-
-                    key = (v_idx, vt_idx)
-                    mat = material_data[current_material]
-                    if key not in mat["map"]:
-                        try:
-                            vertex = positions[v_idx] + texcoords[vt_idx]
-                        except IndexError:
-                            print(f"Index error: v={v_idx}, vt={vt_idx}")
-                            continue
-                        mat["vertices"].append(vertex)
-                        mat["map"][key] = mat["counter"]
-                        mat["counter"] += 1
-                    indices.append(mat["map"][key])
-                if len(indices) == 3:
-                    material_data[current_material]["indices"].append(indices)
+    Same layout as model_loader.parse_material_txt, used by scene_pack.
+    The OBJ is streamed (see obj_stream), so only one material is held at
+    a time. With optimize, triangles and vertices are reordered for cache
+    locality and indices use the smallest type that fits (see mesh_optimize).
+    """
+    materials = parse_mtl(mtl_path)
+    for name, vertices, indices in iter_obj_materials(obj_path, workers):
+        mat = materials.get(name, DEFAULT_MATERIAL)
+        if optimize:
+            vertices, indices, stats = optimize_mesh(vertices, indices)
+            print(format_stats(name, stats))
+        yield name, dict(material_header(mat)), vertices, indices
+
+
+def optimize_material_folder(folder, write=False):
+    """Report (and with write, apply) the mesh optimization for existing materials/*.txt."""
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(".txt"):
+            continue
+        name, header, vertices, indices = parse_material_txt(os.path.join(folder, filename))
+        vertices, indices, stats = optimize_mesh(vertices, indices)
+        print(format_stats(name, stats))
+        if write:
+            write_material_txt(name, header, vertices, indices.reshape(-1, 3), folder)
+    if write:
+        build_lod_folder(folder)  # LOD levels index the old vertex order
 
-    # Save output for each material
-    for name, data in material_data.items():
-        mat = materials.get(name, {
-            "basecolor": None,
-            "normal": None,
-            "roughness": None,
-            "metallic": None,
-            "alpha": "1.0",
-            "emissive": None
-        })
-        write_material_txt(name, mat, data["vertices"], data["indices"], out_dir)
 
 def parse_mtl(mtl_path):
     materials = {}
@@ -94,14 +82,7 @@ def parse_mtl(mtl_path):
         line = line.strip()
         if line.startswith("newmtl"):
             current = line.split()[1]
-            materials[current] = {
-                "basecolor": None,
-                "normal": None,
-                "roughness": None,
-                "metallic": None,
-                "alpha": "1.0",
-                "emissive": None
-            }
+            materials[current] = dict(DEFAULT_MATERIAL)
         elif current:
             if "map_Kd" in line:
                 materials[current]["basecolor"] = os.path.basename(line.split()[-1])
@@ -115,16 +96,26 @@ def parse_mtl(mtl_path):
                 materials[current]["alpha"] = line.split()[1]
     return materials
 
-def write_material_txt(name, mat_data, vertices, indices, out_dir):
+
+def material_header(mat_data):
+    """Header (key, value) pairs in the order written to materials/*.txt"""
+    return [
+        ("BaseColor", mat_data['basecolor'] or 'None'),
+        ("Normal", mat_data['normal'] or 'None'),
+        ("Roughness", mat_data['roughness'] or 'None'),
+        ("Metallic", mat_data['metallic'] or 'None'),
+        ("Alpha", mat_data['alpha'] or '1.0'),
+        ("Emissive", mat_data['emissive'] or 'None'),
+    ]
+
+
+def write_material_txt(name, header, vertices, indices, out_dir):
+    """header is a dict or (key, value) pairs, as from material_header"""
     out_path = os.path.join(out_dir, f"{name}.txt")
     with open(out_path, "w") as f:
         f.write(f"Material: {name}\n")
-        f.write(f"BaseColor: {mat_data['basecolor'] or 'None'}\n")
-        f.write(f"Normal: {mat_data['normal'] or 'None'}\n")
-        f.write(f"Roughness: {mat_data['roughness'] or 'None'}\n")
-        f.write(f"Metallic: {mat_data['metallic'] or 'None'}\n")
-        f.write(f"Alpha: {mat_data['alpha'] or '1.0'}\n")
-        f.write(f"Emissive: {mat_data['emissive'] or 'None'}\n")
+        for key, value in dict(header).items():
+            f.write(f"{key}: {value}\n")
 
         f.write("Vertices:\n")
         for v in vertices:
@@ -0,0 +1,196 @@
+import math
+import time
+from collections import deque
+import numpy as np
+
+FRAME_LIMITS = ("uncapped", "vsync")  # or a target rate in Hz
+
+
+class FixedTimestep:
+    """Simulation clock advanced in fixed steps, independent of the frame rate.
+
+    advance(elapsed_ms) yields the time of every step due, at most
+    max_steps per frame; time past that (a long hitch) is dropped rather
+    than caught up, so a slow frame cannot snowball into slower ones.
+    render_time() is the time between the last two states the frame should
+    show, so motion stays smooth when frames and steps do not line up.
+    """
+    def __init__(self, hz, max_steps=8):
+        self.step_ms = 1000.0 / hz
+        self.max_steps = max_steps
+        self.time_ms = 0.0       # time of the latest simulation state
+        self.accumulator = 0.0   # elapsed time not simulated yet
+        self.dropped_ms = 0.0
+
+    def advance(self, elapsed_ms):
+        self.accumulator += elapsed_ms
+        steps = int(self.accumulator // self.step_ms)
+        if steps > self.max_steps:
+            self.dropped_ms += (steps - self.max_steps) * self.step_ms
+            self.accumulator -= (steps - self.max_steps) * self.step_ms
+            steps = self.max_steps
+        for _ in range(steps):
+            self.accumulator -= self.step_ms
+            self.time_ms += self.step_ms
+            yield self.time_ms
+
+    def skip(self, elapsed_ms):
+        """Move the clock over time nothing had to be simulated in (an idle wait), without yielding steps"""
+        self.accumulator += elapsed_ms
+        steps = int(self.accumulator // self.step_ms)
+        self.accumulator -= steps * self.step_ms
+        self.time_ms += steps * self.step_ms
+
+    def render_time(self):
+        """Interpolated between the previous state and the latest one"""
+        return self.time_ms - self.step_ms + self.accumulator
+
+
+class FramePacer:
+    """Paces the main loop: uncapped, vsync (swap interval 1) or a target rate.
+
+    frame() is called once per loop iteration and returns the milliseconds
+    since the previous one. wait() is called after the buffer swap and,
+    with a target rate, sleeps until the next deadline (coarse sleep, then
+    a short spin for precision).
+
+    A frame is dropped when it takes over 1.5 intervals (the target rate's,
+    or the display refresh under vsync). With adapt, a target rate is
+    halved (down to min_hz) once more than a tenth of the last window
+    frames dropped, and restored once the work of a whole window fits
+    comfortably in the original interval again.
+    """
+    def __init__(self, limit, refresh_hz=60, adapt=True, min_hz=30, window=120):
+        if limit not in FRAME_LIMITS and not isinstance(limit, (int, float)):
+            raise ValueError(f"Unknown frame limit '{limit}': use 'uncapped', 'vsync' or a rate in Hz")
+        self.limit = limit
+        self.vsync = limit == "vsync"
+        self.base_hz = float(limit) if limit not in FRAME_LIMITS else None
+        self.target_hz = self.base_hz
+        self.refresh_hz = refresh_hz
+        self.adapt = adapt and self.base_hz is not None
+        self.min_hz = min_hz
+        self.frame_ms = deque(maxlen=window)
+        self.work_ms = deque(maxlen=window)
+        self.dropped = deque(maxlen=window)
+        self.frames = 0
+        self.drops = 0
+        self.last = time.perf_counter()
+        self.deadline = self.last
+
+    def interval_ms(self):
+        if self.target_hz:
+            return 1000.0 / self.target_hz
+        return 1000.0 / self.refresh_hz if self.vsync else None
+
+    def frame(self, idle_ms=0.0):
+        """idle_ms of the time since the last frame were spent sleeping on purpose and do not count as a drop"""
+        now = time.perf_counter()
+        elapsed = 1000.0 * (now - self.last)
+        self.last = now
+        self.frames += 1
+        interval = self.interval_ms()
+        dropped = interval is not None and self.frames > 1 and elapsed - idle_ms > 1.5 * interval
+        self.drops += dropped
+        self.frame_ms.append(elapsed - idle_ms)
+        self.dropped.append(dropped)
+        return elapsed
+
+    def wait(self):
+        """Sleep out the rest of the frame under a target rate; adapt the rate to drops"""
+        self.work_ms.append(1000.0 * (time.perf_counter() - self.last))
+        if self.adapt:
+            self._adapt()
+        if not self.target_hz:
+            return
+        self.deadline += 1.0 / self.target_hz
+        now = time.perf_counter()
+        if self.deadline < now:
+            self.deadline = now  # missed it: restart the schedule instead of rushing
+            return
+        if self.deadline - now > 0.002:
+            time.sleep(self.deadline - now - 0.001)
+        while time.perf_counter() < self.deadline:
+            pass
+
+    def _adapt(self):
+        if len(self.dropped) < self.dropped.maxlen:
+            return
+        if sum(self.dropped) > len(self.dropped) // 10 and self.target_hz / 2 >= self.min_hz:
+            self.target_hz /= 2
+        elif self.target_hz < self.base_hz and np.percentile(self.work_ms, 90) < 0.8 * 1000.0 / self.base_hz:
+            self.target_hz = self.base_hz
+        else:
+            return
+        print(f"Frame pacing: target {self.target_hz:g} Hz")
+        self.dropped.clear()
+        self.work_ms.clear()
+
+    def report(self):
+        if not self.frame_ms:
+            return "Frames: none"
+        recent = np.array(self.frame_ms)
+        limit = f"{self.target_hz:g} Hz" if self.target_hz else self.limit
+        return (f"Frames: {self.frames}, {self.drops} dropped, limit {limit}, "
+                f"last {len(recent)}: mean {recent.mean():.2f} ms, p99 {np.percentile(recent, 99):.2f} ms")
+
+
+class DamageTracker:
+    """Decides which loop iterations have to draw, for on-demand rendering.
+
+    update() is given everything the picture depends on besides time
+    (camera, glow flags, scene version...) as state. A frame is drawn when
+    state differs from the last drawn one, when forced (input, loading, the
+    profiler overlay), or, while objects animate, every 1/idle_hz seconds
+    (every iteration with idle_hz 0). In between, timeout_ms() says how long
+    the loop may block waiting for input. CPU time of the process over the
+    iterations that drew nothing is kept for report().
+    """
+    def __init__(self, idle_hz):
+        self.idle_interval_ms = 1000.0 / idle_hz if idle_hz else 0.0
+        self.state = None
+        self.last_draw_ms = None
+        self.drawn = 0
+        self.skipped = 0
+        self.idle = False
+        self.idle_cpu_s = 0.0
+        self.idle_wall_s = 0.0
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+
+    def update(self, state, now, animating=False, forced=False):
+        """Whether the frame at simulation time now must be drawn"""
+        cpu, wall = time.process_time(), time.perf_counter()
+        if self.idle:
+            self.idle_cpu_s += cpu - self._cpu
+            self.idle_wall_s += wall - self._wall
+        self._cpu, self._wall = cpu, wall
+
+        due = animating and (self.last_draw_ms is None or now - self.last_draw_ms >= self.idle_interval_ms)
+        draw = forced or due or state != self.state
+        if draw:
+            self.state = state
+            self.last_draw_ms = now
+            self.drawn += 1
+        else:
+            self.skipped += 1
+        self.idle = not draw
+        return draw
+
+    def timeout_ms(self, now, animating=False, wake_at=()):
+        """Milliseconds the loop may wait for input: until the next animated frame or
+        the earliest simulation time in wake_at (None entries ignored); 0 = no limit"""
+        deadlines = [t for t in wake_at if t is not None]
+        if animating and self.last_draw_ms is not None:
+            deadlines.append(self.last_draw_ms + self.idle_interval_ms)
+        if not deadlines:
+            return 0
+        return max(1, int(math.ceil(min(deadlines) - now)))
+
+    def report(self):
+        total = self.drawn + self.skipped
+        if not total:
+            return "On-demand: no frames"
+        cpu = 100.0 * self.idle_cpu_s / self.idle_wall_s if self.idle_wall_s else 0.0
+        return (f"On-demand: {self.drawn} of {total} iterations drawn, "
+                f"idle {self.idle_wall_s:.1f}s at {cpu:.1f}% CPU")
@@ -0,0 +1,78 @@
+import ctypes
+import math
+import numpy as np
+from OpenGL.GL import *
+from shader import MAX_ANIMATED_OBJECTS, MAX_GLOW_GROUPS
+
+ANIM_BINDING = 0        # uniform buffer binding point of the ObjectAnims block
+OBJECT_INDEX_ATTRIB = 3
+
+
+class GPUAnimator:
+    """Moves bounce, spin and glow for the animated shader program onto the GPU.
+
+    Every object's animation parameters live in one uniform buffer, and each
+    object's VAO gets its index as a constant (divisor 1) integer attribute,
+    so a frame only needs view, sceneRotation and time uploaded; glow state
+    changes only when trigger() fires.
+    """
+    def __init__(self, objects, render_table, program, gl_state):
+        if len(objects) > MAX_ANIMATED_OBJECTS:
+            raise ValueError(f"GPU animation supports {MAX_ANIMATED_OBJECTS} objects, got {len(objects)}")
+        if len(render_table.glow_names) > MAX_GLOW_GROUPS:
+            raise ValueError(f"GPU animation supports {MAX_GLOW_GROUPS} glow groups")
+        if render_table.bounce.shape[1] > 2:
+            raise ValueError("GPU animation supports at most two bounce terms per object")
+
+        self.program = program
+        self.render_table = render_table
+
+        # std140 ObjectAnim: vec4 bounce, vec4 spin, vec4 emissive
+        params = np.zeros((MAX_ANIMATED_OBJECTS, 3, 4), dtype=np.float32)
+        count = len(objects)
+        bounce = render_table.bounce.reshape(count, -1)
+        params[:count, 0, :bounce.shape[1]] = bounce
+        params[:count, 1, 0] = render_table.rotation
+        params[:count, 1, 1] = np.radians(render_table.tilt)
+        params[:count, 1, 2] = np.radians(render_table.spin_phase)
+        params[:count, 1, 3] = np.radians(render_table.spin_rate)
+        params[:count, 2, :3] = render_table.emissive
+        params[:count, 2, 3] = render_table.glow_group
+
+        self.UBO = glGenBuffers(1)
+        glBindBuffer(GL_UNIFORM_BUFFER, self.UBO)
+        glBufferData(GL_UNIFORM_BUFFER, params.nbytes, params, GL_STATIC_DRAW)
+        glBindBuffer(GL_UNIFORM_BUFFER, 0)
+        glUniformBlockBinding(program, glGetUniformBlockIndex(program, "ObjectAnims"), ANIM_BINDING)
+        glBindBufferBase(GL_UNIFORM_BUFFER, ANIM_BINDING, self.UBO)
+
+        # One int per object; each VAO reads its own slot for every vertex
+        object_indices = np.arange(count, dtype=np.int32)
+        self.index_VBO = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.index_VBO)
+        glBufferData(GL_ARRAY_BUFFER, object_indices.nbytes, object_indices, GL_STATIC_DRAW)
+        for i, obj in enumerate(objects):
+            glBindVertexArray(obj.VAO)
+            glVertexAttribIPointer(OBJECT_INDEX_ATTRIB, 1, GL_INT, 4, ctypes.c_void_p(4 * i))
+            glEnableVertexAttribArray(OBJECT_INDEX_ATTRIB)
+            glVertexAttribDivisor(OBJECT_INDEX_ATTRIB, 1)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        gl_state.invalidate()
+
+        glow_colors = np.zeros((MAX_GLOW_GROUPS, 3), dtype=np.float32)
+        glow_colors[:len(render_table.glow_colors)] = render_table.glow_colors
+        gl_state.use_program(program)
+        glUniform3fv(gl_state.location(program, "glowColors"), MAX_GLOW_GROUPS, glow_colors)
+        self.update_glow(gl_state)
+
+    def update_glow(self, gl_state):
+        """Upload render_table.glow_until (ticks) as seconds; call after trigger()"""
+        glow_until = np.full(MAX_GLOW_GROUPS, -math.inf, dtype=np.float32)
+        glow_until[:len(self.render_table.glow_until)] = self.render_table.glow_until / 1000.0
+        gl_state.use_program(self.program)
+        glUniform1fv(gl_state.location(self.program, "glowUntil"), MAX_GLOW_GROUPS, glow_until)
+
+    def delete(self):
+        glDeleteBuffers(1, [self.UBO])
+        glDeleteBuffers(1, [self.index_VBO])
@@ -0,0 +1,292 @@
+"""Repeated static meshes stored once and drawn with glDrawElementsInstanced.
+
+Two static objects are instances of each other when they have the same
+index buffer and UVs and their positions match up to a rotation, uniform
+scale and translation (fitted with Umeyama's method; reflections are
+rejected). The scene manifest can also declare extra copies of a mesh:
+
+    "instances": [
+        {"mesh": "Grass", "offset": [1.5, 0, -2], "rotation": 40, "scale": 0.8,
+         "texture": "GrassTexture003.png"}
+    ]
+
+offset moves the copy, rotation (degrees about Y) and scale apply around
+the mesh's own center, and texture replaces its BaseColor.
+"""
+import ctypes
+import hashlib
+import os
+import numpy as np
+from OpenGL.GL import *
+import glm
+from batching import array_levels, arrays_by_size, layer_sources, upload_texture_array
+from mesh_format import compact_indices
+from model_loader import GL_INDEX_TYPES
+from render_props import is_static
+
+INSTANCE_MODEL_ATTRIB = 2   # mat4, locations 2-5
+INSTANCE_LAYER_ATTRIB = 6
+INSTANCE_COMPONENTS = 17    # column-major mat4 + texture array layer
+
+
+def similarity_transform(source, target):
+    """(4x4 matrix, max error) of the rotation + uniform scale + translation best mapping source onto target"""
+    source = np.asarray(source, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    source_mean, target_mean = source.mean(axis=0), target.mean(axis=0)
+    src, dst = source - source_mean, target - target_mean
+    variance = (src ** 2).sum() / len(src)
+    u, s, vt = np.linalg.svd(dst.T @ src / len(src))
+    d = np.ones(3)
+    if np.linalg.det(u) * np.linalg.det(vt) < 0:
+        d[2] = -1.0  # closest proper rotation; a mirrored copy then fails the error check
+    rotation = u @ np.diag(d) @ vt
+    scale = (s * d).sum() / variance if variance else 1.0
+    matrix = np.eye(4)
+    matrix[:3, :3] = scale * rotation
+    matrix[:3, 3] = target_mean - scale * rotation @ source_mean
+    error = np.abs(source @ matrix[:3, :3].T + matrix[:3, 3] - target).max()
+    return matrix, float(error)
+
+
+def placement(center, offset=(0, 0, 0), rotation=0.0, scale=1.0):
+    """4x4 matrix turning and scaling about center (rotation in degrees about Y), then moving by offset"""
+    angle = np.radians(rotation)
+    matrix = np.eye(4)
+    matrix[:3, :3] = scale * np.array([[np.cos(angle), 0, np.sin(angle)],
+                                       [0, 1, 0],
+                                       [-np.sin(angle), 0, np.cos(angle)]])
+    center = np.asarray(center, dtype=np.float64)
+    matrix[:3, 3] = center + np.asarray(offset, dtype=np.float64) - matrix[:3, :3] @ center
+    return matrix
+
+
+class InstanceGroup:
+    """One stored mesh (prototype) and the placement and BaseColor of each copy.
+
+    objects are the loaded SceneObjects the group replaces; owned_textures
+    are handles acquired for declared copies.
+    """
+    def __init__(self, prototype):
+        self.prototype = prototype
+        self.objects = [prototype]
+        self.names = [prototype.name]
+        self.transforms = [np.eye(4)]
+        self.textures = [prototype.textures.get("BaseColor")]
+        self.owned_textures = []
+
+    def add(self, name, transform, texture):
+        self.names.append(name)
+        self.transforms.append(transform)
+        self.textures.append(texture)
+
+
+def _geometry_key(obj):
+    digest = hashlib.sha1(obj.indices.tobytes())
+    digest.update(np.ascontiguousarray(obj.vertices[:, 3:5]).tobytes())
+    return obj.num_vertices, digest.hexdigest()
+
+
+def find_instance_groups(objects, declarations, texture_manager, tolerance=1e-4):
+    """InstanceGroups of the static objects repeated in the scene or declared in the manifest.
+
+    Objects of a group are matched within tolerance times the prototype's
+    radius. Only groups of two or more copies are returned.
+    """
+    static = [obj for obj in objects if is_static(obj.props)]
+    buckets = {}
+    for obj in static:
+        buckets.setdefault(_geometry_key(obj), []).append(obj)
+
+    groups = {}  # object name -> group it belongs to
+    for candidates in buckets.values():
+        while candidates:
+            group = InstanceGroup(candidates.pop(0))
+            positions = group.prototype.positions()
+            for obj in list(candidates):
+                transform, error = similarity_transform(positions, obj.positions())
+                if error <= tolerance * max(group.prototype.radius, 1.0):
+                    group.objects.append(obj)
+                    group.add(obj.name, transform, obj.textures.get("BaseColor"))
+                    candidates.remove(obj)
+            for obj in group.objects:
+                groups[obj.name] = group
+
+    by_name = {obj.name: obj for obj in objects}
+    for i, declaration in enumerate(declarations):
+        mesh = declaration["mesh"]
+        if mesh not in groups:
+            reason = "not a static object" if mesh in by_name else "no such object"
+            print(f"Skipping instance {i} of '{mesh}': {reason}")
+            continue
+        group = groups[mesh]
+        # Placed relative to the named object, which may itself be a transformed copy
+        base = group.transforms[group.names.index(mesh)]
+        center = np.asarray(by_name[mesh].center)
+        transform = placement(center, declaration.get("offset", (0, 0, 0)), declaration.get("rotation", 0.0),
+                              declaration.get("scale", 1.0)) @ base
+        texture = group.textures[group.names.index(mesh)]
+        if "texture" in declaration:
+            texture = texture_manager.acquire(os.path.join("texture", declaration["texture"]))
+            if texture is not None:
+                group.owned_textures.append(texture)
+        group.add(declaration.get("name", f"{mesh}#{i}"), transform, texture)
+
+    unique = {id(group): group for group in groups.values()}
+    return [group for group in unique.values() if len(group.transforms) > 1]
+
+
+class _Instance:
+    """What culling and LOD selection need to know about one copy."""
+    __slots__ = ("name", "props", "center", "radius", "lod_ranges")
+
+    def __init__(self, name, props, center, radius, lod_ranges):
+        self.name = name
+        self.props = props
+        self.center = center
+        self.radius = radius
+        self.lod_ranges = lod_ranges
+
+
+class InstancedMesh:
+    """An InstanceGroup on the GPU: one VBO/EBO, one draw per LOD level and texture array in use.
+
+    BaseColors of different sizes go to separate texture arrays, as in
+    StaticBatch, so no copy's texture is stretched. Per-instance transforms
+    and layers live in an attribute buffer with a region per (LOD level,
+    array); each region has its own VAO reading it, since GL 3.3 has no
+    base instance. submit() packs the visible copies into the region of
+    their level and array and re-uploads only when visibility or levels
+    changed. items are per-copy stand-ins for the frustum culler and LOD
+    selector. The replaced objects' GL buffers and texture handles are
+    released. levels may carry array_levels() output prepared ahead of time.
+    """
+    def __init__(self, group, levels=None):
+        prototype = group.prototype
+        self.names = group.names
+        self.count = len(group.transforms)
+        self.transforms = group.transforms  # scene-space placement of each copy
+        self.bvh = prototype.bvh  # shared by every copy, for picking
+        self.lod_ranges = prototype.lod_ranges
+        index_data = compact_indices(np.concatenate(prototype.lod_indices), prototype.num_vertices)
+        self.index_type = GL_INDEX_TYPES[index_data.dtype]
+
+        # Distinct textures become array layers, in first use order, one array per size
+        distinct = {}
+        for texture in group.textures:
+            distinct.setdefault(texture.key if texture else None, texture)
+        arrays = arrays_by_size(list(distinct.values()))
+        array_of = {}   # texture key -> (array, layer)
+        for array, textures in enumerate(arrays):
+            for layer, texture in enumerate(textures):
+                array_of[texture.key if texture else None] = (array, layer)
+        placements = [array_of[texture.key if texture else None] for texture in group.textures]
+
+        self.instance_data = np.zeros((self.count, INSTANCE_COMPONENTS), dtype=np.float32)
+        self.instance_arrays = np.array([array for array, _ in placements], dtype=np.intp)
+        self.items = []
+        for i, (name, transform) in enumerate(zip(group.names, group.transforms)):
+            self.instance_data[i, :16] = transform.T.reshape(-1)  # column-major for GLSL
+            self.instance_data[i, 16] = placements[i][1]
+            center = transform @ np.append(np.asarray(prototype.center), 1.0)
+            scale = float(np.cbrt(abs(np.linalg.det(transform[:3, :3]))))
+            self.items.append(_Instance(name, prototype.props, glm.vec3(*center[:3].tolist()),
+                                        prototype.radius * scale, prototype.lod_ranges))
+        self.visible_key = None
+
+        self.VBO = glGenBuffers(1)
+        self.EBO = glGenBuffers(1)
+        self.instance_VBO = glGenBuffers(1)
+        vertex_data = np.ascontiguousarray(prototype.vertices, dtype=np.float32)
+        glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+        glBufferData(GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_VBO)
+        region_bytes = self.instance_data.nbytes
+        regions = len(self.lod_ranges) * len(arrays)  # level-major, see _region
+        glBufferData(GL_ARRAY_BUFFER, region_bytes * regions, None, GL_DYNAMIC_DRAW)
+
+        stride = INSTANCE_COMPONENTS * 4
+        self.VAOs = []
+        for region in range(regions):
+            vao = glGenVertexArrays(1)
+            glBindVertexArray(vao)
+            glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
+            # Positions
+            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(0))
+            glEnableVertexAttribArray(0)
+            # TexCoords
+            glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(12))
+            glEnableVertexAttribArray(1)
+            # Instance transform (one vec4 column per location) and layer, from this VAO's region
+            glBindBuffer(GL_ARRAY_BUFFER, self.instance_VBO)
+            base = region * region_bytes
+            for column in range(4):
+                location = INSTANCE_MODEL_ATTRIB + column
+                glVertexAttribPointer(location, 4, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(base + 16 * column))
+                glEnableVertexAttribArray(location)
+                glVertexAttribDivisor(location, 1)
+            glVertexAttribPointer(INSTANCE_LAYER_ATTRIB, 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(base + 64))
+            glEnableVertexAttribArray(INSTANCE_LAYER_ATTRIB)
+            glVertexAttribDivisor(INSTANCE_LAYER_ATTRIB, 1)
+            glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
+            if region == 0:
+                glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL_STATIC_DRAW)
+            self.VAOs.append(vao)
+        glBindVertexArray(0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+        levels = levels or array_levels([layer_sources(textures) for textures in arrays])
+        uploads = [upload_texture_array(layers) for layers in levels]
+        self.texture_arrays = [texture_array for texture_array, _ in uploads]
+        self.texture_bytes = sum(nbytes for _, nbytes in uploads)
+        self.layer_count = sum(len(textures) for textures in arrays)
+        self.region_counts = [0] * regions
+
+        for obj in group.objects:
+            obj.delete()
+        for texture in group.owned_textures:
+            texture.release()
+
+    def _region(self, level, array):
+        return level * len(self.texture_arrays) + array
+
+    def _pack(self, visible, lods):
+        """Copy the visible instances into the region of their LOD level and texture array"""
+        packed = np.zeros((len(self.region_counts), self.count, INSTANCE_COMPONENTS), dtype=np.float32)
+        shown = np.asarray(visible, dtype=bool)
+        levels = np.minimum(np.asarray(lods, dtype=np.intp), len(self.lod_ranges) - 1)
+        for level in range(len(self.lod_ranges)):
+            for array in range(len(self.texture_arrays)):
+                region = self._region(level, array)
+                rows = self.instance_data[shown & (levels == level) & (self.instance_arrays == array)]
+                packed[region, :len(rows)] = rows
+                self.region_counts[region] = len(rows)
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_VBO)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, packed.nbytes, packed)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def submit(self, queue, program, uniforms, depth=0.0, visible=None, lods=None):
+        """Queue one instanced draw per LOD level and texture array that has visible copies.
+
+        visible and lods are per copy, ordered like items.
+        """
+        visible = visible or [True] * self.count
+        lods = lods or [0] * self.count
+        key = (tuple(visible), tuple(lods))
+        if key != self.visible_key:
+            self.visible_key = key
+            self._pack(visible, lods)
+        uniforms = {"textureArray": 0, **uniforms}
+        for level, (first, count) in enumerate(self.lod_ranges):
+            for array, texture_array in enumerate(self.texture_arrays):
+                region = self._region(level, array)
+                instances = self.region_counts[region]
+                if instances:
+                    textures = [(0, GL_TEXTURE_2D_ARRAY, texture_array)]
+                    queue.submit(program, self.VAOs[region], count, textures, uniforms, depth, self.index_type,
+                                 [(first, count)], instances)
+
+    def delete(self):
+        glDeleteVertexArrays(len(self.VAOs), self.VAOs)
+        glDeleteBuffers(3, [self.VBO, self.EBO, self.instance_VBO])
+        glDeleteTextures(len(self.texture_arrays), self.texture_arrays)
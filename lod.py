@@ -0,0 +1,56 @@
+import numpy as np
+from culling import animated_bounds
+
+
+class LODSelector:
+    """Per-frame LOD level for every drawable from its projected screen size.
+
+    Screen size is the bounding sphere radius over the eye-space distance,
+    scaled by the projection, i.e. the fraction of the half-height of the
+    viewport it covers. thresholds are the smallest sizes at which levels
+    0, 1, ... are still used. An object only switches to a coarser level
+    once it is hysteresis (a fraction) below the threshold, so one hovering
+    at a boundary does not flicker between levels.
+
+    Levels are swapped outright, without a cross-fade: the thresholds sit
+    where a level's largest deviation from the base mesh projects to under
+    a pixel (see config.LOD_SCREEN_SIZES), so the swap is not visible, and a
+    dithered fade would draw both levels of every switching object through
+    each of the object, batch and instanced paths.
+
+    Items are ordered like FrustumCuller's: spinning items are measured in
+    their tilted space, everything else in the scene rotation.
+    """
+    def __init__(self, objects, spin_bases, thresholds, hysteresis=0.1):
+        self.centers, self.radii = animated_bounds(objects)
+        self.centers = np.append(self.centers, np.ones((len(self.radii), 1)), axis=1)
+        self.spin_bases = spin_bases
+        self.scene_items = np.array([i for i, base in enumerate(spin_bases) if base is None], dtype=np.intp)
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.hysteresis = hysteresis
+        self.max_level = np.array([len(obj.lod_ranges) - 1 for obj in objects], dtype=np.intp)
+        self.triangle_counts = [[count // 3 for _, count in obj.lod_ranges] for obj in objects]
+        self.levels = np.zeros(len(self.radii), dtype=np.intp)
+
+    def select(self, projection, view, scene_rotation):
+        """LOD level of every item; also kept in self.levels"""
+        eye = np.empty((len(self.radii), 4))
+        matrix = np.array(view * scene_rotation)
+        eye[self.scene_items] = self.centers[self.scene_items] @ matrix.T
+        for i, base in enumerate(self.spin_bases):
+            if base is not None:
+                eye[i] = np.array(view * base) @ self.centers[i]
+        distance = np.maximum(np.linalg.norm(eye[:, :3], axis=1), 1e-6)
+        size = self.radii * projection[1][1] / distance
+
+        wanted = (size[:, None] < self.thresholds).sum(axis=1)
+        past_margin = (size[:, None] < self.thresholds * (1.0 - self.hysteresis)).sum(axis=1)
+        levels = np.where(wanted > self.levels, np.maximum(self.levels, past_margin), wanted)
+        self.levels = np.minimum(levels, self.max_level)
+        return self.levels
+
+    def triangles(self, visible=None):
+        """Triangles drawn at the current levels, counting only visible items if given"""
+        levels = self.levels.tolist()
+        return sum(counts[level] for i, (counts, level) in enumerate(zip(self.triangle_counts, levels))
+                   if visible is None or visible[i])
@@ -0,0 +1,150 @@
+"""Reader for the materials/*.txt mesh format.
+
+Kept free of GL imports so loader worker processes start quickly.
+"""
+import hashlib
+import mmap
+import os
+import re
+import numpy as np
+
+VERTEX_COMPONENTS = 5  # x y z u v
+INDICES_PER_LINE = 3
+LOD_DIR = "lod"  # LOD index sidecars live in <materials>/lod/, see mesh_simplify
+
+_CHUNK_SIZE = 1 << 20
+_ROW = re.compile(rb"^[ \t\r]*\S", re.M)  # a line holding at least one number
+
+
+def index_dtype(vertex_count):
+    """Smallest unsigned index type that can address vertex_count vertices."""
+    if vertex_count <= 1 << 8:
+        return np.dtype(np.uint8)
+    if vertex_count <= 1 << 16:
+        return np.dtype(np.uint16)
+    return np.dtype(np.uint32)
+
+
+def compact_indices(indices, vertex_count):
+    """indices as the smallest type that fits; unchanged if already that type."""
+    return np.asarray(indices).astype(index_dtype(vertex_count), copy=False)
+
+
+def _chunks(mm, start, end):
+    """Yield newline-aligned slices of mm[start:end] of roughly _CHUNK_SIZE bytes."""
+    pos = start
+    while pos < end:
+        stop = mm.find(b"\n", min(pos + _CHUNK_SIZE, end), end)
+        stop = end if stop == -1 else stop + 1
+        yield mm[pos:stop]
+        pos = stop
+
+
+def _parse_numeric_block(mm, start, end, dtype, per_line, what):
+    """Parse the whitespace-separated numbers in mm[start:end] into a flat array.
+
+    The output is preallocated from the line count and filled one chunk at
+    a time, so no per-line Python objects are built and peak memory stays at
+    the final array plus a single chunk. Raises ValueError (prefixed with
+    what) if a token does not parse or a line does not hold per_line numbers.
+    """
+    lines = sum(chunk.count(b"\n") for chunk in _chunks(mm, start, end))
+    out = np.empty((lines + 1) * per_line, dtype=dtype)
+    filled = 0
+    for chunk in _chunks(mm, start, end):
+        if not chunk or chunk.isspace():
+            continue
+        try:
+            values = np.fromstring(chunk, dtype=dtype, sep=" ")
+        except ValueError:
+            raise ValueError(f"{what}: unparseable {np.dtype(dtype).name} data") from None
+        # Older NumPy stops quietly at a bad token, so check the count too;
+        # the exact (slower) row count is only needed when blank lines interleave
+        if (values.size != (chunk.strip().count(b"\n") + 1) * per_line
+                and values.size != len(_ROW.findall(chunk)) * per_line):
+            raise ValueError(f"{what}: expected {per_line} numbers on every line")
+        if filled + values.size > out.size:
+            out.resize(filled + values.size, refcheck=False)
+        out[filled:filled + values.size] = values
+        filled += values.size
+    out.resize(filled, refcheck=False)
+    return out
+
+
+def parse_material_txt(path):
+    """Parse a materials/*.txt mesh into (name, header, vertices, indices).
+
+    header maps each "Key: value" line to its value, so the key order in
+    the file does not matter. vertices is float32 (N, 5), indices is uint32.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        v_pos = mm.find(b"Vertices:")
+        i_pos = mm.find(b"Indices:", v_pos)
+        if v_pos == -1 or i_pos == -1:
+            raise ValueError(f"{path}: missing Vertices:/Indices: section")
+
+        header = {}
+        for line in mm[:v_pos].decode("utf-8").splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                header[key.strip()] = value.strip()
+        name = header.pop("Material")
+
+        v_start = mm.find(b"\n", v_pos) + 1
+        i_start = mm.find(b"\n", i_pos) + 1 or len(mm)
+        vertices = _parse_numeric_block(mm, v_start, i_pos, np.float32, VERTEX_COMPONENTS,
+                                        f"{path}: Vertices")
+        indices = _parse_numeric_block(mm, i_start, len(mm), np.uint32, INDICES_PER_LINE,
+                                       f"{path}: Indices")
+    return name, header, vertices.reshape(-1, VERTEX_COMPONENTS), indices
+
+
+def mesh_digest(vertices, indices):
+    """SHA-1 of a mesh's float32 vertices and uint32 indices, tying LOD sidecars to the exact base mesh"""
+    digest = hashlib.sha1(np.ascontiguousarray(vertices, dtype=np.float32).tobytes())
+    digest.update(np.ascontiguousarray(indices, dtype=np.uint32).tobytes())
+    return digest.hexdigest()
+
+
+def lod_path(txt_path):
+    """Path of the LOD sidecar for a materials/*.txt mesh"""
+    folder, filename = os.path.split(txt_path)
+    return os.path.join(folder, LOD_DIR, filename)
+
+
+def parse_lod_txt(path, vertices, indices):
+    """Index arrays of every LOD level in a sidecar, finest first.
+
+    Returns [] if the sidecar was built for a different base mesh: its
+    Mesh: line must match mesh_digest of vertices and indices, so an edit
+    or reorder that keeps the vertex count is caught too.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        first = mm.find(b"Indices:")
+        header = {}
+        for line in mm[:max(first, 0)].decode("utf-8").splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                header[key.strip()] = value.strip()
+        if (int(header.get("Vertices", -1)) != len(vertices)
+                or header.get("Mesh") != mesh_digest(vertices, indices)):
+            print(f"Ignoring stale LOD file {path}")
+            return []
+
+        levels = []
+        pos = first
+        while pos != -1:
+            start = mm.find(b"\n", pos) + 1 or len(mm)
+            pos = mm.find(b"Indices:", start)
+            end = len(mm) if pos == -1 else pos
+            levels.append(_parse_numeric_block(mm, start, end, np.uint32, INDICES_PER_LINE,
+                                               f"{path}: LOD{len(levels) + 1} Indices"))
+    return levels
+
+
+def load_mesh(path):
+    """(name, header, vertices, indices, lods) for a materials/*.txt mesh and its LOD sidecar"""
+    name, header, vertices, indices = parse_material_txt(path)
+    sidecar = lod_path(path)
+    lods = parse_lod_txt(sidecar, vertices, indices) if os.path.exists(sidecar) else []
+    return name, header, vertices, indices, lods
@@ -0,0 +1,128 @@
+"""Offline mesh optimization for the extraction pipeline.
+
+Triangles are reordered for the post-transform vertex cache (Tipsify,
+Sander et al. 2007), then vertices are renumbered in first-use order so
+vertex fetches walk the buffer front to back. Kept free of GL imports.
+"""
+from collections import deque
+import numpy as np
+from mesh_format import compact_indices
+
+CACHE_SIZE = 32  # post-transform cache entries assumed by the reorder and ACMR
+
+
+def acmr(indices, cache_size=CACHE_SIZE):
+    """Average cache miss ratio: transformed vertices per triangle with a FIFO cache."""
+    indices = np.asarray(indices).reshape(-1).tolist()
+    if not indices:
+        return 0.0
+    fifo = deque()
+    cached = set()
+    misses = 0
+    for v in indices:
+        if v in cached:
+            continue
+        misses += 1
+        fifo.append(v)
+        cached.add(v)
+        if len(fifo) > cache_size:
+            cached.discard(fifo.popleft())
+    return misses / (len(indices) // 3)
+
+
+def optimize_vertex_cache(indices, vertex_count, cache_size=CACHE_SIZE):
+    """Reorder triangles for vertex cache locality; returns a new index array."""
+    indices = np.asarray(indices).reshape(-1)
+    triangle_count = len(indices) // 3
+    if triangle_count == 0:
+        return indices.copy()
+
+    # Vertex -> triangles adjacency, CSR style
+    live = np.bincount(indices, minlength=vertex_count)
+    adjacency_start = np.concatenate(([0], np.cumsum(live))).tolist()
+    adjacency = (np.argsort(indices, kind="stable") // 3).tolist()
+    live = live.tolist()
+    tris = indices.tolist()
+
+    cache_time = [0] * vertex_count
+    emitted = [False] * triangle_count
+    dead_end = []
+    out = []
+    time = cache_size + 1
+    cursor = 0
+    fanning = int(indices[0])
+
+    while fanning >= 0:
+        candidates = []
+        for t in adjacency[adjacency_start[fanning]:adjacency_start[fanning + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = True
+            for v in tris[3 * t:3 * t + 3]:
+                out.append(v)
+                dead_end.append(v)
+                candidates.append(v)
+                live[v] -= 1
+                if time - cache_time[v] > cache_size:
+                    cache_time[v] = time
+                    time += 1
+
+        # Next fanning vertex: the candidate that stays cached longest and still has triangles
+        fanning, best = -1, -1
+        for v in candidates:
+            if live[v] > 0:
+                age = time - cache_time[v]
+                priority = age if age + 2 * live[v] <= cache_size else 0
+                if priority > best:
+                    fanning, best = v, priority
+
+        if fanning == -1:
+            while dead_end:
+                v = dead_end.pop()
+                if live[v] > 0:
+                    fanning = v
+                    break
+            else:
+                while cursor < vertex_count and live[cursor] == 0:
+                    cursor += 1
+                fanning = cursor if cursor < vertex_count else -1
+    return np.array(out, dtype=indices.dtype)
+
+
+def optimize_vertex_fetch(vertices, indices):
+    """Renumber vertices in order of first use; unreferenced vertices are dropped.
+
+    Returns (vertices, indices).
+    """
+    indices = np.asarray(indices).reshape(-1)
+    used, first = np.unique(indices, return_index=True)
+    order = used[np.argsort(first)]
+    remap = np.zeros(len(vertices), dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
+    return np.asarray(vertices)[order], remap[indices]
+
+
+def optimize_mesh(vertices, indices, cache_size=CACHE_SIZE):
+    """Run both passes and compact the index type.
+
+    Returns (vertices, indices, stats) where stats holds ACMR and byte
+    sizes before and after.
+    """
+    vertices = np.asarray(vertices, dtype=np.float32)
+    indices = np.asarray(indices, dtype=np.uint32).reshape(-1)
+    stats = {"acmr_before": acmr(indices, cache_size),
+             "vertex_bytes_before": vertices.nbytes, "index_bytes_before": indices.nbytes}
+
+    reordered = optimize_vertex_cache(indices, len(vertices), cache_size)
+    vertices, reordered = optimize_vertex_fetch(vertices, reordered)
+    reordered = compact_indices(reordered, len(vertices))
+
+    stats.update(acmr_after=acmr(reordered, cache_size), index_type=reordered.dtype.name,
+                 vertex_bytes_after=vertices.nbytes, index_bytes_after=reordered.nbytes)
+    return vertices, reordered, stats
+
+
+def format_stats(name, stats):
+    return (f"{name}: ACMR {stats['acmr_before']:.3f} -> {stats['acmr_after']:.3f}, "
+            f"vertices {stats['vertex_bytes_before']} -> {stats['vertex_bytes_after']} B, "
+            f"indices {stats['index_bytes_before']} -> {stats['index_bytes_after']} B ({stats['index_type']})")
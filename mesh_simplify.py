@@ -0,0 +1,269 @@
+"""Offline LOD generation with quadric error metrics.
+
+Vertices are welded by position so the mesh topology is seen across UV
+seams, then half-edge collapses are applied cheapest first (Garland and
+Heckbert 1997). A collapse moves one position onto a neighbour and remaps
+each of its UV copies onto the matching copy of that neighbour, so every
+LOD level indexes a subset of the original vertex buffer and only needs
+its own index list. Seam and border vertices may only slide along their
+seam or border, and both carry extra constraint planes, so UV islands and
+silhouettes keep their outline. Kept free of GL imports.
+
+LOD levels are written next to the meshes as materials/lod/<file>.txt:
+
+    Material: Grass
+    Vertices: 7800          vertex count of the base mesh the levels index
+    Mesh: 3f2a...           mesh_digest of its vertices and indices
+    Ratios: 0.25 0.06
+    Indices:                one block per level, finest first
+    ...
+"""
+import heapq
+import os
+import numpy as np
+from mesh_format import lod_path, mesh_digest, parse_material_txt
+from mesh_optimize import optimize_vertex_cache
+
+DEFAULT_RATIOS = (0.25, 0.06)   # triangle count of each level relative to the base mesh
+MIN_LOD_TRIANGLES = 2000        # meshes smaller than this get no LOD levels
+_CONSTRAINT_WEIGHT = 100.0      # weight of seam/border planes relative to face planes
+
+
+def _plane_quadrics(planes, weights):
+    """(N, 10) upper triangles of weight * p p^T for planes (N, 4)"""
+    a, b, c, d = planes.T
+    return weights[:, None] * np.stack([a * a, a * b, a * c, a * d, b * b, b * c, b * d,
+                                        c * c, c * d, d * d], axis=1)
+
+
+def _quadric_error(q, p):
+    x, y, z = p
+    return (q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x
+            + q[4] * y * y + 2 * q[5] * y * z + 2 * q[6] * y
+            + q[7] * z * z + 2 * q[8] * z + q[9])
+
+
+def _normal(a, b, c):
+    u = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    v = (c[0] - a[0], c[1] - a[1], c[2] - a[2])
+    return (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+
+
+class _Simplifier:
+    def __init__(self, vertices, indices):
+        positions = np.asarray(vertices, dtype=np.float64)[:, :3]
+        unique, wedge_pos = np.unique(positions, axis=0, return_inverse=True)
+        self.wedge_pos = wedge_pos.reshape(-1).tolist()
+        self.positions = [tuple(p) for p in unique.tolist()]
+        self.tris = np.asarray(indices, dtype=np.int64).reshape(-1, 3).tolist()
+        self.alive = [True] * len(self.tris)
+        self.live_count = len(self.tris)
+
+        self.pos_tris = [set() for _ in self.positions]
+        for t, tri in enumerate(self.tris):
+            for w in tri:
+                self.pos_tris[self.wedge_pos[w]].add(t)
+
+        self.quadrics = self._initial_quadrics(unique, wedge_pos.reshape(-1))
+        self.version = [0] * len(self.positions)
+        self.heap = []
+        for p, q in self._edges():
+            self._push(p, q)
+            self._push(q, p)
+
+    def _edge_tris(self, p, q):
+        return self.pos_tris[p] & self.pos_tris[q]
+
+    def _is_constrained(self, p, q):
+        """True for border edges and UV seams (neighbouring triangles use different copies)"""
+        shared = self._edge_tris(p, q)
+        if len(shared) != 2:
+            return True
+        copies = {w for t in shared for w in self.tris[t] if self.wedge_pos[w] in (p, q)}
+        return len(copies) != 2
+
+    def _edges(self):
+        edges = set()
+        for tri in self.tris:
+            ps = [self.wedge_pos[w] for w in tri]
+            for i in range(3):
+                a, b = ps[i], ps[(i + 1) % 3]
+                edges.add((min(a, b), max(a, b)))
+        return edges
+
+    def _initial_quadrics(self, unique, wedge_pos):
+        tris = wedge_pos[np.asarray(self.tris, dtype=np.int64).reshape(-1, 3)]
+        a, b, c = unique[tris[:, 0]], unique[tris[:, 1]], unique[tris[:, 2]]
+        normals = np.cross(b - a, c - a)
+        areas = np.linalg.norm(normals, axis=1)
+        normals /= np.maximum(areas, 1e-20)[:, None]
+        planes = np.concatenate([normals, -(normals * a).sum(axis=1, keepdims=True)], axis=1)
+        face_q = _plane_quadrics(planes, areas / 2)
+        quadrics = np.zeros((len(unique), 10))
+        for k in range(3):
+            np.add.at(quadrics, tris[:, k], face_q)
+
+        # Constraint planes through seam/border edges, perpendicular to the face
+        self.locked_edges = set()
+        checked = set()
+        constraint_planes, constraint_weights, ends = [], [], []
+        for t, tri in enumerate(tris.tolist()):
+            for k in range(3):
+                p, q = tri[k], tri[(k + 1) % 3]
+                edge = (min(p, q), max(p, q))
+                if edge in checked:
+                    continue
+                checked.add(edge)
+                if not self._is_constrained(p, q):
+                    continue
+                self.locked_edges.add(edge)
+                direction = unique[q] - unique[p]
+                n = np.cross(direction, normals[t])
+                length = np.linalg.norm(n)
+                if length < 1e-20:
+                    continue
+                n /= length
+                constraint_planes.append([*n, -n @ unique[p]])
+                constraint_weights.append(_CONSTRAINT_WEIGHT * (direction @ direction))
+                ends.append((p, q))
+        if constraint_planes:
+            edge_q = _plane_quadrics(np.array(constraint_planes), np.array(constraint_weights))
+            ends = np.array(ends)
+            np.add.at(quadrics, ends[:, 0], edge_q)
+            np.add.at(quadrics, ends[:, 1], edge_q)
+        # Seam/border vertices slide along their two constrained edges;
+        # corners where seams meet or end never move
+        locked_count = {}
+        for p, q in self.locked_edges:
+            locked_count[p] = locked_count.get(p, 0) + 1
+            locked_count[q] = locked_count.get(q, 0) + 1
+        self.constrained = set(locked_count)
+        self.corners = {p for p, count in locked_count.items() if count != 2}
+        return quadrics.tolist()
+
+    def _push(self, p, q):
+        """Queue the collapse of position p onto position q"""
+        if p in self.corners or (p in self.constrained and (min(p, q), max(p, q)) not in self.locked_edges):
+            return
+        combined = [a + b for a, b in zip(self.quadrics[p], self.quadrics[q])]
+        cost = _quadric_error(combined, self.positions[q])
+        heapq.heappush(self.heap, (cost, p, q, self.version[p], self.version[q]))
+
+    def _wedge_map(self, p, q, shared):
+        """Map each copy of p onto the copy of q it shares a removed triangle with, or None"""
+        mapping = {}
+        for t in shared:
+            wp = [w for w in self.tris[t] if self.wedge_pos[w] == p]
+            wq = [w for w in self.tris[t] if self.wedge_pos[w] == q]
+            if len(wp) != 1 or len(wq) != 1 or mapping.setdefault(wp[0], wq[0]) != wq[0]:
+                return None
+        for t in self.pos_tris[p]:
+            for w in self.tris[t]:
+                if self.wedge_pos[w] == p and w not in mapping:
+                    return None
+        return mapping
+
+    def _neighbours(self, p):
+        return {self.wedge_pos[w] for t in self.pos_tris[p] for w in self.tris[t]} - {p}
+
+    def _collapse(self, p, q):
+        shared = self._edge_tris(p, q)
+        if not shared:
+            return False
+        # Link condition: p and q only share the vertices opposite the shared edge
+        if len(self._neighbours(p) & self._neighbours(q)) != len(shared):
+            return False
+        mapping = self._wedge_map(p, q, shared)
+        if mapping is None:
+            return False
+
+        target = self.positions[q]
+        moved = self.pos_tris[p] - shared
+        for t in moved:
+            corners = [self.positions[self.wedge_pos[w]] for w in self.tris[t]]
+            before = _normal(*corners)
+            after = _normal(*[target if self.wedge_pos[w] == p else c
+                              for w, c in zip(self.tris[t], corners)])
+            if sum(x * y for x, y in zip(before, after)) <= 0:
+                return False  # the triangle would flip or degenerate
+
+        for t in shared:
+            self.alive[t] = False
+            self.live_count -= 1
+            for w in self.tris[t]:
+                self.pos_tris[self.wedge_pos[w]].discard(t)
+        for t in moved:
+            self.tris[t] = [mapping.get(w, w) for w in self.tris[t]]
+            self.pos_tris[q].add(t)
+        self.pos_tris[p] = set()
+        self.quadrics[q] = [a + b for a, b in zip(self.quadrics[p], self.quadrics[q])]
+        for n in self._neighbours(q):
+            edge = (min(p, n), max(p, n))
+            if edge in self.locked_edges:
+                self.locked_edges.add((min(q, n), max(q, n)))
+        self.version[p] += 1
+        self.version[q] += 1
+        for n in self._neighbours(q):
+            self._push(q, n)
+            self._push(n, q)
+        return True
+
+    def run(self, target_triangles):
+        while self.live_count > target_triangles and self.heap:
+            cost, p, q, vp, vq = heapq.heappop(self.heap)
+            if vp != self.version[p] or vq != self.version[q] or not self.pos_tris[p]:
+                continue
+            self._collapse(p, q)
+        return np.array([tri for tri, alive in zip(self.tris, self.alive) if alive],
+                        dtype=np.uint32).reshape(-1)
+
+
+def build_lods(vertices, indices, ratios=DEFAULT_RATIOS):
+    """Index arrays of each LOD level, finest first, indexing the given vertices.
+
+    Levels are simplified progressively, so each starts from the previous one.
+    """
+    indices = np.asarray(indices).reshape(-1)
+    simplifier = _Simplifier(vertices, indices)
+    levels = []
+    for ratio in ratios:
+        lod = simplifier.run(int(len(indices) // 3 * ratio))
+        levels.append(optimize_vertex_cache(lod, len(vertices)))
+    return levels
+
+
+def write_lod_txt(path, name, vertices, indices, ratios, levels):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(f"Material: {name}\n")
+        f.write(f"Vertices: {len(vertices)}\n")
+        f.write(f"Mesh: {mesh_digest(vertices, indices)}\n")
+        f.write("Ratios: " + " ".join(f"{r:g}" for r in ratios) + "\n")
+        for level in levels:
+            f.write("Indices:\n")
+            for tri in level.reshape(-1, 3).tolist():
+                f.write(f"{tri[0]} {tri[1]} {tri[2]}\n")
+    print(f"Saved: {path}")
+
+
+def build_lod_folder(folder, ratios=DEFAULT_RATIOS, min_triangles=MIN_LOD_TRIANGLES, names=None):
+    """Write LOD levels for every materials/*.txt mesh with at least min_triangles.
+
+    names limits this to the meshes of those materials (file name without .txt).
+    """
+    for filename in sorted(os.listdir(folder)):
+        if not filename.endswith(".txt") or (names is not None and filename[:-4] not in names):
+            continue
+        txt_path = os.path.join(folder, filename)
+        name, header, vertices, indices = parse_material_txt(txt_path)
+        triangles = len(indices) // 3
+        if triangles < min_triangles:
+            continue
+        levels = build_lods(vertices, indices, ratios)
+        print(f"{name}: {triangles} -> " + " -> ".join(str(len(level) // 3) for level in levels) + " triangles")
+        write_lod_txt(lod_path(txt_path), name, vertices, indices, ratios, levels)
+
+
+# === Run the script ===
+if __name__ == "__main__":
+    build_lod_folder("materials")
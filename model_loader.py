@@ -3,83 +3,211 @@ import os
 import numpy as np
 from OpenGL.GL import *
 import glm
+import config
+from mesh_format import VERTEX_COMPONENTS, compact_indices, load_mesh
+from picking import MeshBVH, mesh_bvh
+from vertex_format import COMPACT_DTYPE, UV_HALF, CompactVertices, quantize_vertices
+
+# GL index type of each NumPy index dtype
+GL_INDEX_TYPES = {np.dtype(np.uint8): GL_UNSIGNED_BYTE, np.dtype(np.uint16): GL_UNSIGNED_SHORT,
+                  np.dtype(np.uint32): GL_UNSIGNED_INT}
 
 class SceneObject:
-    def __init__(self, name, vertices, indices, textures):
+    """One mesh with its own VAO/VBO/EBO and textures.
+
+    vertices are float (N, 5) or CompactVertices (see vertex_format). With
+    compact, the GPU buffer holds the 12-byte quantized layout and
+    dequantize must be folded into the model matrix; otherwise it holds
+    float32 and dequantize is the identity. The CPU side keeps the
+    vertices as given (pack views stay views); the vertices property
+    decodes compact ones for the load-time passes that need floats.
+
+    With config.PICKING, bvh is the mesh's picking BVH: the build_bvh
+    arrays bvh (from the scene pack or a loader worker) or, without them,
+    one built here.
+    """
+    def __init__(self, name, vertices, indices, textures, header=None, lods=(), bvh=None,
+                 compact=config.COMPACT_VERTICES):
         self.name = name
         self.vertex_count = len(indices)
         self.textures = textures
-        self.center = glm.vec3(0, 0, 0)  # Default center
+        self.header = header or {}
+        self.props = None  # render properties, see render_props.resolve_properties
 
         self.VAO = glGenVertexArrays(1)
         self.VBO = glGenBuffers(1)
         self.EBO = glGenBuffers(1)
 
-        vertex_data = np.array(vertices, dtype=np.float32)
-        index_data = np.array(indices, dtype=np.uint32)
+        # asarray keeps memory-mapped pack views zero-copy
+        if isinstance(vertices, CompactVertices) and not compact:
+            vertices = vertices.dequantize()
+        if isinstance(vertices, CompactVertices):
+            quantized = vertices
+        else:
+            vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)
+            quantized = quantize_vertices(vertices) if compact else None
+        self.compact = compact
+        self.num_vertices = len(vertices)
+        # LOD levels share the vertex buffer; their indices follow the base mesh in the EBO
+        levels = [np.asarray(indices).reshape(-1)] + [np.asarray(lod).reshape(-1) for lod in lods]
+        self.lod_ranges = []  # (first index, index count) of each level, finest first
+        first = 0
+        for level in levels:
+            self.lod_ranges.append((first, len(level)))
+            first += len(level)
+        self.lod = 0  # level drawn by submit(), see lod.LODSelector
+        # Smallest index type for the vertex count (uint8/uint16 for small meshes)
+        index_data = compact_indices(np.concatenate(levels) if lods else levels[0], self.num_vertices)
+        self.index_type = GL_INDEX_TYPES[index_data.dtype]
+        # CPU data stays available for load-time passes (batching, instancing, ...)
+        self._vertices = vertices
+        self.lod_indices = [index_data[first:first + count] for first, count in self.lod_ranges]
+        self.indices = self.lod_indices[0]
+
+        # Object-space bounds: AABB, and a sphere around the AABB center
+        if quantized is not None:
+            self.aabb_min, self.aabb_max, self.radius = quantized.bounds()
+            center = (self.aabb_min + self.aabb_max) / 2
+        else:
+            positions = vertices[:, :3]
+            if len(positions):
+                self.aabb_min = positions.min(axis=0)
+                self.aabb_max = positions.max(axis=0)
+            else:
+                self.aabb_min = self.aabb_max = np.zeros(3, dtype=np.float32)
+            center = (self.aabb_min + self.aabb_max) / 2
+            self.radius = float(np.sqrt(((positions - center) ** 2).sum(axis=1).max())) if len(positions) else 0.0
+        self.center = glm.vec3(*center.tolist())
+
+        # Triangle BVH of the finest level for mouse picking, in the same (dequantized) space
+        self.bvh = None
+        if config.PICKING:
+            if bvh is not None:
+                self.bvh = MeshBVH(*bvh, self.positions(), levels[0])
+            else:
+                self.bvh = mesh_bvh(self.vertices, levels[0])
 
         glBindVertexArray(self.VAO)
 
         glBindBuffer(GL_ARRAY_BUFFER, self.VBO)
-        glBufferData(GL_ARRAY_BUFFER, vertex_data.nbytes, vertex_data, GL_STATIC_DRAW)
+        buffer_data = quantized.data if compact else vertices
+        glBufferData(GL_ARRAY_BUFFER, buffer_data.nbytes, buffer_data, GL_STATIC_DRAW)
+        self.vertex_bytes = buffer_data.nbytes
 
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.EBO)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, index_data.nbytes, index_data, GL_STATIC_DRAW)
 
-        # Positions
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(0)
-        # TexCoords
-        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(12))
-        glEnableVertexAttribArray(1)
+        if compact:
+            stride = COMPACT_DTYPE.itemsize
+            # Positions: int16 normalized to [-1, 1] over the AABB, decoded by dequantize
+            glVertexAttribPointer(0, 3, GL_SHORT, GL_TRUE, stride, ctypes.c_void_p(0))
+            glEnableVertexAttribArray(0)
+            # TexCoords: uint16 normalized to [0, 1], or half floats for tiling UVs
+            if quantized.uv_format == UV_HALF:
+                glVertexAttribPointer(1, 2, GL_HALF_FLOAT, GL_FALSE, stride, ctypes.c_void_p(8))
+            else:
+                glVertexAttribPointer(1, 2, GL_UNSIGNED_SHORT, GL_TRUE, stride, ctypes.c_void_p(8))
+            glEnableVertexAttribArray(1)
+            self.dequantize = glm.scale(glm.translate(glm.mat4(1.0), glm.vec3(*quantized.center.tolist())),
+                                        glm.vec3(*quantized.extent.tolist()))
+        else:
+            # Positions
+            glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(0))
+            glEnableVertexAttribArray(0)
+            # TexCoords
+            glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 5 * 4, ctypes.c_void_p(12))
+            glEnableVertexAttribArray(1)
+            self.dequantize = glm.mat4(1.0)
 
         glBindVertexArray(0)
 
-    def draw(self, shader_program, texture_units):
+    @property
+    def vertices(self):
+        """float (N, 5) vertices; compact ones are decoded anew on each access, nothing is kept"""
+        if isinstance(self._vertices, CompactVertices):
+            return self._vertices.dequantize()
+        return self._vertices
+
+    def positions(self):
+        """float (N, 3) object-space positions, decoded like vertices"""
+        if isinstance(self._vertices, CompactVertices):
+            return self._vertices.positions()
+        return self._vertices[:, :3]
+
+    def submit(self, queue, shader_program, texture_units, uniforms, depth=0.0):
+        """Queue this object's draw; binds and uniform sets happen in queue.flush"""
+        textures = {}
+        samplers = {}
         # Special case for compatibility with shaders expecting "texture_diffuse"
         if "BaseColor" in self.textures:
-            glActiveTexture(GL_TEXTURE0)
-            glBindTexture(GL_TEXTURE_2D, self.textures["BaseColor"])
-            glUniform1i(glGetUniformLocation(shader_program, "texture_diffuse"), 0)
+            samplers["texture_diffuse"] = 0
 
         # Bind all other textures with their appropriate names
-        for tex_type, tex_id in self.textures.items():
+        for tex_type, texture in self.textures.items():
             unit = texture_units.get(tex_type, 0)
-            glActiveTexture(GL_TEXTURE0 + unit)
-            glBindTexture(GL_TEXTURE_2D, tex_id)
-            glUniform1i(glGetUniformLocation(shader_program, tex_type), unit)
+            textures[unit] = (unit, GL_TEXTURE_2D, texture.id)
+            samplers[tex_type] = unit
+
+        ranges = [self.lod_ranges[self.lod]] if self.lod else None
+        queue.submit(shader_program, self.VAO, self.vertex_count, textures.values(),
+                     {**samplers, **uniforms}, depth, self.index_type, ranges)
+
+    def delete(self):
+        """Free the GL buffers and release the texture handles"""
+        if self.VAO:
+            glDeleteVertexArrays(1, [self.VAO])
+            glDeleteBuffers(1, [self.VBO])
+            glDeleteBuffers(1, [self.EBO])
+            self.VAO = self.VBO = self.EBO = 0
+        for texture in self.textures.values():
+            texture.release()
+        self.textures = {}
+
+
+TEXTURE_TYPES = ["BaseColor", "Normal", "Roughness", "Alpha", "Metallic", "Emissive"]
+
+
+def _is_number(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def texture_paths(header):
+    """Map texture type -> texture/ path for every map named in a header."""
+    paths = {}
+    for ttype in TEXTURE_TYPES:
+        tex_name = header.get(ttype, "None")
+        # Alpha is usually a scalar opacity ("Alpha: 1.000000"), not a map
+        if tex_name == "None" or (ttype == "Alpha" and _is_number(tex_name)):
+            continue
+        paths[ttype] = os.path.join("texture", tex_name)
+    return paths
 
-        glBindVertexArray(self.VAO)
-        glDrawElements(GL_TRIANGLES, self.vertex_count, GL_UNSIGNED_INT, None)
-        glBindVertexArray(0)
+
+def load_textures(header, texture_loader):
+    """texture_loader is usually TextureManager.acquire; missing images are skipped."""
+    textures = {}
+    for ttype, path in texture_paths(header).items():
+        texture = texture_loader(path)
+        if texture is not None:
+            textures[ttype] = texture
+    return textures
 
 
 def load_model_from_txt(folder_path, texture_loader):
     objects = []
-    texture_types = ["BaseColor", "Normal", "Roughness", "Alpha", "Metallic", "Emissive"]
 
     for filename in os.listdir(folder_path):
         if not filename.endswith(".txt"):
             continue
 
-        with open(os.path.join(folder_path, filename), 'r') as f:
-            lines = f.readlines()
+        name, header, vertices, indices, lods = load_mesh(os.path.join(folder_path, filename))
+        textures = load_textures(header, texture_loader)
 
-        name = lines[0].split(":")[1].strip()
-        textures = {}
-        for i, ttype in enumerate(texture_types):
-            tex_name = lines[i+1].split(":")[1].strip()
-            if tex_name != "None":
-                tex_path = os.path.join("texture", tex_name)
-                textures[ttype] = texture_loader(tex_path)
-
-        v_start = lines.index("Vertices:\n") + 1
-        i_start = lines.index("Indices:\n")
-        vertices = [list(map(float, l.strip().split())) for l in lines[v_start:i_start]]
-        indices = [int(i) for l in lines[i_start+1:] for i in l.strip().split()]
-        flat_vertices = [coord for v in vertices for coord in v]
-
-        obj = SceneObject(name, flat_vertices, indices, textures)
+        obj = SceneObject(name, vertices, indices, textures, header, lods)
         objects.append(obj)
 
     return objects
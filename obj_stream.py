@@ -0,0 +1,257 @@
+"""Streaming OBJ reader for large exports.
+
+Two passes over the file. The first streams it once, converting "v" and
+"vt" lines in batches into growable NumPy buffers and recording, per
+material, the byte ranges of its face runs. The second reads one
+material's face runs at a time, parses them in batches, triangulates
+them as fans and deduplicates (v, vt) pairs with np.unique on a combined
+integer key. Peak memory is the attribute arrays plus the largest single
+material; nothing keeps per-vertex Python objects.
+
+Materials can be decoded in worker processes; the attribute arrays are
+then shared with them through memory-mapped .npy files.
+"""
+import multiprocessing
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+_BATCH_LINES = 1 << 16
+_FACE_CHUNK = 16 << 20  # bytes of face lines parsed at a time
+
+
+class _Growable:
+    """Row buffer that doubles its capacity as batches are appended."""
+    def __init__(self, width, dtype):
+        self.data = np.empty((1024, width), dtype=dtype)
+        self.size = 0
+
+    def extend(self, rows):
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            self.data = np.resize(self.data, (max(needed, 2 * len(self.data)), self.data.shape[1]))
+        self.data[self.size:needed] = rows
+        self.size = needed
+
+    def array(self):
+        return self.data[:self.size]
+
+
+def _parse_rows(lines, width):
+    """(N, width) float32 from "v"/"vt" lines, ignoring the keyword and any extra columns."""
+    values = np.fromstring(b" ".join(line.split(None, 1)[1] for line in lines), dtype=np.float32, sep=" ")
+    if values.size == len(lines) * width:
+        return values.reshape(-1, width)
+    # Optional w / vertex colors on some lines: fall back to one line at a time
+    return np.array([line.split()[1:width + 1] for line in lines], dtype=np.float32)
+
+
+class ObjScan:
+    """Result of the first pass: attributes plus the face runs of each material.
+
+    runs maps material -> [(start, end, position count, texcoord count)];
+    the counts are those at the start of the run, for relative indices.
+    """
+    def __init__(self, positions, texcoords, runs):
+        self.positions = positions
+        self.texcoords = texcoords
+        self.runs = runs
+
+
+def scan_obj(obj_path):
+    positions, texcoords = _Growable(3, np.float32), _Growable(2, np.float32)
+    pending_v, pending_vt = [], []
+    runs = {}
+    material = None
+    run_start = None
+    offset = 0
+
+    def flush():
+        if pending_v:
+            positions.extend(_parse_rows(pending_v, 3))
+            pending_v.clear()
+        if pending_vt:
+            texcoords.extend(_parse_rows(pending_vt, 2))
+            pending_vt.clear()
+
+    def close_run(end):
+        nonlocal run_start
+        if run_start is not None:
+            runs[material][-1] = (run_start, end) + runs[material][-1][2:]
+            run_start = None
+
+    with open(obj_path, "rb") as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            if line.startswith(b"f "):
+                if material is None:
+                    continue  # faces before any usemtl are dropped, as before
+                if run_start is None:
+                    flush()
+                    run_start = start
+                    runs[material].append((start, start, positions.size, texcoords.size))
+                continue
+            if line.startswith(b"v "):
+                close_run(start)
+                pending_v.append(line)
+                if len(pending_v) >= _BATCH_LINES:
+                    flush()
+            elif line.startswith(b"vt "):
+                close_run(start)
+                pending_vt.append(line)
+                if len(pending_vt) >= _BATCH_LINES:
+                    flush()
+            elif line.startswith(b"usemtl"):
+                close_run(start)
+                material = line.split()[1].decode("utf-8")
+                runs.setdefault(material, [])
+        close_run(offset)
+    flush()
+    return ObjScan(positions.array(), texcoords.array(), runs)
+
+
+def _parse_face_line(line):
+    """[(v, vt)] of one face line, or None if malformed"""
+    refs = []
+    for ref in line.split()[1:]:
+        parts = ref.split(b"/")
+        try:
+            refs.append((int(parts[0]), int(parts[1])))
+        except (IndexError, ValueError):
+            print(f"Skipping malformed face vertex: {ref.decode('utf-8', 'replace')}")
+            return None
+    return refs if len(refs) >= 3 else None
+
+
+def _fan_triangles(refs):
+    """(L, n, 2) polygon refs -> (L * (n - 2), 3, 2) fan triangles, face order kept"""
+    n = refs.shape[1]
+    fan = [refs[:, [0, i, i + 1]] for i in range(1, n - 1)]
+    return np.stack(fan, axis=1).reshape(-1, 3, 2)
+
+
+def _parse_faces(data):
+    """(T, 3, 2) raw 1-based/negative (v, vt) triangle refs from a block of face lines"""
+    lines = [line.strip() for line in data.split(b"\n")]
+    lines = [line for line in lines if line.startswith(b"f ")]
+    groups = {}  # refs per face -> [(line number, line)]
+    for number, line in enumerate(lines):
+        groups.setdefault(line.count(b" "), []).append((number, line))
+
+    tri_blocks, tri_lines = [], []
+    for spaces, members in groups.items():
+        numbers = np.array([n for n, _ in members])
+        first_ref = members[0][1].split()[1]
+        per_ref = first_ref.count(b"/") + 1
+        values = None
+        if b"//" not in first_ref and per_ref >= 2 and spaces >= 3:
+            joined = b" ".join(line[2:] for _, line in members).replace(b"/", b" ")
+            values = np.fromstring(joined, dtype=np.int64, sep=" ")
+            if values.size != len(members) * spaces * per_ref:
+                values = None
+        if values is not None:
+            refs = values.reshape(len(members), spaces, per_ref)[:, :, :2]
+        else:
+            # Mixed or malformed formats: parse line by line
+            parsed = [(n, _parse_face_line(line)) for n, line in members]
+            parsed = [(n, r) for n, r in parsed if r is not None]
+            for n, r in parsed:
+                tri_blocks.append(_fan_triangles(np.array([r], dtype=np.int64)))
+                tri_lines.append(np.full(len(r) - 2, n))
+            continue
+        tri_blocks.append(_fan_triangles(refs))
+        tri_lines.append(np.repeat(numbers, spaces - 2))
+
+    if not tri_blocks:
+        return np.empty((0, 3, 2), dtype=np.int64)
+    order = np.argsort(np.concatenate(tri_lines), kind="stable")
+    return np.concatenate(tri_blocks)[order]
+
+
+def _resolve(refs, count):
+    """1-based or negative (relative) OBJ indices -> 0-based"""
+    return np.where(refs < 0, refs + count, refs - 1)
+
+
+def _face_chunks(obj_path, runs):
+    """Yield (triangle refs, position count, texcoord count) a newline-aligned chunk at a time"""
+    with open(obj_path, "rb") as f:
+        for start, end, v_count, vt_count in runs:
+            f.seek(start)
+            pos = start
+            while pos < end:
+                data = f.read(min(_FACE_CHUNK, end - pos))
+                if pos + len(data) < end:
+                    data += f.readline()
+                pos += len(data)
+                yield _parse_faces(data), v_count, vt_count
+
+
+def decode_material(obj_path, runs, positions, texcoords):
+    """(vertices (N, 5) float32, indices uint32) for one material's face runs.
+
+    Vertices are numbered in order of first use, like the original extractor.
+    """
+    triangles = []
+    for refs, v_count, vt_count in _face_chunks(obj_path, runs):
+        v = _resolve(refs[:, :, 0], v_count)
+        vt = _resolve(refs[:, :, 1], vt_count)
+        valid = ((v >= 0) & (v < len(positions)) & (vt >= 0) & (vt < len(texcoords))).all(axis=1)
+        if not valid.all():
+            print(f"Skipping {int((~valid).sum())} triangles with out-of-range indices")
+        triangles.append(np.stack([v[valid], vt[valid]], axis=-1))
+    refs = np.concatenate(triangles).reshape(-1, 2) if triangles else np.empty((0, 2), dtype=np.int64)
+
+    # One integer key per (v, vt) pair; unique pairs become vertices in first-use order
+    keys = refs[:, 0] * max(len(texcoords), 1) + refs[:, 1]
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty(len(order), dtype=np.uint32)
+    rank[order] = np.arange(len(order), dtype=np.uint32)
+    pairs = unique[order]
+    vertices = np.empty((len(pairs), 5), dtype=np.float32)
+    vertices[:, :3] = positions[pairs // max(len(texcoords), 1)]
+    vertices[:, 3:] = texcoords[pairs % max(len(texcoords), 1)]
+    return vertices, rank[inverse.reshape(-1)]
+
+
+def _decode_worker(obj_path, runs, positions_path, texcoords_path):
+    positions = np.load(positions_path, mmap_mode="r")
+    texcoords = np.load(texcoords_path, mmap_mode="r")
+    return decode_material(obj_path, runs, positions, texcoords)
+
+
+def iter_obj_materials(obj_path, workers=1):
+    """Yield (material, vertices, indices) per material, in order of first usemtl.
+
+    With workers > 1 materials are decoded in that many processes, with at
+    most workers results in flight so memory stays bounded.
+    """
+    scan = scan_obj(obj_path)
+    if workers <= 1:
+        for material, runs in scan.runs.items():
+            yield (material,) + decode_material(obj_path, runs, scan.positions, scan.texcoords)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        positions_path = os.path.join(tmp, "positions.npy")
+        texcoords_path = os.path.join(tmp, "texcoords.npy")
+        np.save(positions_path, scan.positions)
+        np.save(texcoords_path, scan.texcoords)
+        del scan.positions, scan.texcoords
+
+        mp_context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=mp_context) as pool:
+            in_flight = deque()
+            for material, runs in scan.runs.items():
+                in_flight.append((material, pool.submit(_decode_worker, obj_path, runs,
+                                                        positions_path, texcoords_path)))
+                if len(in_flight) >= workers:
+                    material, future = in_flight.popleft()
+                    yield (material,) + future.result()
+            while in_flight:
+                material, future = in_flight.popleft()
+                yield (material,) + future.result()
@@ -0,0 +1,273 @@
+"""Mouse picking: nearest triangle under a ray, through two levels of BVH.
+
+Each mesh has a MeshBVH over its triangles (built with NumPy when the
+scene pack is written and stored in it, or at load time without a pack).
+ScenePicker puts a second BVH over the meshes' bounds in scene space, so
+a ray only descends into the few meshes whose boxes it crosses, nearest
+first. The trees are 8-wide (2 ** SPLITS children) to cut their depth,
+and traversal is breadth first: every level of the tree is tested
+against the ray in one vectorized slab test, and the triangles under the
+nodes hit are tested together through per-triangle barycentric maps
+(see MeshBVH).
+
+Kept free of GL imports like mesh_format, so pack builders and workers
+can build BVHs.
+"""
+import numpy as np
+from mesh_format import VERTEX_COMPONENTS, load_mesh
+
+LEAF_SIZE = 16  # primitives per BVH leaf
+SPLITS = 3  # binary splits per BVH level, i.e. up to 2 ** SPLITS children per node
+_EPSILON = 1e-9
+
+
+def build_bvh(lo, hi, leaf_size=LEAF_SIZE):
+    """2 ** SPLITS-wide BVH over primitives with boxes lo/hi (P, 3), by median splits of the centroids' longest axis.
+
+    Returns (bounds (K, 6) float32 as lo + hi, nodes (K, 2 ** SPLITS + 2) int32, order (P,) uint32):
+    nodes rows are (2 ** SPLITS children, first, count), missing children
+    -1 and leaves without any; a node's primitives are order[first:first + count].
+    Node 0 is the root.
+    """
+    lo = np.asarray(lo, dtype=np.float32).reshape(-1, 3)
+    hi = np.asarray(hi, dtype=np.float32).reshape(-1, 3)
+    centroids = (lo + hi) / 2
+    order = np.arange(len(lo), dtype=np.uint32)
+    bounds = []
+    nodes = []
+
+    def halves(start, end):
+        if end - start <= leaf_size:
+            return [(start, end)]
+        items = order[start:end]
+        spread = centroids[items].max(axis=0) - centroids[items].min(axis=0)
+        mid = (end - start) // 2
+        order[start:end] = items[np.argpartition(centroids[items, int(np.argmax(spread))], mid)]
+        return [(start, start + mid), (start + mid, end)]
+
+    def build(start, end):
+        items = order[start:end]
+        node = len(nodes)
+        bounds.append(np.concatenate([lo[items].min(axis=0), hi[items].max(axis=0)]))
+        nodes.append([-1] * (1 << SPLITS) + [start, end - start])
+        if end - start > leaf_size:
+            parts = [(start, end)]
+            for _ in range(SPLITS):
+                parts = [part for whole in parts for part in halves(*whole)]
+            for slot, part in enumerate(parts):
+                nodes[node][slot] = build(*part)
+        return node
+
+    if len(lo):
+        build(0, len(lo))
+    return (np.array(bounds, dtype=np.float32).reshape(-1, 6),
+            np.array(nodes, dtype=np.int32).reshape(-1, (1 << SPLITS) + 2), order)
+
+
+def _slab_hits(bounds, origin, inverse, max_t):
+    """(hit mask, entry distance) of the ray against boxes (N, 6); origin and inverse tiled twice"""
+    t = (bounds - origin) * inverse
+    near = np.minimum(t[:, :3], t[:, 3:]).max(axis=1)
+    far = np.maximum(t[:, :3], t[:, 3:]).min(axis=1)
+    np.maximum(near, 0.0, out=near)
+    return near <= np.minimum(far, max_t), near
+
+
+def _ray_slabs(origin, direction):
+    """origin and 1 / direction tiled for _slab_hits; axis-parallel rays get huge finite slopes"""
+    direction = np.where(np.abs(direction) < 1e-20, 1e-20, direction)
+    origin = np.asarray(origin, dtype=np.float32)
+    inverse = (1.0 / direction).astype(np.float32)
+    return np.concatenate([origin, origin]), np.concatenate([inverse, inverse])
+
+
+class MeshBVH:
+    """Triangle BVH of one mesh, from build_bvh arrays (see mesh_bvh).
+
+    Each triangle gets the affine map from mesh space to its (u, v, w)
+    coordinates: p = v0 + u * e1 + v * e2 + w * (e1 x e2). A ray hits it
+    where w reaches 0 with u, v inside, which is two small matrix products
+    per candidate batch. The maps are kept in leaf order, so the triangles
+    under any node are a contiguous slice. Traversal stops descending once
+    the nodes hit hold at most BATCH_TRIANGLES triangles, as testing them
+    all costs about the same as another level.
+    """
+    BATCH_TRIANGLES = 256
+
+    def __init__(self, bounds, nodes, order, positions, indices):
+        self.bounds = np.asarray(bounds, dtype=np.float32)
+        self.nodes = np.asarray(nodes, dtype=np.int32)
+        self.order = np.asarray(order, dtype=np.uint32)
+        # Leaves are their own only child, so they stay in the frontier
+        self.leaf = self.nodes[:, 0] < 0
+        self.children = self.nodes[:, :-2].copy()
+        self.children[self.leaf, 0] = np.flatnonzero(self.leaf)
+        self.first = self.nodes[:, -2]
+        self.count = self.nodes[:, -1]
+
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        corners = positions[np.asarray(indices).reshape(-1, 3)[self.order]].astype(np.float64)
+        v0, e1, e2 = corners[:, 0], corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+        normal = np.cross(e1, e2)
+        area = (normal * normal).sum(axis=1)
+        # Rows of the inverse of the frame [e1 e2 normal v0], in closed form
+        degenerate = area < _EPSILON ** 2
+        area[degenerate] = 1.0
+        rows = np.stack([np.cross(e2, normal), np.cross(normal, e1), normal], axis=1) / area[:, None, None]
+        self.barycentric = np.empty((len(corners), 3, 4), dtype=np.float32)
+        self.barycentric[:, :, :3] = rows
+        self.barycentric[:, :, 3] = -(rows @ v0[:, :, None])[:, :, 0]
+        # Degenerate triangles get a w that never reaches 0
+        self.barycentric[degenerate, 2] = (0.0, 0.0, 0.0, 1.0)
+
+    def arrays(self):
+        """(bounds, nodes, order) as build_bvh returns them, for the scene pack"""
+        return self.bounds, self.nodes, self.order
+
+    def intersect(self, origin, direction, max_t=np.inf):
+        """(t, triangle index) of the nearest hit at origin + t * direction, t < max_t, or None"""
+        if not len(self.nodes):
+            return None
+        slab_origin, inverse = _ray_slabs(origin, direction)
+        frontier = np.zeros(1, dtype=np.intp)
+        while True:
+            hit, _ = _slab_hits(self.bounds[frontier], slab_origin, inverse, max_t)
+            frontier = frontier[hit]
+            if not len(frontier):
+                return None
+            if self.count[frontier].sum() <= self.BATCH_TRIANGLES or self.leaf[frontier].all():
+                break
+            children = self.children[frontier].reshape(-1)
+            frontier = children[children >= 0]
+
+        # Every triangle under the nodes hit, in one batch
+        counts = self.count[frontier]
+        ends = np.cumsum(counts)
+        candidates = np.repeat(self.first[frontier] - (ends - counts), counts) + np.arange(ends[-1])
+        maps = self.barycentric[candidates]
+        local_origin = maps[:, :, :3] @ np.asarray(origin, dtype=np.float32) + maps[:, :, 3]
+        local_direction = maps[:, :, :3] @ np.asarray(direction, dtype=np.float32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = -local_origin[:, 2] / local_direction[:, 2]
+            u = local_origin[:, 0] + t * local_direction[:, 0]
+            v = local_origin[:, 1] + t * local_direction[:, 1]
+            hits = (t > 0) & (t < max_t) & (u >= 0) & (v >= 0) & (u + v <= 1)
+        if not hits.any():
+            return None
+        best = int(np.argmin(np.where(hits, t, np.inf)))
+        return float(t[best]), int(self.order[candidates[best]])
+
+
+def mesh_bvh(vertices, indices, leaf_size=LEAF_SIZE):
+    """MeshBVH over the triangles of float (N, 5) vertices and flat indices"""
+    positions = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)[:, :3]
+    corners = positions[np.asarray(indices).reshape(-1, 3)]
+    return MeshBVH(*build_bvh(corners.min(axis=1), corners.max(axis=1), leaf_size), positions, indices)
+
+
+def load_mesh_with_bvh(path, build=True):
+    """load_mesh plus the mesh's BVH arrays (None without build), for loader workers"""
+    name, header, vertices, indices, lods = load_mesh(path)
+    return name, header, vertices, indices, lods, mesh_bvh(vertices, indices).arrays() if build else None
+
+
+def ray_from_screen(x, y, size, projection, view):
+    """World-space (origin, direction) of the ray through window pixel (x, y), y down as pygame reports it"""
+    ndc = np.array([2.0 * x / size[0] - 1.0, 1.0 - 2.0 * y / size[1]])
+    inverse = np.linalg.inv(np.array(projection * view, dtype=np.float64))  # glm -> rows of the math matrix
+    near = inverse @ np.array([ndc[0], ndc[1], -1.0, 1.0])
+    far = inverse @ np.array([ndc[0], ndc[1], 1.0, 1.0])
+    near = near[:3] / near[3]
+    far = far[:3] / far[3]
+    return near, far - near
+
+
+class PickTarget:
+    """One pickable mesh: its BVH and where it sits.
+
+    base maps mesh space to scene space (the space the scene rotation
+    turns), grow is how far the object bounces along its Y. Spinning
+    targets are not in scene space and are always tested.
+    """
+    __slots__ = ("name", "props", "bvh", "base", "grow", "spins")
+
+    def __init__(self, name, props, bvh, base=None, grow=0.0, spins=False):
+        self.name = name
+        self.props = props
+        self.bvh = bvh
+        self.base = np.eye(4) if base is None else np.asarray(base, dtype=np.float64)
+        self.grow = grow
+        self.spins = spins
+
+
+class ScenePicker:
+    """Nearest PickTarget under a ray: a BVH over the targets' bounds, then their MeshBVHs.
+
+    The top-level boxes are the targets' mesh bounds moved into scene
+    space by base and grown by their bounce, so they hold at any time.
+    """
+    def __init__(self, targets):
+        self.targets = targets
+        pickable = [i for i, target in enumerate(targets) if len(target.bvh.nodes)]  # empty meshes never hit
+        self.scene_targets = np.array([i for i in pickable if not targets[i].spins], dtype=np.intp)
+        self.spin_targets = [i for i in pickable if targets[i].spins]
+        lo = np.zeros((len(self.scene_targets), 3), dtype=np.float32)
+        hi = np.zeros_like(lo)
+        for row, i in enumerate(self.scene_targets):
+            target = self.targets[i]
+            box = target.bvh.bounds[0].reshape(2, 3)
+            corners = np.array([[box[a][0], box[b][1], box[c][2], 1.0]
+                                for a in (0, 1) for b in (0, 1) for c in (0, 1)])
+            corners = (corners @ target.base.T)[:, :3]
+            lo[row] = corners.min(axis=0) - [0.0, target.grow, 0.0]
+            hi[row] = corners.max(axis=0) + [0.0, target.grow, 0.0]
+        self.bounds, self.nodes, self.order = build_bvh(lo, hi, leaf_size=2)
+        self.leaf_bounds = np.concatenate([lo, hi], axis=1)
+
+    def _scene_candidates(self, origin, direction):
+        """(target index, entry distance) of the scene-space targets whose boxes the ray enters"""
+        if not len(self.nodes):
+            return []
+        slab_origin, inverse = _ray_slabs(origin, direction)
+        found = []
+        frontier = np.zeros(1, dtype=np.intp)
+        while len(frontier):
+            hit, _ = _slab_hits(self.bounds[frontier], slab_origin, inverse, np.inf)
+            rows = self.nodes[frontier[hit]]
+            inner = rows[:, 0] >= 0
+            for first, count in rows[~inner, -2:]:
+                found.extend(self.order[first:first + count].tolist())
+            children = rows[inner, :-2].reshape(-1)
+            frontier = children[children >= 0]
+        if not found:
+            return []
+        hit, near = _slab_hits(self.leaf_bounds[found], slab_origin, inverse, np.inf)
+        return [(int(self.scene_targets[row]), float(t)) for row, t, h in zip(found, near, hit) if h]
+
+    def pick(self, origin, direction, scene_rotation, model_of):
+        """(target index, t) of the nearest hit of the world-space ray, or None.
+
+        model_of(i) is the current mesh-to-world matrix of target i (4x4,
+        row-major NumPy). t is in units of direction, comparable across
+        targets.
+        """
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        rotation = np.array(scene_rotation, dtype=np.float64)
+        # Into scene space; the scene rotation is orthonormal
+        scene_origin = (rotation[:3, :3].T @ (origin - rotation[:3, 3])).astype(np.float32)
+        scene_direction = (rotation[:3, :3].T @ direction).astype(np.float32)
+        candidates = sorted(self._scene_candidates(scene_origin, scene_direction), key=lambda candidate: candidate[1])
+
+        # Nearest boxes first; spinning targets last, when the closest hit so far prunes most of their tree
+        best = None
+        for i, entry in candidates + [(i, 0.0) for i in self.spin_targets]:
+            if best and entry >= best[1]:
+                continue
+            inverse = np.linalg.inv(model_of(i))
+            local_origin = inverse[:3, :3] @ origin + inverse[:3, 3]
+            local_direction = inverse[:3, :3] @ direction
+            hit = self.targets[i].bvh.intersect(local_origin, local_direction, best[1] if best else np.inf)
+            if hit:
+                best = (i, hit[0])
+        return best
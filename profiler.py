@@ -0,0 +1,235 @@
+import json
+import time
+import pygame
+from OpenGL.GL import *
+import numpy as np
+
+# One ring buffer row per timed section
+SECTION_DTYPE = np.dtype([("frame", np.int64), ("name", np.int16), ("depth", np.int8),
+                          ("start", np.int64), ("cpu", np.int64), ("gpu", np.int64)])
+
+
+class _NullSection:
+    """What section() hands out while the profiler is off: enter/exit do nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "gpu", "start", "query")
+
+    def __init__(self, profiler, name, gpu):
+        self.profiler = profiler
+        self.name = name
+        self.gpu = gpu
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.query = profiler._begin_query() if self.gpu else None
+        profiler.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        profiler = self.profiler
+        if self.query is not None:
+            glEndQuery(GL_TIME_ELAPSED)
+        profiler.depth -= 1
+        profiler._record(self.name, profiler.depth, self.start, end - self.start, self.query)
+        return False
+
+
+class FrameProfiler:
+    """CPU and GPU timings of named sections of every frame, in a ring buffer.
+
+    with profiler.section(name): ... times a block with perf_counter_ns;
+    gpu=True also wraps it in a GL_TIME_ELAPSED query. Those queries must
+    not nest (GL allows one at a time), CPU sections may. Queries are
+    double-buffered by frame: a frame's results are read back two frames
+    later, when its query set is reused, and only if the GPU has them
+    ready, so reading never stalls. Not-ready results stay -1.
+
+    The last capacity sections are kept. While disabled, section() returns
+    a shared no-op object and nothing is recorded.
+    """
+    def __init__(self, capacity=4096, enabled=False):
+        self.ring = np.zeros(capacity, dtype=SECTION_DTYPE)
+        self.count = 0          # sections recorded so far; the ring holds the last capacity
+        self.names = []
+        self._name_ids = {}
+        self.enabled = enabled
+        self.frame = 0
+        self.depth = 0
+        self._frame_start = 0
+        self._queries = [[], []]   # query ids per frame parity, reused
+        self._pending = [[], []]   # (query id, ring row, record number) awaiting results
+        self._used = 0
+        self._origin = time.perf_counter_ns()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        print(f"Profiler {'on' if self.enabled else 'off'}")
+
+    def section(self, name, gpu=False):
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name, gpu)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame += 1
+        self._collect(self.frame % 2)
+        self._used = 0
+        self._frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        """Record the whole frame as a depth -1 section"""
+        if not self.enabled or not self._frame_start:
+            return
+        now = time.perf_counter_ns()
+        self._record("frame", -1, self._frame_start, now - self._frame_start, None)
+        self._frame_start = 0
+
+    def _begin_query(self):
+        queries = self._queries[self.frame % 2]
+        if self._used == len(queries):
+            queries.extend(np.atleast_1d(glGenQueries(max(4, len(queries)))).tolist())
+        query = queries[self._used]
+        self._used += 1
+        glBeginQuery(GL_TIME_ELAPSED, query)
+        return query
+
+    def _record(self, name, depth, start, cpu, query):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        row = self.count % len(self.ring)
+        self.ring[row] = (self.frame, name_id, depth, start - self._origin, cpu, -1)
+        if query is not None:
+            self._pending[self.frame % 2].append((query, row, self.count))
+        self.count += 1
+
+    def _collect(self, parity):
+        """Read the GPU times of the frame that last used this query set, if ready"""
+        pending = self._pending[parity]
+        for query, row, number in pending:
+            if number < self.count - len(self.ring):
+                continue  # the row has been overwritten since
+            if glGetQueryObjectiv(query, GL_QUERY_RESULT_AVAILABLE):
+                # 32-bit read (PyOpenGL's ui64 wrapper is broken); a saturated value is unknown
+                elapsed = glGetQueryObjectuiv(query, GL_QUERY_RESULT)
+                if elapsed != 0xFFFFFFFF:
+                    self.ring["gpu"][row] = elapsed
+        pending.clear()
+
+    def rows(self):
+        """Recorded sections, oldest first"""
+        if self.count <= len(self.ring):
+            return self.ring[:self.count]
+        split = self.count % len(self.ring)
+        return np.concatenate([self.ring[split:], self.ring[:split]])
+
+    def summary(self, frames=60):
+        """[(name, mean CPU ms, mean GPU ms or None)] over the last frames, frame first"""
+        rows = self.rows()
+        rows = rows[rows["frame"] > self.frame - frames]
+        result = []
+        for name_id in np.unique(rows["name"]):
+            mine = rows[rows["name"] == name_id]
+            gpu = mine["gpu"][mine["gpu"] >= 0]
+            result.append((int(mine["depth"].min()), self.names[name_id], float(mine["cpu"].mean()) / 1e6,
+                           float(gpu.mean()) / 1e6 if len(gpu) else None))
+        return [entry[1:] for entry in sorted(result, key=lambda entry: entry[0])]
+
+    def write_chrome_trace(self, path):
+        """Dump the ring buffer as Chrome trace JSON (chrome://tracing, Perfetto).
+
+        CPU sections go on thread 0 and GPU durations on thread 1, anchored
+        at the CPU start of their section since GL_TIME_ELAPSED has no
+        timestamp of its own.
+        """
+        events = []
+        for frame, name_id, depth, start, cpu, gpu in self.rows().tolist():
+            name = self.names[name_id]
+            events.append({"name": name, "cat": "cpu", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": start / 1000.0, "dur": cpu / 1000.0, "args": {"frame": frame}})
+            if gpu >= 0:
+                events.append({"name": name, "cat": "gpu", "ph": "X", "pid": 0, "tid": 1,
+                               "ts": start / 1000.0, "dur": gpu / 1000.0, "args": {"frame": frame}})
+        events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": 0, "args": {"name": "CPU"}})
+        events.append({"name": "thread_name", "ph": "M", "pid": 0, "tid": 1, "args": {"name": "GPU"}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Saved: {path} ({min(self.count, len(self.ring))} sections)")
+
+    def delete(self):
+        queries = self._queries[0] + self._queries[1]
+        if queries:
+            glDeleteQueries(len(queries), queries)
+
+
+class ProfilerOverlay:
+    """Profiler summary drawn as text in the top-left corner of the window.
+
+    The text is rendered with pygame.font into a texture at most every
+    refresh_ms and drawn with the background quad's program and VAO.
+    """
+    def __init__(self, program, vao, gl_state, display, refresh_ms=250):
+        self.program = program
+        self.vao = vao
+        self.gl_state = gl_state
+        self.display = display
+        self.refresh_ms = refresh_ms
+        self.font = pygame.font.SysFont("monospace", 14)
+        self.texture = glGenTextures(1)
+        self.size = (0, 0)
+        self.updated = None
+
+    def _update(self, profiler):
+        lines = [f"{'section':<12}{'cpu ms':>8}{'gpu ms':>8}"]
+        for name, cpu, gpu in profiler.summary():
+            lines.append(f"{name:<12}{cpu:>8.2f}" + (f"{gpu:>8.2f}" if gpu is not None else f"{'-':>8}"))
+        height = self.font.get_linesize()
+        surface = pygame.Surface((max(self.font.size(line)[0] for line in lines) + 8,
+                                  height * len(lines) + 8), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 160))
+        for i, line in enumerate(lines):
+            surface.blit(self.font.render(line, True, (255, 255, 255)), (4, 4 + i * height))
+
+        self.size = surface.get_size()
+        self.gl_state.bind_texture(0, GL_TEXTURE_2D, self.texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.size[0], self.size[1], 0, GL_RGBA, GL_UNSIGNED_BYTE,
+                     pygame.image.tostring(surface, "RGBA", True))
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+
+    def draw(self, profiler, now):
+        if self.updated is None or now - self.updated >= self.refresh_ms:
+            self.updated = now
+            self._update(profiler)
+        width, height = self.size
+        glViewport(0, self.display[1] - height, width, height)
+        glDisable(GL_DEPTH_TEST)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.gl_state.use_program(self.program)
+        self.gl_state.bind_vertex_array(self.vao)
+        self.gl_state.bind_texture(0, GL_TEXTURE_2D, self.texture)
+        self.gl_state.set_uniform("backgroundTexture", 0)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        glDisable(GL_BLEND)
+        glViewport(0, 0, self.display[0], self.display[1])
+
+    def delete(self):
+        glDeleteTextures(1, [self.texture])
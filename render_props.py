@@ -0,0 +1,129 @@
+"""Per-object render properties, resolved once at load time.
+
+Properties come from the scene manifest (config.SCENE_MANIFEST), whose
+rules match object names with fnmatch patterns and apply in order, and
+can be overridden per material by optional header keys:
+
+    Rotation: scene | spin       follow the camera rotation, or spin in place
+    Tilt: 90                     base rotation about X for spinning objects (degrees)
+    SpinRate: 6                  spin speed for the GPU animation path (degrees/second)
+    Bounce: none | 0.03 4.0, ... (amplitude, frequency) pairs summed into a Y offset
+    EmissiveColor: 1 0 0         always-on emissive color
+    GlowGroup: Charmander        group lit up by trigger()
+
+RenderTable packs the result into arrays indexed by object, so the frame
+loop never looks at names.
+"""
+import json
+from fnmatch import fnmatchcase
+import numpy as np
+import config
+
+ROTATION_SCENE = 0
+ROTATION_SPIN = 1
+_ROTATIONS = {"scene": ROTATION_SCENE, "spin": ROTATION_SPIN}
+
+
+def load_manifest(path=config.SCENE_MANIFEST):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _header_overrides(header):
+    props = {}
+    if "Rotation" in header:
+        props["rotation"] = header["Rotation"].lower()
+    if "Tilt" in header:
+        props["tilt"] = float(header["Tilt"])
+    if "SpinRate" in header:
+        props["spin_rate"] = float(header["SpinRate"])
+    if "Bounce" in header:
+        value = header["Bounce"]
+        props["bounce"] = [] if value == "None" or value.lower() == "none" else \
+            [[float(x) for x in pair.split()] for pair in value.split(",")]
+    if "EmissiveColor" in header:
+        value = header["EmissiveColor"]
+        props["emissive"] = None if value == "None" else [float(x) for x in value.split()]
+    if "GlowGroup" in header:
+        value = header["GlowGroup"]
+        props["glow"] = None if value == "None" else value
+    return props
+
+
+def resolve_properties(name, header, manifest):
+    """Property dict for one object: manifest defaults, matching rules, then header keys."""
+    props = dict(manifest["defaults"])
+    for rule in manifest["rules"]:
+        if fnmatchcase(name, rule["match"]):
+            props.update({k: v for k, v in rule.items() if k != "match"})
+    props.update(_header_overrides(header or {}))
+    if props["rotation"] not in _ROTATIONS:
+        raise ValueError(f"{name}: unknown rotation '{props['rotation']}'")
+    return props
+
+
+def is_static(props):
+    """Static props never move on their own or glow, so they can be batched."""
+    return (props["rotation"] == "scene" and not props["bounce"]
+            and props["emissive"] is None and props["glow"] is None)
+
+
+class RenderTable:
+    """Render properties of a list of objects as compact per-object arrays.
+
+    glow_until holds, per glow group, the tick until which it is lit;
+    trigger() writes it through glow_index.
+    """
+    def __init__(self, props_list, manifest):
+        count = len(props_list)
+        max_bounces = max((len(p["bounce"]) for p in props_list), default=0)
+
+        self.glow_names = list(manifest.get("glow_groups", {}))
+        self.glow_index = {name: i for i, name in enumerate(self.glow_names)}
+        self.glow_colors = np.array([manifest["glow_groups"][n] for n in self.glow_names],
+                                    dtype=np.float32).reshape(-1, 3)
+        self.glow_until = np.zeros(len(self.glow_names), dtype=np.int64)
+
+        self.rotation = np.zeros(count, dtype=np.int8)
+        self.tilt = np.zeros(count, dtype=np.float32)
+        self.spin_phase = np.zeros(count, dtype=np.float32)
+        self.spin_rate = np.zeros(count, dtype=np.float32)
+        self.bounce = np.zeros((count, max_bounces, 2), dtype=np.float32)
+        self.has_emissive = np.zeros(count, dtype=bool)
+        self.emissive = np.zeros((count, 3), dtype=np.float32)
+        self.glow_group = np.full(count, -1, dtype=np.int16)
+
+        for i, props in enumerate(props_list):
+            self.rotation[i] = _ROTATIONS[props["rotation"]]
+            self.tilt[i] = props["tilt"]
+            self.spin_phase[i] = props["spin_phase"]
+            self.spin_rate[i] = props["spin_rate"]
+            for j, (amplitude, frequency) in enumerate(props["bounce"]):
+                self.bounce[i, j] = amplitude, frequency
+            if props["emissive"] is not None:
+                self.has_emissive[i] = True
+                self.emissive[i] = props["emissive"]
+            if props["glow"] is not None:
+                self.glow_group[i] = self.glow_index[props["glow"]]
+
+        self.has_spin = bool((self.rotation == ROTATION_SPIN).any())
+        self.animated = self.has_spin or bool(self.bounce[:, :, 0].any())  # frames change with time alone
+
+    def bounce_offsets(self, time_sec):
+        """Y offset of every object at time_sec"""
+        return (self.bounce[:, :, 0] * np.sin(time_sec * self.bounce[:, :, 1])).sum(axis=1)
+
+    def spin_angles(self, time_sec):
+        """Spin angle in degrees of every object at time_sec, as the animated shader computes it"""
+        return self.spin_phase + self.spin_rate * time_sec
+
+    def glow_state(self, now):
+        """(lit flag per glow group, tick of the next glow to go out or None)"""
+        lit = self.glow_until > now
+        return tuple(lit.tolist()), (int(self.glow_until[lit].min()) if lit.any() else None)
+
+    def emissive_state(self, now):
+        """(emissive flags, colors) for every object at tick now; active glows win"""
+        lit = np.append(self.glow_until > now, False)[self.glow_group]
+        colors = np.append(self.glow_colors, np.zeros((1, 3), np.float32), axis=0)[self.glow_group]
+        return self.has_emissive | lit, np.where(lit[:, None], colors, self.emissive)
@@ -0,0 +1,163 @@
+import ctypes
+from OpenGL.GL import *
+import glm
+import numpy as np
+
+
+class GLState:
+    """Shadow copy of bound GL state.
+
+    Every bind and uniform set goes through here so calls that would not
+    change anything are skipped. Uniform locations are resolved once per
+    program. issued/skipped count state changes since begin_frame().
+    """
+    def __init__(self):
+        self.program = None
+        self.vao = None
+        self.active_unit = None
+        self.textures = {}    # (unit, target) -> texture id
+        self.uniforms = {}    # (program, location) -> last value
+        self._locations = {}  # program -> {name: location}
+        self.issued = 0
+        self.skipped = 0
+        self.draws = 0
+
+    def begin_frame(self):
+        self.issued = self.skipped = self.draws = 0
+
+    def invalidate(self):
+        """Forget bound state after GL calls made behind our back (uniform values survive)"""
+        self.program = self.vao = self.active_unit = None
+        self.textures.clear()
+
+    def add_program(self, program):
+        """Take the uniform locations a shader_manager.Program introspected at link time"""
+        self._locations.setdefault(program.id, {}).update(program.uniforms)
+
+    def location(self, program, name):
+        locations = self._locations.setdefault(program, {})
+        if name not in locations:
+            locations[name] = glGetUniformLocation(program, name)
+        return locations[name]
+
+    def use_program(self, program):
+        if self.program == program:
+            self.skipped += 1
+            return
+        glUseProgram(program)
+        self.program = program
+        self.issued += 1
+
+    def bind_vertex_array(self, vao):
+        if self.vao == vao:
+            self.skipped += 1
+            return
+        glBindVertexArray(vao)
+        self.vao = vao
+        self.issued += 1
+
+    def bind_texture(self, unit, target, texture_id):
+        if self.textures.get((unit, target)) == texture_id:
+            self.skipped += 1
+            return
+        if self.active_unit != unit:
+            glActiveTexture(GL_TEXTURE0 + unit)
+            self.active_unit = unit
+        glBindTexture(target, texture_id)
+        self.textures[(unit, target)] = texture_id
+        self.issued += 1
+
+    def set_uniform(self, name, value):
+        """Set a uniform on the current program; int/bool, float, glm vec2/vec3/vec4/mat4"""
+        loc = self.location(self.program, name)
+        if loc == -1:
+            return
+        key = (self.program, loc)
+        if key in self.uniforms and self.uniforms[key] == value:
+            self.skipped += 1
+            return
+
+        if isinstance(value, (bool, int)):
+            glUniform1i(loc, int(value))
+        elif isinstance(value, float):
+            glUniform1f(loc, value)
+        elif isinstance(value, glm.mat4):
+            glUniformMatrix4fv(loc, 1, GL_FALSE, glm.value_ptr(value))
+        elif isinstance(value, glm.vec2):
+            glUniform2fv(loc, 1, glm.value_ptr(value))
+        elif isinstance(value, glm.vec3):
+            glUniform3fv(loc, 1, glm.value_ptr(value))
+        elif isinstance(value, glm.vec4):
+            glUniform4fv(loc, 1, glm.value_ptr(value))
+        else:
+            raise TypeError(f"Unsupported uniform type for {name}: {type(value).__name__}")
+        # glm values are mutable, keep a private copy for comparison
+        self.uniforms[key] = type(value)(value)
+        self.issued += 1
+
+
+_INDEX_SIZES = {GL_UNSIGNED_BYTE: 1, GL_UNSIGNED_SHORT: 2, GL_UNSIGNED_INT: 4}
+
+
+def _multi_draw(ranges, index_type):
+    firsts, counts = np.array(ranges, dtype=np.int64).T
+    offsets = (firsts * _INDEX_SIZES[index_type]).astype(np.uintp)
+    glMultiDrawElements(GL_TRIANGLES, counts.astype(np.int32), index_type, offsets, len(ranges))
+
+
+class DrawItem:
+    __slots__ = ("program", "textures", "depth", "vao", "count", "index_type", "uniforms", "ranges", "instances")
+
+    def __init__(self, program, textures, depth, vao, count, index_type, uniforms, ranges=None, instances=None):
+        self.program = program
+        self.textures = textures
+        self.depth = depth
+        self.vao = vao
+        self.count = count
+        self.index_type = index_type
+        self.uniforms = uniforms
+        self.ranges = ranges
+        self.instances = instances
+
+    def sort_key(self):
+        return (self.program, self.textures, self.depth)
+
+
+class RenderQueue:
+    """Collects a frame's indexed draws and issues them sorted by program,
+    texture set and depth (front to back), through a GLState."""
+    def __init__(self):
+        self.items = []
+
+    def submit(self, program, vao, count, textures=(), uniforms=None, depth=0.0, index_type=GL_UNSIGNED_INT,
+               ranges=None, instances=None):
+        """Queue glDrawElements(GL_TRIANGLES, count, index_type) on vao.
+
+        textures is a sequence of (unit, target, texture id); uniforms maps
+        uniform names to values for program. ranges, a list of (first index,
+        index count), draws just those spans with glMultiDrawElements instead.
+        With instances, the (single) span is drawn that many times with
+        glDrawElementsInstanced.
+        """
+        self.items.append(DrawItem(program, tuple(sorted(textures)), depth, vao, count,
+                                   index_type, uniforms or {}, ranges, instances))
+
+    def flush(self, state):
+        self.items.sort(key=DrawItem.sort_key)
+        for item in self.items:
+            state.use_program(item.program)
+            for unit, target, texture_id in item.textures:
+                state.bind_texture(unit, target, texture_id)
+            for name, value in item.uniforms.items():
+                state.set_uniform(name, value)
+            state.bind_vertex_array(item.vao)
+            if item.instances is not None:
+                first, count = item.ranges[0] if item.ranges else (0, item.count)
+                glDrawElementsInstanced(GL_TRIANGLES, count, item.index_type,
+                                        ctypes.c_void_p(first * _INDEX_SIZES[item.index_type]), item.instances)
+            elif item.ranges is None:
+                glDrawElements(GL_TRIANGLES, item.count, item.index_type, None)
+            else:
+                _multi_draw(item.ranges, item.index_type)
+            state.draws += 1
+        self.items.clear()
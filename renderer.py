@@ -0,0 +1,532 @@
+import ctypes
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from OpenGL.GL import *
+import glm
+import numpy as np
+import config
+from asset_pipeline import load_scene
+from texture_loader import TextureManager
+from batching import StaticBatch, array_levels, array_textures, layer_sources
+from culling import scene_culler
+from lod import LODSelector
+from render_props import ROTATION_SPIN, RenderTable, is_static, load_manifest, resolve_properties
+from shader import PROGRAM_SOURCES
+from shader_manager import ShaderManager
+from gpu_animation import GPUAnimator
+from instancing import InstancedMesh, find_instance_groups
+from render_queue import GLState, RenderQueue
+from scene_streamer import SceneStreamer
+from picking import PickTarget, ScenePicker, ray_from_screen
+from profiler import FrameProfiler
+from static_layer import StaticLayer
+from dynamic_resolution import GPUFrameTimer, ResolutionScaler, SceneTarget
+
+
+class Renderer:
+    """Background, scene objects and every GL resource needed to draw a frame.
+
+    Needs a current GL context but no window or input, so main() and the
+    benchmark drive the same code. timings holds the seconds spent in each
+    load phase. Frame phases are timed by profiler (off unless given one
+    that is enabled). With progressive loading the constructor returns as
+    soon as the background and shaders are up, and stream() adds objects
+    frame by frame.
+    """
+    def __init__(self, display, folder="materials", pack_path=config.SCENE_PACK_PATH, profiler=None,
+                 progressive=config.PROGRESSIVE_LOADING):
+        self.display = display
+        self.profiler = profiler or FrameProfiler(enabled=False)
+        self.timings = {}
+        phase_start = time.perf_counter()
+
+        def phase(name):
+            nonlocal phase_start
+            now = time.perf_counter()
+            self.timings[name] = now - phase_start
+            phase_start = now
+
+        # Enable depth test for proper 3D rendering
+        glEnable(GL_DEPTH_TEST)
+
+        # Load background image and create OpenGL texture for it
+        bg_surface = pygame.image.load("source/image.jpg")
+        bg_width, bg_height = bg_surface.get_size()
+        bg_data = pygame.image.tostring(bg_surface, "RGBA", True)
+
+        self.bg_texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.bg_texture)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, bg_width, bg_height, 0, GL_RGBA, GL_UNSIGNED_BYTE, bg_data)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+        # Setup fullscreen quad vertices (positions + texture coords)
+        quad_vertices = np.array([
+            -1.0,  1.0,    0.0, 1.0,
+            -1.0, -1.0,    0.0, 0.0,
+             1.0, -1.0,    1.0, 0.0,
+            -1.0,  1.0,    0.0, 1.0,
+             1.0, -1.0,    1.0, 0.0,
+             1.0,  1.0,    1.0, 1.0
+        ], dtype=np.float32)
+
+        self.bg_VAO = glGenVertexArrays(1)
+        self.bg_VBO = glGenBuffers(1)
+
+        glBindVertexArray(self.bg_VAO)
+        glBindBuffer(GL_ARRAY_BUFFER, self.bg_VBO)
+        glBufferData(GL_ARRAY_BUFFER, quad_vertices.nbytes, quad_vertices, GL_STATIC_DRAW)
+
+        # Vertex attribute 0 -> position (vec2)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 4 * quad_vertices.itemsize, ctypes.c_void_p(0))
+
+        # Vertex attribute 1 -> texture coordinates (vec2)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, 4 * quad_vertices.itemsize, ctypes.c_void_p(2 * quad_vertices.itemsize))
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        phase("background")
+
+        # Every program in one batch, from the binary cache when the driver allows
+        self.shaders = ShaderManager(config.SHADER_CACHE_DIR, config.SHADER_CACHE)
+        optional = {"animated": config.GPU_ANIMATION, "composite": config.STATIC_LAYER_CACHE,
+                    "instanced": config.INSTANCING, "upscale": config.DYNAMIC_RESOLUTION}
+        sources = {name: src for name, src in PROGRAM_SOURCES.items() if optional.get(name, True)}
+        programs = self.shaders.load(sources)
+        self.bg_shader_program = programs["background"].id
+        self.shader_program = programs["object"].id
+        self.static_shader_program = programs["static"].id
+        self.animated_shader_program = programs["animated"].id if config.GPU_ANIMATION else None
+        self.instanced_shader_program = programs["instanced"].id if config.INSTANCING else None
+        phase("shaders")
+        # All binds and uniform sets go through a shadow state; draws through a sorted queue
+        self.gl_state = gl_state = GLState()
+        for program in programs.values():
+            gl_state.add_program(program)
+        self.render_queue = RenderQueue()
+        self.texture_manager = TextureManager(config.TEXTURE_BUDGET_BYTES, gl_state)
+        self.manifest = load_manifest(config.SCENE_MANIFEST)
+        # Progressive loading: objects arrive through stream(), frames are drawn meanwhile
+        self.streamer = None
+        if progressive:
+            self.streamer = SceneStreamer(folder, self.manifest, config.LOADER_WORKERS, pack_path)
+            objects = []
+        else:
+            objects = load_scene(folder, self.texture_manager, config.LOADER_WORKERS, pack_path)
+        phase("scene")
+
+        # Resolve bounce/rotation/glow properties once from the manifest and headers
+        for obj in objects:
+            obj.props = resolve_properties(obj.name, obj.header, self.manifest)
+        self.objects = []
+        self.static_batch = None
+        self.instanced = []
+        self.animator = None
+        self.pending_batch = None  # (instance groups, static batch layers future) after streaming
+        self.scene_version = 0
+        self._set_scene(objects, batch=not progressive)
+        phase("batching")
+
+        # Setup projection and initial camera view matrices
+        self.projection = glm.perspective(glm.radians(config.FOV), display[0] / display[1], config.NEAR_PLANE, config.FAR_PLANE)
+        view = glm.lookAt(config.CAMERA_POS, config.CAMERA_TARGET, config.CAMERA_UP)
+
+        # Set projection and view matrices once initially
+        gl_state.use_program(self.shader_program)
+        gl_state.set_uniform("projection", self.projection)
+        gl_state.set_uniform("view", view)
+
+        # Static batch and instancing programs share the projection; their samplers stay on unit 0
+        self.static_programs = [p for p in (self.static_shader_program, self.instanced_shader_program) if p]
+        for program in self.static_programs:
+            gl_state.use_program(program)
+            gl_state.set_uniform("projection", self.projection)
+
+        # Optional GPU animation: bounce, spin and glow evaluated in the vertex shader
+        if config.GPU_ANIMATION:
+            gl_state.use_program(self.animated_shader_program)
+            gl_state.set_uniform("projection", self.projection)
+        self.object_program = self.animated_shader_program if config.GPU_ANIMATION else self.shader_program
+
+        # Background and static props drawn once per camera pose, then reused
+        self.static_layer = None
+        if config.STATIC_LAYER_CACHE:
+            self.static_layer = StaticLayer(display, programs["composite"].id, self.bg_VAO, gl_state)
+        # Optional dynamic resolution: the 3D pass is drawn smaller when the GPU misses the frame budget
+        self.scene_target = None
+        self.resolution_scale = 1.0
+        if config.DYNAMIC_RESOLUTION:
+            self.scene_target = SceneTarget(display, programs["upscale"].id, self.bg_VAO, gl_state)
+            self.frame_timer = GPUFrameTimer()
+            self.scaler = ResolutionScaler(config.FRAME_BUDGET_MS, config.DYNAMIC_RESOLUTION_MIN_SCALE)
+        phase("programs")
+
+        self.visible = None
+
+    def _instance_groups(self, objects):
+        if not config.INSTANCING:
+            return []
+        return find_instance_groups(objects, self.manifest.get("instances", []), self.texture_manager,
+                                    config.INSTANCE_TOLERANCE)
+
+    def _set_scene(self, objects, batch, levels=None, groups=None):
+        """(Re)build everything indexed by object for objects (props resolved).
+
+        With batch, repeated static meshes become InstancedMeshes (groups,
+        if already found) and the other static props are merged into the
+        static batch (with texture layers levels, if already prepared);
+        until then they are drawn one by one. Render table, culling, LOD and
+        GPU animation are rebuilt from scratch, which is cheap next to uploads.
+        """
+        gl_state = self.gl_state
+        if batch:
+            # Repeated static meshes are stored once and drawn instanced
+            groups = self._instance_groups(objects) if groups is None else groups
+            self.instanced = [InstancedMesh(group) for group in groups]
+            grouped = {id(obj) for group in groups for obj in group.objects}
+            objects = [obj for obj in objects if id(obj) not in grouped]
+        # Merge the other static props into one batch drawn with a single call
+        if batch and config.STATIC_BATCHING:
+            static_objects = [obj for obj in objects if is_static(obj.props)]
+            if static_objects:
+                self.static_batch = StaticBatch(static_objects, levels)
+                objects = [obj for obj in objects if not is_static(obj.props)]
+        self.objects = objects
+        self.static_mask = [is_static(obj.props) for obj in objects]  # unbatched static props
+        glow_until = self.render_table.glow_until if self.scene_version else None
+        self.render_table = RenderTable([obj.props for obj in objects], self.manifest)
+        if glow_until is not None:
+            self.render_table.glow_until[:] = glow_until
+        # Tilt of each spinning object (None for objects following the camera)
+        self.spin_bases = [glm.rotate(glm.mat4(1.0), glm.radians(tilt), glm.vec3(1, 0, 0)) if rotation == ROTATION_SPIN else None
+                           for rotation, tilt in zip(self.render_table.rotation.tolist(), self.render_table.tilt.tolist())]
+        gl_state.invalidate()  # loading bound buffers and textures directly
+
+        # Frustum culling over the animated objects, then the batch members, then every instance
+        static_items = (self.static_batch.objects if self.static_batch else []) + \
+            [item for mesh in self.instanced for item in mesh.items]
+        self.culler = None
+        if config.FRUSTUM_CULLING:
+            self.culler = scene_culler(objects + static_items, self.spin_bases + [None] * len(static_items),
+                                       config.CULL_LEAF_SIZE)
+
+        # LOD levels (materials/lod/, built by mesh_simplify.py) picked by screen size, same item order
+        self.lod_selector = None
+        if config.LOD:
+            self.lod_selector = LODSelector(objects + static_items, self.spin_bases + [None] * len(static_items),
+                                            config.LOD_SCREEN_SIZES, config.LOD_HYSTERESIS)
+
+        # Mouse picking over the same objects, batch members and instances
+        self.picker = ScenePicker(self._pick_targets(objects)) if config.PICKING else None
+
+        if self.animator:
+            self.animator.delete()
+            self.animator = None
+        if config.GPU_ANIMATION and objects:
+            self.animator = GPUAnimator(objects, self.render_table, self.animated_shader_program, gl_state)
+        self.scene_version += 1
+
+    def _pick_targets(self, objects):
+        """PickTargets of objects (with their bounce and spin), the batch members, then every instance"""
+        targets = [PickTarget(obj.name, obj.props, obj.bvh, grow=sum(abs(a) for a, _ in obj.props["bounce"]),
+                              spins=base is not None) for obj, base in zip(objects, self.spin_bases)]
+        if self.static_batch:
+            targets += [PickTarget(obj.name, obj.props, obj.bvh) for obj in self.static_batch.objects]
+        for mesh in self.instanced:
+            targets += [PickTarget(item.name, item.props, mesh.bvh, transform)
+                        for item, transform in zip(mesh.items, mesh.transforms)]
+        return targets
+
+    def stream(self, budget_bytes=config.UPLOAD_BUDGET_BYTES):
+        """Upload the next streamed objects, at most about budget_bytes; True once the scene is complete.
+
+        Call once per frame before render(). When the last object has
+        arrived, the static batch's texture layers are resized on a worker
+        thread, and the batch and instanced meshes replace the single
+        static props once they are.
+        """
+        streamer = self.streamer
+        if streamer is not None:
+            added = streamer.upload(self.texture_manager, budget_bytes)
+            for obj in added:
+                obj.props = resolve_properties(obj.name, obj.header, self.manifest)
+            if added:
+                self._set_scene(self.objects + added, batch=False)
+            if streamer.finished:
+                self.streamer = None
+                print(f"Streamed {streamer.loaded} objects ({streamer.uploaded_bytes / 2 ** 20:.1f} MiB) "
+                      f"in {time.perf_counter() - streamer.start:.2f}s")
+                if streamer.error is not None:
+                    print(f"Streaming stopped after {streamer.loaded} of {streamer.total} objects: {streamer.error!r}")
+                groups = self._instance_groups(self.objects)
+                grouped = {id(obj) for group in groups for obj in group.objects}
+                batch_objects = [obj for obj in self.objects if is_static(obj.props) and id(obj) not in grouped]
+                layers = None
+                if config.STATIC_BATCHING and batch_objects:
+                    pool = ThreadPoolExecutor(1)
+                    # Handles are read here, on the GL thread; the worker only gets paths and sizes
+                    layers = pool.submit(array_levels, [layer_sources(textures)
+                                                        for textures in array_textures(batch_objects)])
+                    pool.shutdown(wait=False)
+                self.pending_batch = (groups, layers)
+        if self.pending_batch is not None:
+            groups, layers = self.pending_batch
+            if layers is None or layers.done():
+                self.pending_batch = None
+                self._set_scene(self.objects, batch=True, levels=layers.result() if layers else None, groups=groups)
+        return self.streamer is None and self.pending_batch is None
+
+    @property
+    def animated(self):
+        """Whether some object bounces or spins, so the picture changes with time alone"""
+        return self.render_table.animated
+
+    def trigger_glow(self, name, now):
+        """Light glow group name for 1.5 seconds from tick now"""
+        render_table = self.render_table
+        if name in render_table.glow_index:
+            render_table.glow_until[render_table.glow_index[name]] = now + 1500
+            if self.animator:
+                self.animator.update_glow(self.gl_state)
+
+    def render(self, camera_distance, rot_x, rot_y, now):
+        """Draw one frame for the camera at simulation time now (milliseconds).
+
+        Everything animated is a function of now, so any time between two
+        simulation steps can be drawn.
+        """
+        gl_state = self.gl_state
+        render_queue = self.render_queue
+        objects = self.objects
+        object_program = self.object_program
+        projection = self.projection
+        profiler = self.profiler
+
+        gl_state.begin_frame()
+        self.texture_manager.begin_frame()
+        static_layer = self.static_layer
+        scene_target = self.scene_target
+
+        # The scale follows the GPU time of a frame a few frames back
+        if scene_target:
+            self.resolution_scale = self.scaler.update(self.frame_timer.begin())
+            scene_target.begin(self.resolution_scale)
+
+        # === RENDER BACKGROUND ===
+        # With dynamic resolution it goes under the upscaled scene at full resolution
+        if not static_layer and not scene_target:
+            with profiler.section("background", gpu=True):
+                glClear(GL_COLOR_BUFFER_BIT)
+                self._draw_background()
+
+        # === RENDER 3D SCENE ===
+        with profiler.section("matrices"):
+            glEnable(GL_DEPTH_TEST)
+
+            # Update camera view matrix based on current position and rotation
+            view, scene_rotation = self._camera(camera_distance, rot_x, rot_y)
+
+            for program in (object_program, *self.static_programs):
+                gl_state.use_program(program)
+                gl_state.set_uniform("view", view)
+
+            time_sec = now / 1000.0
+
+        with profiler.section("culling"):
+            # Skip whatever is outside the view frustum
+            visible = self.culler.cull(projection * view, scene_rotation).tolist() if self.culler else None
+            object_visible = visible[:len(objects)] if visible else [True] * len(objects)
+            batch_visible = visible[len(objects):] if visible else None
+            self.visible = visible
+            # Coarser LOD levels for objects that are small on screen
+            batch_lods = None
+            if self.lod_selector:
+                levels = self.lod_selector.select(projection, view, scene_rotation).tolist()
+                for obj, level in zip(objects, levels):
+                    obj.lod = level
+                batch_lods = levels[len(objects):]
+
+        if static_layer:
+            # Only the camera moves static props, so the layer is redrawn when the camera moved
+            # or the scene gained objects
+            key = (camera_distance, rot_x, rot_y, self.scene_version, self.resolution_scale)
+            if not static_layer.is_current(key):
+                with profiler.section("static layer", gpu=True):
+                    static_layer.begin(key, scene_target.viewport if scene_target else None)
+                    glClear(GL_COLOR_BUFFER_BIT)
+                    if not scene_target:
+                        self._draw_background()
+                    glEnable(GL_DEPTH_TEST)
+                    glClear(GL_DEPTH_BUFFER_BIT)
+                    self._submit_objects(view, scene_rotation,
+                                         [v and s for v, s in zip(object_visible, self.static_mask)], time_sec, now)
+                    self._submit_static(scene_rotation, batch_visible, batch_lods)
+                    render_queue.flush(gl_state)
+                    static_layer.end()
+                    if scene_target:
+                        scene_target.bind()
+            with profiler.section("composite", gpu=True):
+                static_layer.composite()
+            object_visible = [v and not s for v, s in zip(object_visible, self.static_mask)]
+        else:
+            glClear(GL_DEPTH_BUFFER_BIT)
+
+        with profiler.section("submit"):
+            self._submit_objects(view, scene_rotation, object_visible, time_sec, now)
+
+            # Static props share the scene rotation and never bounce: one draw call each for batch and instances
+            if not static_layer:
+                self._submit_static(scene_rotation, batch_visible, batch_lods)
+
+        # Issue the frame's draws sorted by program, textures and depth
+        with profiler.section("draw", gpu=True):
+            render_queue.flush(gl_state)
+
+        if scene_target:
+            with profiler.section("upscale", gpu=True):
+                scene_target.end()
+                glClear(GL_COLOR_BUFFER_BIT)
+                self._draw_background()
+                scene_target.upscale(config.UPSCALE_SHARPNESS)
+            self.frame_timer.end()
+
+    def _camera(self, camera_distance, rot_x, rot_y):
+        """(view, scene rotation) of a camera pose"""
+        view = glm.lookAt(glm.vec3(0, camera_distance, 0), config.CAMERA_TARGET, config.CAMERA_UP)
+        scene_rotation = glm.mat4(1.0)
+        scene_rotation = glm.rotate(scene_rotation, glm.radians(rot_x), glm.vec3(1, 0, 0))
+        scene_rotation = glm.rotate(scene_rotation, glm.radians(rot_y), glm.vec3(0, 1, 0))
+        return view, scene_rotation
+
+    def _object_model(self, i, scene_rotation, bounce_offsets, spin_angles):
+        """Model matrix of object i, without dequantize"""
+        # Spinning objects (spw_gradient) turn in place instead of following the camera
+        if self.spin_bases[i] is not None:
+            model_matrix = glm.rotate(self.spin_bases[i], glm.radians(spin_angles[i]), glm.vec3(0, 1, 0))
+        else:
+            model_matrix = scene_rotation
+
+        # Bounce along the object's local Y axis
+        if bounce_offsets[i]:
+            model_matrix = glm.translate(model_matrix, glm.vec3(0, bounce_offsets[i], 0))
+        return model_matrix
+
+    def pick(self, x, y, camera_distance, rot_x, rot_y, now):
+        """PickTarget (name, props) of the nearest triangle under window pixel (x, y) at time now, or None"""
+        if not self.picker:
+            return None
+        view, scene_rotation = self._camera(camera_distance, rot_x, rot_y)
+        origin, direction = ray_from_screen(x, y, self.display, self.projection, view)
+        time_sec = now / 1000.0
+        bounce_offsets = self.render_table.bounce_offsets(time_sec).tolist()
+        spin_angles = self.render_table.spin_angles(time_sec).tolist()
+        count = len(self.objects)
+        targets = self.picker.targets
+
+        def model_of(i):
+            if i < count:
+                return np.array(self._object_model(i, scene_rotation, bounce_offsets, spin_angles))
+            return np.array(scene_rotation) @ targets[i].base
+
+        hit = self.picker.pick(origin, direction, scene_rotation, model_of)
+        return targets[hit[0]] if hit else None
+
+    def _submit_static(self, scene_rotation, visible, lods):
+        """Queue the static batch and the instanced meshes; visible and lods cover their items in culler order"""
+        uniforms = {"model": scene_rotation}
+        first = 0
+        if self.static_batch:
+            first = len(self.static_batch.objects)
+            self.static_batch.submit(self.render_queue, self.static_shader_program, uniforms,
+                                     visible=visible[:first] if visible else None, lods=lods[:first] if lods else None)
+        for mesh in self.instanced:
+            last = first + mesh.count
+            mesh.submit(self.render_queue, self.instanced_shader_program, uniforms,
+                        visible=visible[first:last] if visible else None, lods=lods[first:last] if lods else None)
+            first = last
+
+    def _draw_background(self):
+        """Fullscreen background quad, without depth test"""
+        gl_state = self.gl_state
+        glDisable(GL_DEPTH_TEST)
+        gl_state.use_program(self.bg_shader_program)
+        gl_state.bind_vertex_array(self.bg_VAO)
+        gl_state.bind_texture(0, GL_TEXTURE_2D, self.bg_texture)
+        gl_state.set_uniform("backgroundTexture", 0)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        gl_state.draws += 1
+
+    def _submit_objects(self, view, scene_rotation, object_visible, time_sec, now):
+        """Queue the animated objects, with their per-object matrices unless the GPU animates them"""
+        gl_state = self.gl_state
+        render_queue = self.render_queue
+        objects = self.objects
+        render_table = self.render_table
+        object_program = self.object_program
+
+        if self.animator:
+            # Only the camera and the clock go up; the shader animates every object
+            gl_state.use_program(object_program)
+            gl_state.set_uniform("sceneRotation", scene_rotation)
+            gl_state.set_uniform("time", time_sec)
+            for obj, shown in zip(objects, object_visible):
+                if shown:
+                    obj.submit(render_queue, object_program, config.TEXTURE_UNITS, {"dequantize": obj.dequantize})
+            return
+
+        # Per-object bounce and glow for the whole frame, straight from the render table
+        bounce_offsets = render_table.bounce_offsets(time_sec).tolist()
+        emissive_flags, emissive_colors = render_table.emissive_state(now)
+        emissive_flags = emissive_flags.tolist()
+        emissive_colors = emissive_colors.tolist()
+        spin_angles = render_table.spin_angles(time_sec).tolist() if render_table.has_spin else None
+
+        # Queue each object with rotation and glow logic
+        for i, obj in enumerate(objects):
+            if not object_visible[i]:
+                continue
+            model_matrix = self._object_model(i, scene_rotation, bounce_offsets, spin_angles)
+
+            # Compact vertices are decoded by the model matrix too
+            uniforms = {"model": model_matrix * obj.dequantize, "emissiveGlow": emissive_flags[i],
+                        "emissiveColor": glm.vec3(emissive_colors[i])}
+            depth = -(view * model_matrix * glm.vec4(obj.center, 1.0)).z
+            obj.submit(render_queue, self.shader_program, config.TEXTURE_UNITS, uniforms, depth)
+
+    def stats(self):
+        """Counters of the last frame, for the window title or a report"""
+        gl_state = self.gl_state
+        return (f"{gl_state.draws} draws, {gl_state.issued} state changes, {gl_state.skipped} skipped"
+                + (f", {self.culler.visible} drawn, {self.culler.culled} culled" if self.culler else "")
+                + (f", {self.lod_selector.triangles(self.visible)} triangles" if self.lod_selector else "")
+                + (f", {100 * self.resolution_scale:.0f}% resolution" if self.scene_target else ""))
+
+    def delete(self):
+        """Free every GL resource; the context must still be current"""
+        for obj in self.objects:
+            obj.delete()
+        if self.static_batch:
+            self.static_batch.delete()
+        for mesh in self.instanced:
+            mesh.delete()
+        if self.static_layer:
+            self.static_layer.delete()
+        if self.scene_target:
+            self.scene_target.delete()
+            self.frame_timer.delete()
+        if self.animator:
+            self.animator.delete()
+        self.texture_manager.clear()
+
+        glDeleteVertexArrays(1, [self.bg_VAO])
+        glDeleteBuffers(1, [self.bg_VBO])
+        glDeleteTextures(1, [self.bg_texture])
+
+        self.shaders.delete()
+        self.profiler.delete()
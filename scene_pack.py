@@ -0,0 +1,253 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from functools import partial
+import numpy as np
+import config
+from asset_cache import rewrite_table, source_stamp, stamp_is_current
+from mesh_format import VERTEX_COMPONENTS, compact_indices, lod_path
+from model_loader import SceneObject, load_textures
+from picking import load_mesh_with_bvh, mesh_bvh
+from vertex_format import COMPACT_DTYPE, CompactVertices, quantize_vertices
+
+# Pack layout:
+#   [header]  magic, version, object count, table offset, table size
+#   [blocks]  per object: float32 or compact (vertex_format) vertex block,
+#             uint8/16/32 index block per LOD level, picking BVH bounds,
+#             nodes and triangle order blocks (16-byte aligned)
+#   [table]   JSON offset table: per-object name/header/offsets, source stamps
+#             and the kind of sources ("txt" files or an "obj" + mtl pair)
+PACK_MAGIC = b"G1SCNPK\0"
+PACK_VERSION = 6
+_HEADER = struct.Struct("<8sIIQQ")
+_ALIGN = 16
+
+
+def txt_sources(folder_path):
+    """Sorted list of materials/*.txt files that make up a scene."""
+    return sorted(os.path.join(folder_path, f) for f in os.listdir(folder_path) if f.endswith(".txt"))
+
+
+def scene_sources(folder_path):
+    """txt_sources plus the LOD sidecars that exist for them."""
+    sources = txt_sources(folder_path)
+    return sources + [lod_path(p) for p in sources if os.path.exists(lod_path(p))]
+
+
+def write_scene_pack(pack_path, meshes, sources, compact=config.COMPACT_VERTICES, picking=config.PICKING, kind="txt"):
+    """Write meshes [(name, header, vertices, indices, lods[, bvh])] to a pack file.
+
+    sources are the files the meshes came from; their mtime/size/hash are
+    stored so the pack can be rebuilt when any of them changes, and kind
+    says how to rebuild it (see update_scene_pack). With
+    compact, vertices are stored quantized, ready for upload as they are.
+    With picking, each mesh's BVH arrays (picking.build_bvh) are stored
+    too, built here unless the mesh tuple brings them.
+    """
+    os.makedirs(os.path.dirname(pack_path) or ".", exist_ok=True)
+    tmp_path = pack_path + ".tmp"
+    table = {"objects": [], "sources": [source_stamp(p) for p in sources], "kind": kind,
+             "compact": compact, "picking": picking}
+
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+
+        def write_block(array):
+            pad = -f.tell() % _ALIGN
+            f.write(b"\0" * pad)
+            offset = f.tell()
+            f.write(np.ascontiguousarray(array).tobytes())
+            return offset
+
+        for name, header, vertices, indices, lods, *bvh in meshes:
+            vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)
+            indices = compact_indices(np.asarray(indices).reshape(-1), len(vertices))
+            lods = [compact_indices(np.asarray(lod).reshape(-1), len(vertices)) for lod in lods]
+            entry = {"name": name, "header": dict(header)}
+            if compact:
+                quantized = quantize_vertices(vertices)
+                entry.update(vertex_offset=write_block(quantized.data), vertex_count=len(vertices),
+                             quantization=quantized.params())
+            else:
+                entry.update(vertex_offset=write_block(vertices), vertex_count=int(vertices.size))
+            entry.update(index_offset=write_block(indices), index_count=int(indices.size),
+                         index_type=indices.dtype.name,
+                         lods=[{"offset": write_block(lod), "count": int(lod.size)} for lod in lods])
+            if picking:
+                bounds, nodes, order = bvh[0] if bvh and bvh[0] is not None else mesh_bvh(vertices, indices).arrays()
+                entry["bvh"] = {"nodes": len(nodes), "width": nodes.shape[1], "bounds_offset": write_block(bounds),
+                                "nodes_offset": write_block(nodes), "order_offset": write_block(order)}
+            table["objects"].append(entry)
+
+        table_bytes = json.dumps(table).encode("utf-8")
+        table_offset = f.tell()
+        f.write(table_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(table["objects"]), table_offset, len(table_bytes)))
+
+    os.replace(tmp_path, pack_path)
+    print(f"Saved: {pack_path} ({len(table['objects'])} objects)")
+
+
+def build_scene_pack(folder_path, pack_path, map_fn=map):
+    """Compile every materials/*.txt file in folder_path into one pack.
+
+    map_fn lets callers parse the sources in parallel, e.g. a pool's map.
+    """
+    meshes = list(map_fn(partial(load_mesh_with_bvh, build=config.PICKING), txt_sources(folder_path)))
+    write_scene_pack(pack_path, meshes, scene_sources(folder_path))
+
+
+def build_scene_pack_from_obj(obj_path, mtl_path, pack_path, optimize=True, lods=True, workers=1):
+    """Compile an OBJ/MTL export straight into a pack, skipping the txt step.
+
+    optimize and workers are passed to extractmtl.load_obj_meshes; with
+    lods, meshes big enough get their LOD levels built here.
+    """
+    from extractmtl import load_obj_meshes
+    from mesh_simplify import MIN_LOD_TRIANGLES, build_lods
+    meshes = ((name, header, vertices, indices,
+               build_lods(vertices, indices) if lods and len(indices) // 3 >= MIN_LOD_TRIANGLES else [])
+              for name, header, vertices, indices in load_obj_meshes(obj_path, mtl_path, optimize, workers))
+    write_scene_pack(pack_path, meshes, [obj_path, mtl_path], kind="obj")
+
+
+def _read_table(mm):
+    magic, version, count, table_offset, table_size = _HEADER.unpack_from(mm, 0)
+    if magic != PACK_MAGIC or version != PACK_VERSION:
+        return None
+    return json.loads(mm[table_offset:table_offset + table_size])
+
+
+def _load_table(pack_path):
+    """(table, object count, table offset) of pack_path, or None if it is missing or unreadable"""
+    if not os.path.exists(pack_path):
+        return None
+    try:
+        with open(pack_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            table = _read_table(mm)
+            if table is None:
+                return None
+            _, _, count, table_offset, _ = _HEADER.unpack_from(mm, 0)
+    except (OSError, ValueError, struct.error):
+        return None
+    return table, count, table_offset
+
+
+def _table_is_current(pack_path, loaded, sources):
+    table, count, table_offset = loaded
+    if table.get("compact", False) != config.COMPACT_VERTICES or table.get("picking", False) != config.PICKING:
+        return False
+    recorded = table["sources"]
+    if [s["path"] for s in recorded] != list(sources):
+        return False
+    mtimes = [stamp["mtime_ns"] for stamp in recorded]
+    if not all(stamp_is_current(stamp) for stamp in recorded):
+        return False
+    # Touched but unchanged sources: store their new mtimes so they are not hashed on every launch
+    if mtimes != [stamp["mtime_ns"] for stamp in recorded]:
+        rewrite_table(pack_path, _HEADER, (PACK_MAGIC, PACK_VERSION, count), table_offset, table)
+    return True
+
+
+def pack_is_current(pack_path, sources):
+    """True if pack_path exists and was built from exactly these unchanged sources."""
+    loaded = _load_table(pack_path)
+    return loaded is not None and _table_is_current(pack_path, loaded, sources)
+
+
+def update_scene_pack(folder_path, pack_path, map_fn=map):
+    """Rebuild pack_path if it is missing or any of its sources changed.
+
+    A pack made by build_scene_pack_from_obj stays an OBJ pack: it is
+    checked against, and rebuilt from, the OBJ/MTL pair it records. Any
+    other pack, or an OBJ pack whose sources are gone, is built from the
+    txt files in folder_path (map_fn as in build_scene_pack).
+    """
+    loaded = _load_table(pack_path)
+    if loaded is not None and loaded[0].get("kind") == "obj":
+        sources = [stamp["path"] for stamp in loaded[0]["sources"]]
+        if all(os.path.exists(path) for path in sources):
+            if not _table_is_current(pack_path, loaded, sources):
+                build_scene_pack_from_obj(*sources, pack_path)
+            return
+    if loaded is None or not _table_is_current(pack_path, loaded, scene_sources(folder_path)):
+        build_scene_pack(folder_path, pack_path, map_fn)
+
+
+def scene_mesh_count(folder_path, pack_path=None):
+    """Number of meshes the scene will load, without building anything.
+
+    An OBJ pack (see update_scene_pack) holds its own meshes, so its table
+    is counted; otherwise there is one mesh per txt file in folder_path.
+    """
+    loaded = _load_table(pack_path) if pack_path else None
+    if loaded is not None and loaded[0].get("kind") == "obj":
+        return loaded[1]
+    return len(txt_sources(folder_path))
+
+
+def open_scene_pack(pack_path):
+    """Memory-map a pack and return [(name, header, vertices, indices, lods, bvh)].
+
+    bvh is the (bounds, nodes, order) arrays of picking.build_bvh, or None
+    if the pack was built without picking. vertices (float (N, 5) or
+    CompactVertices), indices and the BVH arrays are read-only
+    NumPy views into the mapping, so they can go straight to glBufferData
+    without any copy. The views keep the mapping
+    alive; it is released once the last one is dropped.
+    """
+    with open(pack_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    table = _read_table(mm)
+    if table is None:
+        raise ValueError(f"{pack_path} is not a version {PACK_VERSION} scene pack")
+
+    meshes = []
+    for entry in table["objects"]:
+        if "quantization" in entry:
+            data = np.frombuffer(mm, dtype=COMPACT_DTYPE, count=entry["vertex_count"], offset=entry["vertex_offset"])
+            vertices = CompactVertices.from_params(data, entry["quantization"])
+        else:
+            vertices = np.frombuffer(mm, dtype=np.float32, count=entry["vertex_count"],
+                                     offset=entry["vertex_offset"]).reshape(-1, VERTEX_COMPONENTS)
+        indices = np.frombuffer(mm, dtype=entry["index_type"], count=entry["index_count"], offset=entry["index_offset"])
+        lods = [np.frombuffer(mm, dtype=entry["index_type"], count=lod["count"], offset=lod["offset"])
+                for lod in entry["lods"]]
+        bvh = None
+        if "bvh" in entry:
+            layout = entry["bvh"]
+            count, width = layout["nodes"], layout["width"]
+            bvh = (np.frombuffer(mm, dtype=np.float32, count=count * 6, offset=layout["bounds_offset"]).reshape(-1, 6),
+                   np.frombuffer(mm, dtype=np.int32, count=count * width,
+                                 offset=layout["nodes_offset"]).reshape(-1, width),
+                   np.frombuffer(mm, dtype=np.uint32, count=entry["index_count"] // 3, offset=layout["order_offset"]))
+        meshes.append((entry["name"], entry["header"], vertices, indices, lods, bvh))
+    return meshes
+
+
+def load_model_from_pack(folder_path, texture_loader, pack_path=config.SCENE_PACK_PATH):
+    """Drop-in replacement for load_model_from_txt backed by a scene pack.
+
+    The pack is (re)built first if it is missing or any source file has
+    changed (see update_scene_pack).
+    """
+    update_scene_pack(folder_path, pack_path)
+
+    objects = []
+    for name, header, vertices, indices, lods, bvh in open_scene_pack(pack_path):
+        textures = load_textures(header, texture_loader)
+        objects.append(SceneObject(name, vertices, indices, textures, header, lods, bvh))
+    return objects
+
+
+# === Run the script ===
+if __name__ == "__main__":
+    # `python scene_pack.py model.obj model.mtl` packs an export directly; the
+    # pack then follows that OBJ/MTL instead of materials/*.txt
+    if len(sys.argv) == 3:
+        build_scene_pack_from_obj(sys.argv[1], sys.argv[2], config.SCENE_PACK_PATH)
+    else:
+        build_scene_pack("materials", config.SCENE_PACK_PATH)
@@ -0,0 +1,154 @@
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from fnmatch import fnmatchcase
+import numpy as np
+import config
+from asset_pipeline import _iter_meshes, worker_count
+from model_loader import SceneObject, texture_paths
+from scene_pack import scene_mesh_count
+from texture_loader import decode_texture, resolve_texture_path
+from vertex_format import CompactVertices
+
+
+def load_priority(name, vertices, load_order, camera_pos):
+    """Sort key of a mesh: its rank in the manifest's load_order, then screen-space importance.
+
+    load_order is a list of fnmatch patterns; names matching none come last.
+    Importance is the bounding radius over the distance to camera_pos,
+    i.e. roughly the size the object will cover on screen.
+    """
+    rank = next((i for i, pattern in enumerate(load_order) if fnmatchcase(name, pattern)), len(load_order))
+    if not len(vertices):
+        return rank, 0.0
+    if isinstance(vertices, CompactVertices):
+        low, high, radius = vertices.bounds()
+        center = (low + high) / 2
+    else:
+        positions = np.asarray(vertices).reshape(-1, vertices.shape[-1])[:, :3]
+        center = (positions.min(axis=0) + positions.max(axis=0)) / 2
+        radius = float(np.sqrt(((positions - center) ** 2).sum(axis=1).max()))
+    distance = max(float(np.linalg.norm(center - np.array(camera_pos))), 1e-6)
+    return rank, -radius / distance
+
+
+class SceneStreamer:
+    """Loads a scene on background workers and hands it out in per-frame slices.
+
+    A producer thread parses meshes in a process pool (or maps the scene
+    pack) and decodes their textures in a thread pool, as load_scene does.
+    A mesh is ready once all of its textures are decoded; ready meshes wait
+    in a heap ordered by load_priority. upload(), called on the GL thread
+    once per frame, turns the most important ready meshes into SceneObjects
+    until budget_bytes of buffer and texture data have gone to the driver.
+
+    If loading fails, the meshes already decoded are still handed out and
+    the streamer then finishes early with the exception in error, so the
+    caller gets the partial scene and can report it.
+    """
+    def __init__(self, folder_path, manifest, workers=config.LOADER_WORKERS,
+                 pack_path=config.SCENE_PACK_PATH, camera_pos=config.CAMERA_POS):
+        self.folder_path = folder_path
+        self.pack_path = pack_path
+        self.workers = worker_count(workers)
+        self.load_order = manifest.get("load_order", [])
+        self.camera_pos = tuple(camera_pos)
+        self.total = scene_mesh_count(folder_path, pack_path if config.USE_SCENE_PACK else None)
+        self.loaded = 0
+        self.uploaded_bytes = 0
+        self.error = None
+        self.produced = False   # every mesh is in the heap (or was handed out)
+        self.start = time.perf_counter()
+        self._ready = []        # heap of (priority, sequence, mesh, {texture type: (path, levels)})
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._produce, name="scene-streamer", daemon=True)
+        self._thread.start()
+
+    def _push(self, mesh, textures):
+        name, vertices = mesh[0], mesh[2]
+        priority = load_priority(name, vertices, self.load_order, self.camera_pos)
+        decoded = {ttype: (tex_path, future.result()) for ttype, (tex_path, future) in textures.items()}
+        with self._lock:
+            heapq.heappush(self._ready, (priority, next(self._sequence), mesh, decoded))
+
+    def _produce(self):
+        pending = []   # (mesh, {texture type: (path, future)}) awaiting decodes
+        try:
+            decodes = {}   # resolved path -> decode future, each image is decoded once
+
+            def push_done():
+                for entry in list(pending):
+                    if all(future.done() for _, future in entry[1].values()):
+                        self._push(*entry)
+                        pending.remove(entry)
+
+            # Spawned workers never inherit the GL/SDL state of this process
+            mp_context = multiprocessing.get_context("spawn")
+            produced = 0
+            with ProcessPoolExecutor(self.workers, mp_context=mp_context) as mesh_pool, \
+                    ThreadPoolExecutor(self.workers) as decode_pool:
+                for mesh in _iter_meshes(self.folder_path, mesh_pool, self.pack_path):
+                    produced += 1
+                    textures = {}
+                    for ttype, path in texture_paths(mesh[1]).items():
+                        tex_path = resolve_texture_path(path)
+                        if tex_path is None:
+                            continue
+                        if tex_path not in decodes:
+                            decodes[tex_path] = decode_pool.submit(decode_texture, tex_path)
+                        textures[ttype] = (tex_path, decodes[tex_path])
+                    pending.append((mesh, textures))
+                    push_done()
+                while pending:
+                    wait([future for _, textures in pending for _, future in textures.values()],
+                         return_when=FIRST_COMPLETED)
+                    push_done()
+            self.total = produced  # the pack may have been rebuilt with other meshes since __init__
+        except Exception as e:
+            self.error = e
+            # The pools are shut down, so every decode is done: keep the meshes that fully loaded
+            for entry in pending:
+                try:
+                    self._push(*entry)
+                except Exception:
+                    pass  # a failed texture of its own; error reports the first failure
+        self.produced = True
+
+    @property
+    def finished(self):
+        """True once every produced mesh was handed out, also after a failure (see error)"""
+        return self.produced and not self._ready
+
+    def progress(self):
+        """Fraction of the scene uploaded so far"""
+        return min(self.loaded / self.total, 1.0) if self.total else 1.0
+
+    def upload(self, texture_manager, budget_bytes):
+        """Create the next ready objects on the GL thread; returns the new SceneObjects.
+
+        Stops once budget_bytes of vertex, index and newly resident texture
+        data were uploaded, but always takes at least one ready mesh so a
+        mesh larger than the budget still gets in.
+        """
+        objects = []
+        spent = 0
+        while not objects or spent < budget_bytes:
+            with self._lock:
+                if not self._ready:
+                    break
+                _, _, mesh, textures = heapq.heappop(self._ready)
+            name, header, vertices, indices, lods, bvh = mesh
+            obj = SceneObject(name, vertices, indices, {}, header, lods, bvh)
+            spent += obj.vertex_bytes + sum(lod.nbytes for lod in obj.lod_indices)
+            for ttype, (tex_path, levels) in textures.items():
+                resident = texture_manager.resident_bytes
+                obj.textures[ttype] = texture_manager.acquire(tex_path, decoded=levels)
+                spent += max(0, texture_manager.resident_bytes - resident)
+            objects.append(obj)
+        self.loaded += len(objects)
+        self.uploaded_bytes += spent
+        return objects
@@ -1,4 +1,4 @@
-from OpenGL.GL import *
+from bg_loader import bg_vertex_shader, bg_fragment_shader
 
 vertex_shader = """
 #version 330 core
@@ -37,35 +37,200 @@ void main() {
 }
 """
 
-def create_shader_program():
-    vs = glCreateShader(GL_VERTEX_SHADER)
-    fs = glCreateShader(GL_FRAGMENT_SHADER)
+static_vertex_shader = """
+#version 330 core
+layout (location = 0) in vec3 position;
+layout (location = 1) in vec2 texCoord;
+layout (location = 2) in float layer;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+
+out vec2 TexCoord;
+flat out float Layer;
+
+void main() {
+    gl_Position = projection * view * model * vec4(position, 1.0);
+    TexCoord = texCoord;
+    Layer = layer;
+}
+"""
+
+static_fragment_shader = """
+#version 330 core
+in vec2 TexCoord;
+flat in float Layer;
+out vec4 FragColor;
+
+uniform sampler2DArray textureArray;
+
+void main() {
+    FragColor = texture(textureArray, vec3(TexCoord, Layer));
+}
+"""
+
+instanced_vertex_shader = """
+#version 330 core
+layout (location = 0) in vec3 position;
+layout (location = 1) in vec2 texCoord;
+layout (location = 2) in mat4 instanceModel;
+layout (location = 6) in float instanceLayer;
+
+uniform mat4 model;
+uniform mat4 view;
+uniform mat4 projection;
+
+out vec2 TexCoord;
+flat out float Layer;
+
+void main() {
+    gl_Position = projection * view * model * instanceModel * vec4(position, 1.0);
+    TexCoord = texCoord;
+    Layer = instanceLayer;
+}
+"""
+
+MAX_ANIMATED_OBJECTS = 256  # 3 vec4 per object, fits the 16 KB minimum UBO size
+MAX_GLOW_GROUPS = 8
+
+animated_vertex_shader = f"""
+#version 330 core
+#define MAX_OBJECTS {MAX_ANIMATED_OBJECTS}
+#define MAX_GLOW_GROUPS {MAX_GLOW_GROUPS}
+layout (location = 0) in vec3 position;
+layout (location = 1) in vec2 texCoord;
+layout (location = 3) in int objectIndex;
+
+struct ObjectAnim {{
+    vec4 bounce;    // amplitude0, frequency0, amplitude1, frequency1
+    vec4 spin;      // spins (0/1), tilt, phase, rate (radians, radians/s)
+    vec4 emissive;  // base color rgb, glow group (-1 = none)
+}};
+
+layout (std140) uniform ObjectAnims {{
+    ObjectAnim anims[MAX_OBJECTS];
+}};
+
+uniform mat4 view;
+uniform mat4 projection;
+uniform mat4 sceneRotation;
+uniform mat4 dequantize;  // compact vertex positions to object space, identity for float ones
+uniform float time;
+uniform float glowUntil[MAX_GLOW_GROUPS];
+uniform vec3 glowColors[MAX_GLOW_GROUPS];
+
+out vec2 TexCoord;
+flat out int EmissiveGlow;
+flat out vec3 EmissiveColor;
+
+mat4 rotationX(float a) {{
+    float c = cos(a), s = sin(a);
+    return mat4(1, 0, 0, 0,  0, c, s, 0,  0, -s, c, 0,  0, 0, 0, 1);
+}}
+
+mat4 rotationY(float a) {{
+    float c = cos(a), s = sin(a);
+    return mat4(c, 0, -s, 0,  0, 1, 0, 0,  s, 0, c, 0,  0, 0, 0, 1);
+}}
+
+void main() {{
+    ObjectAnim anim = anims[objectIndex];
+
+    float bounce = anim.bounce.x * sin(time * anim.bounce.y) + anim.bounce.z * sin(time * anim.bounce.w);
+    mat4 rotation = anim.spin.x > 0.5
+        ? rotationX(anim.spin.y) * rotationY(anim.spin.z + anim.spin.w * time)
+        : sceneRotation;
+    vec3 objectPosition = (dequantize * vec4(position, 1.0)).xyz;
+    gl_Position = projection * view * rotation * vec4(objectPosition + vec3(0.0, bounce, 0.0), 1.0);
+    TexCoord = texCoord;
+
+    int group = int(anim.emissive.w);
+    bool lit = group >= 0 && time < glowUntil[group];
+    EmissiveGlow = (lit || anim.emissive.rgb != vec3(0.0)) ? 1 : 0;
+    EmissiveColor = lit ? glowColors[group] : anim.emissive.rgb;
+}}
+"""
+
+animated_fragment_shader = """
+#version 330 core
+in vec2 TexCoord;
+flat in int EmissiveGlow;
+flat in vec3 EmissiveColor;
+out vec4 FragColor;
+
+uniform sampler2D texture_diffuse;
+
+void main() {
+    vec4 baseColor = texture(texture_diffuse, TexCoord);
 
-    glShaderSource(vs, vertex_shader)
-    glShaderSource(fs, fragment_shader)
+    if (EmissiveGlow != 0) {
+        baseColor.rgb += EmissiveColor;
+    }
 
-    glCompileShader(vs)
-    glCompileShader(fs)
+    FragColor = baseColor;
+}
+"""
 
-    # Optional: check for compile errors
-    for shader, name in [(vs, "VERTEX"), (fs, "FRAGMENT")]:
-        success = glGetShaderiv(shader, GL_COMPILE_STATUS)
-        if not success:
-            info_log = glGetShaderInfoLog(shader)
-            print(f"ERROR::SHADER_COMPILATION_ERROR of type: {name}\n{info_log.decode()}")
+composite_fragment_shader = """
+#version 330 core
+out vec4 FragColor;
 
-    program = glCreateProgram()
-    glAttachShader(program, vs)
-    glAttachShader(program, fs)
-    glLinkProgram(program)
+uniform sampler2D layerColor;
+uniform sampler2D layerDepth;
 
-    # Optional: check for linking errors
-    success = glGetProgramiv(program, GL_LINK_STATUS)
-    if not success:
-        info_log = glGetProgramInfoLog(program)
-        print(f"ERROR::PROGRAM_LINKING_ERROR\n{info_log.decode()}")
+void main() {
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    FragColor = texelFetch(layerColor, texel, 0);
+    gl_FragDepth = texelFetch(layerDepth, texel, 0).r;
+}
+"""
 
-    glDeleteShader(vs)
-    glDeleteShader(fs)
+upscale_fragment_shader = """
+#version 330 core
+out vec4 FragColor;
 
-    return program
+uniform sampler2D sceneColor;
+uniform sampler2D sceneDepth;
+uniform vec2 viewportSize;  // rendered region of the textures, in texels
+uniform float sharpness;
+
+// Color premultiplied by coverage; texels the scene did not touch keep depth 1
+vec4 tap(ivec2 texel) {
+    texel = clamp(texel, ivec2(0), ivec2(viewportSize) - 1);
+    float covered = texelFetch(sceneDepth, texel, 0).r < 1.0 ? 1.0 : 0.0;
+    return vec4(texelFetch(sceneColor, texel, 0).rgb * covered, covered);
+}
+
+void main() {
+    vec2 source = gl_FragCoord.xy * viewportSize / vec2(textureSize(sceneColor, 0)) - 0.5;
+    ivec2 base = ivec2(floor(source));
+    vec2 f = source - vec2(base);
+    vec4 color = mix(mix(tap(base), tap(base + ivec2(1, 0)), f.x),
+                     mix(tap(base + ivec2(0, 1)), tap(base + ivec2(1, 1)), f.x), f.y);
+    if (color.a <= 0.0) {
+        discard;
+    }
+    vec3 rgb = color.rgb / color.a;
+
+    // Unsharp mask against the neighbours, only inside the silhouette
+    ivec2 nearest = ivec2(source + 0.5);
+    vec4 around = tap(nearest + ivec2(1, 0)) + tap(nearest - ivec2(1, 0))
+                + tap(nearest + ivec2(0, 1)) + tap(nearest - ivec2(0, 1));
+    if (sharpness > 0.0 && color.a >= 1.0 && around.a >= 4.0) {
+        rgb = clamp(rgb + sharpness * (rgb - around.rgb * 0.25), 0.0, 1.0);
+    }
+    FragColor = vec4(rgb, color.a);
+}
+"""
+
+# Every program the renderer uses, built by shader_manager.ShaderManager
+PROGRAM_SOURCES = {
+    "background": (bg_vertex_shader, bg_fragment_shader),
+    "object": (vertex_shader, fragment_shader),
+    "static": (static_vertex_shader, static_fragment_shader),  # StaticBatch: texture array layer per vertex
+    "instanced": (instanced_vertex_shader, static_fragment_shader),  # InstancedMesh: per-instance transform and layer
+    "animated": (animated_vertex_shader, animated_fragment_shader),  # GPUAnimator: transform and glow in the shader
+    "composite": (bg_vertex_shader, composite_fragment_shader),  # StaticLayer: cached color + depth
+    "upscale": (bg_vertex_shader, upscale_fragment_shader),  # SceneTarget: dynamic resolution to display
+}
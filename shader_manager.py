@@ -0,0 +1,198 @@
+"""Compiles, caches and owns every GL program.
+
+Linked programs are saved with glGetProgramBinary under
+config.SHADER_CACHE_DIR, keyed by a hash of the sources and the driver
+(vendor, renderer, version), and loaded back with glProgramBinary on the
+next start. A binary the driver rejects (e.g. after an update it did not
+report) is dropped and the program compiled from source.
+
+Programs that miss the cache are compiled as one batch: every compile
+and link is issued before any status is read, so drivers with
+KHR/ARB_parallel_shader_compile (or threaded compilers) work on them
+concurrently. With the extension, GL_COMPLETION_STATUS is polled so each
+program is checked, cached and wrapped as soon as it is done instead of
+blocking on them in order. Compile and link errors raise ShaderError with the info
+log instead of leaving a broken program to draw black frames.
+"""
+import ctypes
+import glob
+import hashlib
+import os
+import struct
+import time
+from OpenGL.GL import *
+from OpenGL import extensions
+from OpenGL.error import GLError
+from OpenGL.raw.GL.VERSION.GL_2_0 import glGetProgramiv as _glGetProgramiv
+
+# Binary cache file: magic, binary format, then the driver's program binary
+CACHE_MAGIC = b"G1SHBIN\0"
+_HEADER = struct.Struct("<8sI")
+GL_MAX_SHADER_COMPILER_THREADS = 0xFFFFFFFF  # "as many as the driver likes"
+GL_COMPLETION_STATUS = 0x91B1  # same value for the KHR and ARB extensions
+
+
+class ShaderError(RuntimeError):
+    pass
+
+
+class Program:
+    """A linked program with its active uniform and attribute locations."""
+    def __init__(self, name, program_id, from_cache):
+        self.name = name
+        self.id = program_id
+        self.from_cache = from_cache
+        self.uniforms = {}
+        for i in range(glGetProgramiv(program_id, GL_ACTIVE_UNIFORMS)):
+            uniform, size, _ = glGetActiveUniform(program_id, i)
+            uniform = uniform.decode("utf-8")
+            location = glGetUniformLocation(program_id, uniform)
+            if location == -1:
+                continue  # uniform block member, set through its buffer
+            self.uniforms[uniform] = location
+            if uniform.endswith("[0]"):
+                self.uniforms[uniform[:-3]] = location  # arrays are also set by their bare name
+        self.attributes = {}
+        for i in range(glGetProgramiv(program_id, GL_ACTIVE_ATTRIBUTES)):
+            attribute, _, _ = glGetActiveAttrib(program_id, i)
+            attribute = attribute.decode("utf-8")
+            self.attributes[attribute] = glGetAttribLocation(program_id, attribute)
+
+
+def _completed(program):
+    """Whether the driver has finished linking program, without waiting for it.
+
+    Read through the raw entry point: PyOpenGL's glGetProgramiv does not
+    know the output size of GL_COMPLETION_STATUS.
+    """
+    status = GLint()
+    _glGetProgramiv(program, GL_COMPLETION_STATUS, ctypes.byref(status))
+    return bool(status.value)
+
+
+def _info_log(log):
+    return log.decode("utf-8", "replace") if isinstance(log, bytes) else str(log)
+
+
+class ShaderManager:
+    def __init__(self, cache_dir, use_cache=True):
+        self.cache_dir = cache_dir
+        self.programs = {}
+        self.driver = "\n".join(glGetString(e).decode("utf-8", "replace")
+                                for e in (GL_VENDOR, GL_RENDERER, GL_VERSION))
+        self.use_cache = use_cache and glGetIntegerv(GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+        self.parallel = False
+        if extensions.hasGLExtension("GL_KHR_parallel_shader_compile"):
+            from OpenGL.GL.KHR.parallel_shader_compile import glMaxShaderCompilerThreadsKHR
+            glMaxShaderCompilerThreadsKHR(GL_MAX_SHADER_COMPILER_THREADS)
+            self.parallel = True
+        elif extensions.hasGLExtension("GL_ARB_parallel_shader_compile"):
+            from OpenGL.GL.ARB.parallel_shader_compile import glMaxShaderCompilerThreadsARB
+            glMaxShaderCompilerThreadsARB(GL_MAX_SHADER_COMPILER_THREADS)
+            self.parallel = True
+
+    def __getitem__(self, name):
+        return self.programs[name]
+
+    def _cache_path(self, name, vertex_src, fragment_src):
+        key = hashlib.sha1("\0".join((self.driver, vertex_src, fragment_src)).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}.bin")
+
+    def _load_binary(self, path):
+        """Program from a cached binary, or None if missing or rejected by the driver"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) <= _HEADER.size:
+            return None
+        magic, binary_format = _HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC:
+            return None
+        program = glCreateProgram()
+        try:
+            glProgramBinary(program, binary_format, data[_HEADER.size:], len(data) - _HEADER.size)
+            linked = glGetProgramiv(program, GL_LINK_STATUS)
+        except GLError:
+            linked = False  # a format the driver does not know (GL_INVALID_ENUM), e.g. a corrupted header
+        if linked:
+            return program
+        glDeleteProgram(program)
+        os.remove(path)
+        return None
+
+    def _save_binary(self, name, path, program):
+        size = glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH)
+        if not size:
+            return
+        data = (ctypes.c_ubyte * size)()
+        length = GLsizei()
+        binary_format = GLenum()
+        glGetProgramBinary(program, size, ctypes.byref(length), ctypes.byref(binary_format), data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Binaries of older sources of this program are never loaded again
+        for stale in glob.glob(os.path.join(self.cache_dir, f"{name}-*.bin")):
+            os.remove(stale)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(CACHE_MAGIC, binary_format.value))
+            f.write(bytes(data)[:length.value])
+        os.replace(tmp_path, path)
+
+    def load(self, sources):
+        """Create every program in sources ({name: (vertex, fragment source)}); returns {name: Program}"""
+        pending = []
+        for name, (vertex_src, fragment_src) in sources.items():
+            path = self._cache_path(name, vertex_src, fragment_src)
+            program = self._load_binary(path) if self.use_cache else None
+            if program is not None:
+                self.programs[name] = Program(name, program, from_cache=True)
+                continue
+            # Issue the whole compile/link now; statuses are read once everything is queued
+            program = glCreateProgram()
+            shaders = []
+            for shader_type, src in ((GL_VERTEX_SHADER, vertex_src), (GL_FRAGMENT_SHADER, fragment_src)):
+                shader = glCreateShader(shader_type)
+                glShaderSource(shader, src)
+                glCompileShader(shader)
+                glAttachShader(program, shader)
+                shaders.append(shader)
+            if self.use_cache:
+                glProgramParameteri(program, GL_PROGRAM_BINARY_RETRIEVABLE_HINT, GL_TRUE)
+            glLinkProgram(program)
+            pending.append((name, path, program, shaders))
+
+        errors = []
+        while pending:
+            # Finish whichever programs the driver is done with; _finish would block on the rest
+            ready = [entry for entry in pending if not self.parallel or _completed(entry[2])]
+            if not ready:
+                time.sleep(0.001)
+                continue
+            pending = [entry for entry in pending if entry not in ready]
+            self._finish(ready, errors)
+        if errors:
+            raise ShaderError("Shader build failed\n" + "\n".join(errors))
+        return {name: self.programs[name] for name in sources}
+
+    def _finish(self, ready, errors):
+        """Check, cache and wrap linked programs; failures are appended to errors"""
+        for name, path, program, shaders in ready:
+            for shader, stage in zip(shaders, ("vertex", "fragment")):
+                if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+                    errors.append(f"{name} {stage} shader:\n{_info_log(glGetShaderInfoLog(shader))}")
+                glDetachShader(program, shader)
+                glDeleteShader(shader)
+            if not glGetProgramiv(program, GL_LINK_STATUS):
+                errors.append(f"{name} link:\n{_info_log(glGetProgramInfoLog(program))}")
+                glDeleteProgram(program)
+                continue
+            if self.use_cache:
+                self._save_binary(name, path, program)
+            self.programs[name] = Program(name, program, from_cache=False)
+
+    def delete(self):
+        for program in self.programs.values():
+            glDeleteProgram(program.id)
+        self.programs.clear()
@@ -0,0 +1,67 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+import config
+
+SOUND_EXTENSIONS = (".mp3", ".ogg", ".wav")
+
+
+class SoundBank:
+    """Sound effects decoded once and played through a small channel pool.
+
+    Every effect in directory (except the files in exclude, e.g. the
+    background music) is decoded to PCM on a background thread as soon as
+    the bank is created, with its gain from gains (default_gain otherwise)
+    applied once. play() only hands the ready buffer to a free channel;
+    it waits for the decode only if the effect is triggered before its
+    decode has finished. The time spent in each play() call is recorded.
+    """
+    def __init__(self, directory, gains, default_gain, channels, first_channel=1, exclude=()):
+        self.gains = gains
+        self.default_gain = default_gain
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), first_channel + channels))
+        pygame.mixer.set_reserved(first_channel + channels)
+        self.channels = [pygame.mixer.Channel(first_channel + i) for i in range(channels)]
+        self.next_channel = 0
+        self.latencies = []  # seconds spent in each play()
+
+        names = sorted(f for f in os.listdir(directory)
+                       if f.lower().endswith(SOUND_EXTENSIONS) and f not in exclude)
+        self._executor = ThreadPoolExecutor(1)
+        self.sounds = {name: self._executor.submit(self._decode, os.path.join(directory, name), name)
+                       for name in names}
+        self._executor.shutdown(wait=False)
+
+    def _decode(self, path, name):
+        sound = pygame.mixer.Sound(path)
+        sound.set_volume(self.gains.get(name, self.default_gain))
+        return sound
+
+    def _free_channel(self):
+        """First idle channel of the pool, or the least recently started one"""
+        for i in range(len(self.channels)):
+            channel = self.channels[(self.next_channel + i) % len(self.channels)]
+            if not channel.get_busy():
+                break
+        else:
+            channel = self.channels[self.next_channel]
+        self.next_channel = (self.channels.index(channel) + 1) % len(self.channels)
+        return channel
+
+    def play(self, name):
+        start = time.perf_counter()
+        sound = self.sounds[name].result()
+        self._free_channel().play(sound)
+        self.latencies.append(time.perf_counter() - start)
+        return sound
+
+    def report(self):
+        """One-line summary of trigger latency, plus the mixer's output buffer delay"""
+        if not self.latencies:
+            return "Sound triggers: none"
+        frequency, _, _ = pygame.mixer.get_init()
+        buffer_ms = 1000.0 * config.AUDIO_BUFFER / frequency
+        latencies = sorted(self.latencies)
+        return (f"Sound triggers: {len(latencies)}, mean {1000 * sum(latencies) / len(latencies):.3f} ms, "
+                f"max {1000 * latencies[-1]:.3f} ms in play(), plus ~{buffer_ms:.1f} ms mixer buffer")
@@ -0,0 +1,78 @@
+from OpenGL.GL import *
+
+
+class StaticLayer:
+    """Offscreen color + depth copy of everything that only moves with the camera.
+
+    The background and the static props are drawn into the layer's
+    framebuffer once per camera pose (key); later frames composite it,
+    depth included, with one fullscreen quad and draw only the animated
+    objects on top. Any key change, e.g. a new camera pose or viewport
+    size, redraws it.
+    """
+    def __init__(self, size, program, vao, gl_state):
+        self.size = size
+        self.program = program
+        self.vao = vao
+        self.gl_state = gl_state
+        self.key = None
+        self.rebuilds = 0
+
+        self.color = glGenTextures(1)
+        self.depth = glGenTextures(1)
+        for texture, internal, fmt, gl_type in ((self.color, GL_RGBA8, GL_RGBA, GL_UNSIGNED_BYTE),
+                                                (self.depth, GL_DEPTH_COMPONENT24, GL_DEPTH_COMPONENT, GL_UNSIGNED_INT)):
+            glBindTexture(GL_TEXTURE_2D, texture)
+            glTexImage2D(GL_TEXTURE_2D, 0, internal, size[0], size[1], 0, fmt, gl_type, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glBindTexture(GL_TEXTURE_2D, 0)
+        gl_state.invalidate()
+
+        self.fbo = glGenFramebuffers(1)
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, self.color, 0)
+        glFramebufferTexture2D(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_TEXTURE_2D, self.depth, 0)
+        status = glCheckFramebufferStatus(GL_FRAMEBUFFER)
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        if status != GL_FRAMEBUFFER_COMPLETE:
+            self.delete()
+            raise RuntimeError(f"Static layer framebuffer incomplete (status 0x{status:x})")
+
+    def is_current(self, key):
+        return key == self.key
+
+    def begin(self, key, viewport=None):
+        """Redirect drawing into the layer, which will hold the scene for key.
+
+        viewport is the (width, height) drawn to, the full layer by default;
+        composite() reads the same pixels back, so it must match the
+        viewport of the framebuffer composited onto (dynamic resolution).
+        """
+        self.key = key
+        self.rebuilds += 1
+        width, height = viewport or self.size
+        glBindFramebuffer(GL_FRAMEBUFFER, self.fbo)
+        glViewport(0, 0, width, height)
+
+    def end(self):
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+
+    def composite(self):
+        """Copy color and depth onto the current framebuffer"""
+        gl_state = self.gl_state
+        glEnable(GL_DEPTH_TEST)
+        glDepthFunc(GL_ALWAYS)
+        gl_state.use_program(self.program)
+        gl_state.bind_vertex_array(self.vao)
+        gl_state.bind_texture(0, GL_TEXTURE_2D, self.color)
+        gl_state.bind_texture(1, GL_TEXTURE_2D, self.depth)
+        gl_state.set_uniform("layerColor", 0)
+        gl_state.set_uniform("layerDepth", 1)
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        gl_state.draws += 1
+        glDepthFunc(GL_LESS)
+
+    def delete(self):
+        glDeleteFramebuffers(1, [self.fbo])
+        glDeleteTextures(2, [self.color, self.depth])
@@ -0,0 +1,56 @@
+"""MeshBVH.intersect against a brute-force test of every triangle.
+
+Run with `python -m pytest test_picking.py`.
+"""
+import os
+import numpy as np
+from mesh_format import load_mesh
+from picking import mesh_bvh
+
+MESH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "materials", "spw_gradient.txt")
+RAYS = 300
+
+
+def brute_force(positions, indices, origin, direction):
+    """Nearest t > 0 over all triangles (Moller-Trumbore), or None"""
+    corners = positions[indices.reshape(-1, 3)].astype(np.float64)
+    v0, e1, e2 = corners[:, 0], corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+    p = np.cross(direction, e2)
+    det = (e1 * p).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        inv = 1.0 / det
+        s = origin - v0
+        u = (s * p).sum(axis=1) * inv
+        q = np.cross(s, e1)
+        v = (q @ direction) * inv
+        t = (e2 * q).sum(axis=1) * inv
+        hits = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+    return float(t[hits].min()) if hits.any() else None
+
+
+def test_bvh_matches_brute_force():
+    _, _, vertices, indices, _ = load_mesh(MESH_PATH)
+    positions = np.asarray(vertices, dtype=np.float32)[:, :3]
+    indices = np.asarray(indices).reshape(-1)
+    bvh = mesh_bvh(vertices, indices)
+
+    rng = np.random.default_rng(0)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    center, size = (low + high) / 2, float(np.linalg.norm(high - low))
+    hits = 0
+    for _ in range(RAYS):
+        # From a sphere around the mesh towards a random point of its box
+        outside = rng.normal(size=3)
+        origin = center + size * outside / np.linalg.norm(outside)
+        direction = rng.uniform(low, high) - origin
+        direction /= np.linalg.norm(direction)
+
+        expected = brute_force(positions, indices, origin, direction)
+        result = bvh.intersect(origin, direction)
+        if expected is None:
+            assert result is None
+        else:
+            assert result is not None
+            assert abs(result[0] - expected) <= 1e-4 * size
+            hits += 1
+    assert hits > RAYS // 4  # the rays mostly hit, so the comparison is meaningful
@@ -0,0 +1,131 @@
+"""On-disk cache of decoded, GL-ready RGBA mip chains.
+
+Each source image gets one cache file holding every mip level already
+flipped for GL, so a warm start maps the file instead of decoding the image.
+Nothing here touches GL; bake offline with `python texture_cache.py`.
+"""
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from PIL import Image
+import config
+from asset_cache import rewrite_table, source_stamp, stamp_is_current
+
+# Cache layout:
+#   [header]  magic, version, table offset, table size
+#   [levels]  RGBA8 mip levels, largest first (16-byte aligned)
+#   [table]   JSON: source stamp + per-level width/height/offset
+CACHE_MAGIC = b"G1TEXMP\0"
+CACHE_VERSION = 1
+_HEADER = struct.Struct("<8sIQQ")
+_ALIGN = 16
+
+
+def decode_rgba(tex_path):
+    """Decode an image to a (H, W, 4) uint8 array flipped for GL."""
+    image = Image.open(tex_path).convert("RGBA")
+    image = image.transpose(Image.FLIP_TOP_BOTTOM)
+    return np.asarray(image)
+
+
+def build_mip_chain(rgba):
+    """Full mip chain for a (H, W, 4) uint8 image, largest level first.
+
+    Each level is a 2x2 box filter of the one above it, computed for the
+    whole image at once. Level sizes follow GL (max(1, n // 2)); on odd
+    sizes the last row/column is dropped.
+    """
+    levels = [np.ascontiguousarray(rgba)]
+    while levels[-1].shape[0] > 1 or levels[-1].shape[1] > 1:
+        src = levels[-1].astype(np.uint16)
+        h, w = src.shape[:2]
+        if h > 1:
+            src = src[:h - h % 2].reshape(h // 2, 2, -1, 4).sum(axis=1)
+        else:
+            src = src * 2
+        if w > 1:
+            src = src[:, :w - w % 2].reshape(src.shape[0], -1, 2, 4).sum(axis=2)
+        else:
+            src = src * 2
+        levels.append(((src + 2) // 4).astype(np.uint8))
+    return levels
+
+
+def cache_path_for(tex_path):
+    return os.path.join(config.TEXTURE_CACHE_DIR, os.path.basename(tex_path) + ".mips")
+
+
+def write_mip_cache(cache_path, tex_path, levels):
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    table = {"source": source_stamp(tex_path), "levels": []}
+
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for level in levels:
+            f.write(b"\0" * (-f.tell() % _ALIGN))
+            table["levels"].append({"width": level.shape[1], "height": level.shape[0], "offset": f.tell()})
+            f.write(level.tobytes())
+
+        table_bytes = json.dumps(table).encode("utf-8")
+        table_offset = f.tell()
+        f.write(table_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, table_offset, len(table_bytes)))
+
+    os.replace(tmp_path, cache_path)
+
+
+def read_mip_cache(cache_path, tex_path):
+    """Memory-map a cache file; returns [(width, height, data)] or None if stale.
+
+    data is a read-only view into the mapping, ready for glTexImage2D.
+    """
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, table_offset, table_size = _HEADER.unpack_from(mm, 0)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return None
+        table = json.loads(mm[table_offset:table_offset + table_size])
+    except (OSError, ValueError, struct.error):
+        return None
+    mtime_ns = table["source"]["mtime_ns"]
+    if table["source"]["path"] != tex_path or not stamp_is_current(table["source"]):
+        return None
+    if table["source"]["mtime_ns"] != mtime_ns:
+        rewrite_table(cache_path, _HEADER, (CACHE_MAGIC, CACHE_VERSION), table_offset, table)
+
+    return [(lv["width"], lv["height"],
+             np.frombuffer(mm, dtype=np.uint8, count=lv["width"] * lv["height"] * 4, offset=lv["offset"]))
+            for lv in table["levels"]]
+
+
+def load_mip_chain(tex_path):
+    """Return [(width, height, data)] for tex_path, baking its cache entry on a miss."""
+    cache_path = cache_path_for(tex_path)
+    levels = read_mip_cache(cache_path, tex_path)
+    if levels is None:
+        chain = build_mip_chain(decode_rgba(tex_path))
+        write_mip_cache(cache_path, tex_path, chain)
+        levels = [(lv.shape[1], lv.shape[0], lv) for lv in chain]
+    return levels
+
+
+def bake_texture_cache(folder="texture"):
+    """Bake (or refresh) the cache entry of every image in folder."""
+    for filename in sorted(os.listdir(folder)):
+        if os.path.splitext(filename)[1].lower() in (".png", ".jpg", ".jpeg"):
+            tex_path = os.path.join(folder, filename)
+            if read_mip_cache(cache_path_for(tex_path), tex_path) is None:
+                load_mip_chain(tex_path)
+                print(f"Saved: {cache_path_for(tex_path)}")
+
+
+# === Run the script ===
+if __name__ == "__main__":
+    bake_texture_cache()
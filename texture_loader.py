@@ -1,28 +1,185 @@
+from collections import OrderedDict
 from OpenGL.GL import *
-from PIL import Image
 import os
+import config
+from texture_cache import build_mip_chain, decode_rgba, load_mip_chain
 
-def load_texture(base_path):
-    """Load texture with .png/.jpg/.jpeg extension fallback"""
+def resolve_texture_path(base_path):
+    """Find base_path in texture/ with .png/.jpg/.jpeg extension fallback"""
     folder = "texture"
     base_name = os.path.splitext(os.path.basename(base_path))[0]
     extensions = [".png", ".jpg", ".jpeg"]
 
     for ext in extensions:
         tex_path = os.path.join(folder, base_name + ext)
-        
         if os.path.exists(tex_path):
-            image = Image.open(tex_path).convert("RGBA")
-            image = image.transpose(Image.FLIP_TOP_BOTTOM)
-            img_data = image.tobytes()
-            width, height = image.size
-
-            texture_id = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, texture_id)
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)         
-            return texture_id
-
-   
-    return 0  # return 0 if not found
+            return tex_path
+    return None
+
+
+# Trilinear filtering needs the mip chain; without it keep the old GL_LINEAR
+DEFAULT_MIN_FILTER = GL_LINEAR_MIPMAP_LINEAR if config.TEXTURE_MIPMAPS else GL_LINEAR
+
+
+def decode_texture(tex_path):
+    """Decode an image to its mip levels [(width, height, RGBA data)], flipped for GL.
+
+    With config.TEXTURE_CACHE the levels are memory-mapped from the baked
+    cache (decoding only on a miss). Touches no GL state, so it is safe to
+    run on worker threads.
+    """
+    if config.TEXTURE_CACHE:
+        levels = load_mip_chain(tex_path)
+    else:
+        rgba = decode_rgba(tex_path)
+        chain = build_mip_chain(rgba) if config.TEXTURE_MIPMAPS else [rgba]
+        levels = [(lv.shape[1], lv.shape[0], lv) for lv in chain]
+    return levels if config.TEXTURE_MIPMAPS else levels[:1]
+
+
+def upload_texture(levels, min_filter=DEFAULT_MIN_FILTER, mag_filter=GL_LINEAR):
+    """Create a GL texture from decode_texture output, level by level (GL thread only)"""
+    texture_id = glGenTextures(1)
+    glBindTexture(GL_TEXTURE_2D, texture_id)
+    for level, (width, height, img_data) in enumerate(levels):
+        glTexImage2D(GL_TEXTURE_2D, level, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(levels) - 1)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, min_filter)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, mag_filter)
+    return texture_id
+
+
+class TextureHandle:
+    """Shared, reference-counted reference to a texture owned by a TextureManager.
+
+    Read .id whenever the texture is about to be bound: it marks the
+    texture as recently drawn and reloads it if it was evicted.
+    """
+    def __init__(self, manager, key):
+        self.manager = manager
+        self.key = key
+        self.released = False
+
+    @property
+    def id(self):
+        return self.manager.resident_id(self.key)
+
+    @property
+    def path(self):
+        return self.manager.entry(self.key).path
+
+    @property
+    def size(self):
+        """(width, height) of the base level"""
+        entry = self.manager.entry(self.key)
+        return entry.width, entry.height
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.manager.release(self.key)
+
+
+class _TextureEntry:
+    def __init__(self, path, params):
+        self.path = path
+        self.params = params
+        self.refs = 0
+        self.texture_id = 0  # 0 while evicted
+        self.frame = -1      # last frame its id was read in
+        self.nbytes = 0
+        self.width = self.height = 0
+
+
+class TextureManager:
+    """Deduplicating texture cache with a VRAM budget.
+
+    Textures are keyed by resolved path and upload parameters, so every
+    material naming the same image shares one GL texture. When the resident
+    total exceeds budget_bytes, the least recently drawn textures are
+    evicted; a handle to an evicted texture reloads it on next use.
+    Textures whose id was read since begin_frame() are pinned: draws queued
+    earlier in the frame still bind them, so they are never evicted before
+    the next frame, even if that leaves the total over budget meanwhile.
+    Must only be used from the thread that owns the GL context; gl_state,
+    if given, is told when an upload changes the bound texture.
+    """
+    def __init__(self, budget_bytes=config.TEXTURE_BUDGET_BYTES, gl_state=None):
+        self.budget_bytes = budget_bytes
+        self.gl_state = gl_state
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.frame = 0
+        self._entries = OrderedDict()  # key -> _TextureEntry, least recently drawn first
+
+    def acquire(self, base_path, min_filter=DEFAULT_MIN_FILTER, mag_filter=GL_LINEAR, decoded=None):
+        """Return a new handle for base_path, or None if no such image exists.
+
+        decoded may carry decode_texture output prepared on a worker thread.
+        """
+        tex_path = resolve_texture_path(base_path)
+        if tex_path is None:
+            return None
+        key = (os.path.realpath(tex_path), min_filter, mag_filter)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _TextureEntry(tex_path, (min_filter, mag_filter))
+            self._make_resident(key, entry, decoded)
+        entry.refs += 1
+        return TextureHandle(self, key)
+
+    def begin_frame(self):
+        """Unpin the last frame's textures and evict down to the budget"""
+        self.frame += 1
+        self._enforce_budget(keep=None)
+
+    def entry(self, key):
+        return self._entries[key]
+
+    def resident_id(self, key):
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        entry.frame = self.frame
+        if not entry.texture_id:
+            self._make_resident(key, entry)
+        return entry.texture_id
+
+    def release(self, key):
+        entry = self._entries[key]
+        entry.refs -= 1
+        if entry.refs <= 0:
+            self._evict(entry)
+            del self._entries[key]
+
+    def clear(self):
+        for entry in self._entries.values():
+            self._evict(entry)
+        self._entries.clear()
+
+    def _make_resident(self, key, entry, decoded=None):
+        if decoded is None:
+            decoded = decode_texture(entry.path)
+        entry.texture_id = upload_texture(decoded, *entry.params)
+        if self.gl_state is not None:
+            self.gl_state.invalidate()
+        entry.width, entry.height = decoded[0][:2]
+        entry.nbytes = sum(width * height * 4 for width, height, _ in decoded)
+        self.resident_bytes += entry.nbytes
+        self._entries.move_to_end(key)
+        self._enforce_budget(keep=key)
+
+    def _enforce_budget(self, keep):
+        if not self.budget_bytes:
+            return
+        for key, entry in self._entries.items():
+            if self.resident_bytes <= self.budget_bytes:
+                break
+            if key != keep and entry.texture_id and entry.frame != self.frame:
+                self._evict(entry)
+                self.evictions += 1
+
+    def _evict(self, entry):
+        if entry.texture_id:
+            glDeleteTextures(1, [entry.texture_id])
+            entry.texture_id = 0
+            self.resident_bytes -= entry.nbytes
@@ -0,0 +1,152 @@
+"""Compact vertex layout for SceneObject buffers.
+
+The float layout is x y z u v as float32, 20 bytes per vertex. The
+compact one is 12:
+
+    position  3 x int16 + 2 bytes padding, normalized against the object's AABB
+    uv        2 x uint16 normalized if every UV is in [0, 1], else 2 x float16
+
+The GPU reads positions normalized to [-1, 1]; SceneObject.dequantize
+(translate to the AABB center, scale by its half extent) maps them back
+and is folded into the model matrix. Kept free of GL imports like
+mesh_format, so pack builders and workers can use it.
+
+Usage: python vertex_format.py [materials folder]
+prints the memory, per-frame bandwidth and error of the compact layout
+for every mesh.
+"""
+import sys
+import numpy as np
+from mesh_format import VERTEX_COMPONENTS
+
+COMPACT_DTYPE = np.dtype([("position", "<i2", (4,)), ("uv", "<u2", (2,))])
+FLOAT_VERTEX_BYTES = VERTEX_COMPONENTS * 4
+UV_UNORM16 = "unorm16"
+UV_HALF = "half"
+_POSITION_MAX = 32767
+_UV_MAX = 65535
+
+
+class CompactVertices:
+    """Quantized vertices (COMPACT_DTYPE) with the AABB and UV encoding needed to decode them.
+
+    radius is the largest distance of a vertex from center, kept so
+    bounds() needs no decode.
+    """
+    def __init__(self, data, center, extent, uv_format, radius=None):
+        self.data = data
+        self.center = np.asarray(center, dtype=np.float32)
+        self.extent = np.asarray(extent, dtype=np.float32)
+        self.uv_format = uv_format
+        self.radius = radius
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def params(self):
+        """JSON-friendly decode parameters, see from_params"""
+        return {"center": self.center.tolist(), "extent": self.extent.tolist(), "uv": self.uv_format,
+                "radius": self.radius}
+
+    @classmethod
+    def from_params(cls, data, params):
+        return cls(data, params["center"], params["extent"], params["uv"], params.get("radius"))
+
+    def bounds(self):
+        """(AABB min, AABB max, radius around center) of the decoded positions, from the int16 range"""
+        if not len(self.data):
+            return np.zeros(3, dtype=np.float32), np.zeros(3, dtype=np.float32), 0.0
+        quantized = self.data["position"][:, :3]
+        step = self.extent / np.float32(_POSITION_MAX)
+        low = self.center + step * quantized.min(axis=0)
+        high = self.center + step * quantized.max(axis=0)
+        radius = self.radius
+        if radius is None:
+            radius = float(np.sqrt(((self.positions() - self.center) ** 2).sum(axis=1).max()))
+        return low, high, radius
+
+    def positions(self):
+        return self.center + self.extent * (self.data["position"][:, :3] / np.float32(_POSITION_MAX))
+
+    def uvs(self):
+        if self.uv_format == UV_HALF:
+            return self.data["uv"].view(np.float16).astype(np.float32)
+        return self.data["uv"] / np.float32(_UV_MAX)
+
+    def dequantize(self):
+        """(N, 5) float32 as the GPU will see it"""
+        vertices = np.empty((len(self.data), VERTEX_COMPONENTS), dtype=np.float32)
+        vertices[:, :3] = self.positions()
+        vertices[:, 3:] = self.uvs()
+        return vertices
+
+
+def quantize_vertices(vertices):
+    """CompactVertices for float (N, 5) vertices"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)
+    positions, uvs = vertices[:, :3], vertices[:, 3:]
+    if len(vertices):
+        low, high = positions.min(axis=0), positions.max(axis=0)
+    else:
+        low = high = np.zeros(3, dtype=np.float32)
+    center = (low + high) / 2
+    extent = np.where(high > low, (high - low) / 2, 1.0).astype(np.float32)  # flat axes still decode
+
+    data = np.zeros(len(vertices), dtype=COMPACT_DTYPE)
+    data["position"][:, :3] = np.clip(np.rint((positions - center) / extent * _POSITION_MAX),
+                                      -_POSITION_MAX, _POSITION_MAX)
+    # UVs outside [0, 1] (GL_REPEAT tiling) need float16's range
+    if len(uvs) and (uvs.min() < 0.0 or uvs.max() > 1.0):
+        uv_format = UV_HALF
+        data["uv"] = uvs.astype(np.float16).view(np.uint16)
+    else:
+        uv_format = UV_UNORM16
+        data["uv"] = np.rint(uvs * _UV_MAX)
+    radius = float(np.sqrt(((positions - center) ** 2).sum(axis=1).max())) if len(vertices) else 0.0
+    return CompactVertices(data, center, extent, uv_format, radius)
+
+
+def quantization_error(vertices, compact):
+    """(largest position error in scene units, largest UV error) of compact against the float vertices"""
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, VERTEX_COMPONENTS)
+    if not len(vertices):
+        return 0.0, 0.0
+    decoded = compact.dequantize()
+    return (float(np.abs(decoded[:, :3] - vertices[:, :3]).max()),
+            float(np.abs(decoded[:, 3:] - vertices[:, 3:]).max()))
+
+
+def report(folder="materials", fps=60):
+    """Print per mesh: buffer sizes, vertex fetch bandwidth at fps, and the quantization error"""
+    from PIL import Image
+    from mesh_format import load_mesh
+    from scene_pack import txt_sources
+    from texture_loader import resolve_texture_path
+
+    print(f"{'mesh':<18}{'vertices':>9}{'float KiB':>11}{'compact KiB':>13}{'saved MB/s':>12}"
+          f"{'pos err':>10}{'uv':>9}{'texels':>8}")
+    total_float = total_compact = 0
+    for path in txt_sources(folder):
+        name, header, vertices, _, _ = load_mesh(path)
+        compact = quantize_vertices(vertices)
+        position_error, uv_error = quantization_error(vertices, compact)
+        tex_path = resolve_texture_path(header.get("BaseColor", "None"))
+        texels = uv_error * max(Image.open(tex_path).size) if tex_path else float("nan")
+        float_bytes = len(vertices) * FLOAT_VERTEX_BYTES
+        # Every vertex is fetched at least once per draw
+        saved = (float_bytes - compact.nbytes) * fps / 1e6
+        print(f"{name:<18}{len(vertices):>9}{float_bytes / 1024:>11.1f}{compact.nbytes / 1024:>13.1f}"
+              f"{saved:>12.2f}{position_error:>10.2e}{compact.uv_format:>9}{texels:>8.3f}")
+        total_float += float_bytes
+        total_compact += compact.nbytes
+    print(f"Total: {total_float / 2 ** 20:.2f} MiB -> {total_compact / 2 ** 20:.2f} MiB "
+          f"({100 * (1 - total_compact / max(total_float, 1)):.0f}% saved)")
+
+
+# === Run the script ===
+if __name__ == "__main__":
+    report(*sys.argv[1:2])